@@ -45,7 +45,9 @@ async function decryptApiKey(ctx: FlashcardActionCtx, encryptedApiKey: string) {
 }
 
 export async function callClaude(apiKey: string, prompt: string) {
-	const response = await fetch('https://api.anthropic.com/v1/messages', {
+	// CLAUDE_API_BASE_URL lets local test runs point at the on-box AI stub (testsprite_tests/harness)
+	const baseUrl = process.env.CLAUDE_API_BASE_URL ?? 'https://api.anthropic.com';
+	const response = await fetch(`${baseUrl}/v1/messages`, {
 		method: 'POST',
 		headers: {
 			'x-api-key': apiKey,
@@ -103,7 +103,8 @@ export const updateOrganizationClaudeApiKey = action({
 		}
 
 		// Validate API key by making a test request to Claude
-		const testResponse = await fetch('https://api.anthropic.com/v1/messages', {
+		const baseUrl = process.env.CLAUDE_API_BASE_URL ?? 'https://api.anthropic.com';
+		const testResponse = await fetch(`${baseUrl}/v1/messages`, {
 			method: 'POST',
 			headers: {
 				'Content-Type': 'application/json',
@@ -22,7 +22,8 @@ export const validateClaudeApiKey = internalAction({
 		try {
 			// Make a minimal API call to validate the key
 			// Using messages.create with minimal content
-			const response = await fetch('https://api.anthropic.com/v1/messages', {
+			const baseUrl = process.env.CLAUDE_API_BASE_URL ?? 'https://api.anthropic.com';
+			const response = await fetch(`${baseUrl}/v1/messages`, {
 				method: 'POST',
 				headers: {
 					'x-api-key': args.apiKey,
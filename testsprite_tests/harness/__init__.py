@@ -0,0 +1,6 @@
+"""Shared tooling for the TestSprite Playwright scripts in ``testsprite_tests/``.
+
+The ``TC*.py`` scripts stay self-contained; this package holds the pieces that
+several of them (and the benchmarks built on top of them) need. Run modules
+from the ``testsprite_tests`` directory, e.g. ``python -m harness.ai_stub``.
+"""
@@ -0,0 +1,234 @@
+"""Parallel axe-core accessibility audit across every route (TC015 for the whole app).
+
+Audits every page from ``src/routes`` whose path can be filled in (the
+workspace ``{slug}`` comes from the login; other parameters are skipped):
+public pages anonymously, protected pages with the test session. A pool of
+browser contexts pulls routes from a shared queue; each context gets the
+axe-core bundle once as an init script, so every navigation already has
+``window.axe`` without another download or injection round-trip.
+
+Violations are deduplicated by rule and selector across routes, so a broken
+sidebar button is one finding listing every route it appears on.
+
+    python -m harness.a11y_audit --workers 6 --tags wcag2a,wcag2aa --fail-on serious
+
+The bundle is cached in ``tmp/cache``; it is copied from
+``node_modules/axe-core`` when installed and downloaded once otherwise.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import shutil
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlsplit
+
+from playwright.async_api import Browser, Error as PlaywrightError, async_playwright
+
+from .config import REPO_ROOT, TMP_DIR, Settings, load_settings
+from .results import ResultsStore
+from .routes import discover_routes
+from .session import AuthSession, LoginError, api_login, launch_browser, new_context
+
+AXE_VERSION = "4.10.2"
+AXE_CDN_URL = "https://cdn.jsdelivr.net/npm/axe-core@{version}/axe.min.js"
+CACHE_DIR = TMP_DIR / "cache"
+IMPACTS = ["minor", "moderate", "serious", "critical"]
+
+RUN_AXE = """
+async (tags) => {
+  const options = { resultTypes: ['violations'] };
+  if (tags.length) options.runOnly = { type: 'tag', values: tags };
+  const { violations } = await window.axe.run(document, options);
+  return violations.map((v) => ({
+    rule: v.id,
+    impact: v.impact,
+    help: v.help,
+    helpUrl: v.helpUrl,
+    nodes: v.nodes.map((n) => ({ target: n.target.join(' '), html: n.html.slice(0, 200) })),
+  }));
+}
+"""
+
+
+@dataclass
+class Finding:
+    rule: str
+    impact: str
+    help: str
+    help_url: str
+    selector: str
+    html: str
+    routes: list[str] = field(default_factory=list)
+
+
+@dataclass
+class Audit:
+    path: str
+    authenticated: bool
+    final_path: str = ""
+    violations: int = 0
+    ms: float = 0.0
+    error: str = ""
+
+
+def axe_bundle(version: str = AXE_VERSION) -> str:
+    """axe-core source, from the local cache, ``node_modules`` or (once) the CDN."""
+    cached = CACHE_DIR / f"axe-core-{version}.min.js"
+    if not cached.exists():
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        local = REPO_ROOT / "node_modules" / "axe-core" / "axe.min.js"
+        if local.exists():
+            shutil.copyfile(local, cached)
+        else:
+            with urllib.request.urlopen(AXE_CDN_URL.format(version=version), timeout=30) as response:
+                cached.write_bytes(response.read())
+    return cached.read_text(encoding="utf-8")
+
+
+def audit_targets(session: AuthSession | None, include: re.Pattern[str] | None, exclude: re.Pattern[str] | None) -> list[Audit]:
+    audits: list[Audit] = []
+    for route in discover_routes():
+        if route.kind != "page" or any(p != "slug" for p in route.params):
+            continue
+        if not route.public and session is None:
+            continue
+        if route.params and not (session and session.workspace_slug):
+            continue
+        path = route.url(slug=session.workspace_slug) if route.params else route.path
+        if (include and not include.search(path)) or (exclude and exclude.search(path)):
+            continue
+        audits.append(Audit(path, authenticated=not route.public))
+    return audits
+
+
+async def run_audit(args: argparse.Namespace) -> tuple[list[Audit], dict[tuple[str, str], Finding], float]:
+    settings = load_settings()
+    bundle = axe_bundle(args.axe_version)
+    tags = [t for t in args.tags.split(",") if t]
+    include = re.compile(args.include) if args.include else None
+    exclude = re.compile(args.exclude) if args.exclude else None
+
+    async with async_playwright() as pw:
+        try:
+            session: AuthSession | None = await api_login(pw, settings)
+        except LoginError as exc:
+            print(f"auditing public routes only: {exc}")
+            session = None
+        audits = audit_targets(session, include, exclude)
+        browser = await launch_browser(pw)
+        findings: dict[tuple[str, str], Finding] = {}
+        seen_final: set[str] = set()
+        start = time.perf_counter()
+        try:
+            queues = {False: asyncio.Queue(), True: asyncio.Queue()}
+            for audit in audits:
+                queues[audit.authenticated].put_nowait(audit)
+            workers = [
+                worker(browser, settings, session if authed else None, bundle, queues[authed], tags, findings, seen_final, args)
+                for authed in (False, True)
+                for _ in range(min(args.workers, queues[authed].qsize()))
+            ]
+            await asyncio.gather(*workers)
+        finally:
+            await browser.close()
+        return audits, findings, time.perf_counter() - start
+
+
+async def worker(
+    browser: Browser,
+    settings: Settings,
+    session: AuthSession | None,
+    bundle: str,
+    queue: asyncio.Queue[Audit],
+    tags: list[str],
+    findings: dict[tuple[str, str], Finding],
+    seen_final: set[str],
+    args: argparse.Namespace,
+) -> None:
+    context = await new_context(browser, settings, session)
+    await context.add_init_script(script=bundle)
+    page = await context.new_page()
+    try:
+        while not queue.empty():
+            audit = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                await page.goto(audit.path, wait_until="load", timeout=args.nav_timeout)
+                audit.final_path = urlsplit(page.url).path
+                if audit.final_path in seen_final:
+                    audit.error = f"redirected to already audited {audit.final_path}"
+                    continue
+                seen_final.add(audit.final_path)
+                await page.wait_for_timeout(args.settle)
+                violations: list[dict[str, Any]] = await page.evaluate(RUN_AXE, tags)
+            except PlaywrightError as exc:
+                audit.error = str(exc).splitlines()[0][:160]
+                continue
+            finally:
+                audit.ms = (time.perf_counter() - started) * 1000
+            for violation in violations:
+                for node in violation["nodes"]:
+                    audit.violations += 1
+                    key = (violation["rule"], node["target"])
+                    finding = findings.get(key)
+                    if finding is None:
+                        finding = findings[key] = Finding(
+                            violation["rule"], violation["impact"] or "minor", violation["help"], violation["helpUrl"], node["target"], node["html"]
+                        )
+                    finding.routes.append(audit.final_path)
+    finally:
+        await context.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Parallel axe-core audit of every route")
+    parser.add_argument("--workers", type=int, default=4, help="browser contexts per credential (anonymous/authenticated)")
+    parser.add_argument("--tags", default="wcag2a,wcag2aa,wcag21a,wcag21aa", help="axe rule tags; empty runs every rule")
+    parser.add_argument("--include", help="only audit paths matching this regex")
+    parser.add_argument("--exclude", default=r"^/(test|test-flags|test-refs|demo-control-panel)(/|$)", help="skip paths matching this regex")
+    parser.add_argument("--settle", type=float, default=500, help="ms to wait after load for client rendering")
+    parser.add_argument("--nav-timeout", type=float, default=15000)
+    parser.add_argument("--fail-on", choices=[*IMPACTS, "none"], default="serious", help="lowest impact that fails the run")
+    parser.add_argument("--axe-version", default=AXE_VERSION)
+    args = parser.parse_args(argv)
+
+    audits, findings, elapsed = asyncio.run(run_audit(args))
+    ordered = sorted(findings.values(), key=lambda f: (-IMPACTS.index(f.impact), f.rule, f.selector))
+    by_impact = {impact: sum(f.impact == impact for f in ordered) for impact in reversed(IMPACTS)}
+    audited = [a for a in audits if not a.error]
+    print(f"{len(audited)} routes audited in {elapsed:.1f}s ({len(audits) - len(audited)} skipped/failed)")
+    print(f"{len(ordered)} unique violations (rule × selector): {by_impact}")
+    for finding in ordered:
+        routes = sorted(set(finding.routes))
+        shown = ", ".join(routes[:3]) + (f" (+{len(routes) - 3})" if len(routes) > 3 else "")
+        print(f"  [{finding.impact:<8}] {finding.rule:<28} {finding.selector[:60]:<60} {shown}")
+    for audit in audits:
+        if audit.error and not audit.error.startswith("redirected"):
+            print(f"  error {audit.path}: {audit.error}")
+
+    store = ResultsStore("a11y_audit")
+    store.record("audit_wall", elapsed * 1000, routes=len(audited))
+    for audit in audited:
+        store.record("route_audit", audit.ms, route=audit.final_path, violations=audit.violations)
+    path = store.write_report(
+        {
+            "elapsed_s": round(elapsed, 3),
+            "tags": args.tags,
+            "by_impact": by_impact,
+            "findings": [f.__dict__ | {"routes": sorted(set(f.routes))} for f in ordered],
+            "routes": [a.__dict__ for a in audits],
+        }
+    )
+    print(f"report: {path}")
+    if args.fail_on != "none" and any(IMPACTS.index(f.impact) >= IMPACTS.index(args.fail_on) for f in ordered):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+"""Deterministic on-box stand-in for the Anthropic Messages API.
+
+Flashcard generation (TC006) and the notes editor AI checks (TC009) end up in
+``POST /v1/messages``. This server answers those calls locally with canned
+responses keyed by a hash of the request, and exposes knobs for latency,
+streaming chunk size and concurrency so tests can see how the app behaves
+when the model is slow or saturated.
+
+    python -m harness.ai_stub --port 8787 --latency lognormal:800,0.4 --max-concurrency 4
+
+Convex picks it up via ``npx convex env set CLAUDE_API_BASE_URL http://<host>:8787``.
+Browser-originated calls can be redirected with :func:`route_browser`.
+
+Control endpoints (JSON):
+
+- ``GET  /_stub/stats``  request counters and latency percentiles
+- ``POST /_stub/config`` change knobs at runtime (same names as :class:`StubConfig`)
+- ``POST /_stub/reset``  clear the counters
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any
+
+from .stats import summarize
+
+DEFAULT_PORT = 8787
+ANTHROPIC_ORIGIN = "https://api.anthropic.com"
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 529: "Overloaded"}
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """A latency distribution in milliseconds, parsed from ``kind:params``.
+
+    Supported kinds: ``fixed:MS``, ``uniform:LO,HI``, ``normal:MEAN,SD``,
+    ``lognormal:MEDIAN,SIGMA``.
+    """
+
+    kind: str = "fixed"
+    params: tuple[float, ...] = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> LatencyModel:
+        kind, _, raw = spec.partition(":")
+        params = tuple(float(p) for p in raw.split(",") if p.strip()) if raw else ()
+        arity = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in arity or len(params) != arity[kind]:
+            raise ValueError(f"invalid latency spec {spec!r}")
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency in seconds (never negative)."""
+        p = self.params
+        if self.kind == "fixed":
+            ms = p[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            ms = rng.gauss(p[0], p[1])
+        else:
+            ms = rng.lognormvariate(math.log(max(p[0], 1e-9)), p[1])
+        return max(ms, 0.0) / 1000
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{','.join(f'{v:g}' for v in self.params)}"
+
+
+@dataclass
+class StubConfig:
+    """Runtime knobs. ``max_queue`` bounds waiting requests; beyond it the stub answers 529."""
+
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    chunk_chars: int = 24
+    chunk_interval_ms: float = 30.0
+    max_concurrency: int = 8
+    max_queue: int = 64
+    seed: int = 0
+    fixtures_dir: Path | None = None
+
+    def update(self, values: dict[str, Any]) -> None:
+        known = {f.name for f in fields(self)}
+        for key, value in values.items():
+            if key not in known:
+                raise ValueError(f"unknown config key {key!r}")
+            if key == "latency":
+                value = LatencyModel.parse(value)
+            elif key == "fixtures_dir":
+                value = Path(value) if value else None
+            elif key == "chunk_interval_ms":
+                value = float(value)
+            else:
+                value = int(value)
+            setattr(self, key, value)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "latency": str(self.latency),
+            "chunk_chars": self.chunk_chars,
+            "chunk_interval_ms": self.chunk_interval_ms,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "seed": self.seed,
+            "fixtures_dir": str(self.fixtures_dir) if self.fixtures_dir else None,
+        }
+
+
+def request_key(body: dict[str, Any]) -> str:
+    """Hash of the parts of a Messages request that determine the answer."""
+    canonical = json.dumps(
+        {"model": body.get("model"), "system": body.get("system"), "messages": body.get("messages")},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def _prompt_text(body: dict[str, Any]) -> str:
+    messages = body.get("messages") or []
+    content = messages[-1].get("content", "") if messages else ""
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    match = re.search(r"<text>(.*?)</text>", content, re.S)
+    return (match.group(1) if match else content).strip()
+
+
+def synthesize(body: dict[str, Any], key: str) -> str:
+    """Fallback answer when no fixture exists: a flashcard array derived from the prompt.
+
+    The output only depends on the request, so repeated runs see identical text.
+    """
+    text = _prompt_text(body)
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()] or [text or key]
+    count = 1 + int(key[:2], 16) % min(3, len(sentences))
+    cards = [
+        {"question": f"What is the key idea of: \"{s[:80]}\"?", "answer": s}
+        for s in sentences[:count]
+    ]
+    return json.dumps(cards, ensure_ascii=False)
+
+
+class CannedResponses:
+    """Fixture lookup: ``<fixtures_dir>/<request_key>.txt`` holds the assistant text."""
+
+    def __init__(self, fixtures_dir: Path | None) -> None:
+        self.fixtures_dir = fixtures_dir
+        self._cache: dict[str, str] = {}
+
+    def text_for(self, body: dict[str, Any], key: str) -> tuple[str, bool]:
+        if key in self._cache:
+            return self._cache[key], True
+        if self.fixtures_dir:
+            path = self.fixtures_dir / f"{key}.txt"
+            if path.exists():
+                self._cache[key] = path.read_text(encoding="utf-8")
+                return self._cache[key], True
+        return synthesize(body, key), False
+
+
+@dataclass
+class StubStats:
+    requests: int = 0
+    streamed: int = 0
+    rejected: int = 0
+    fixture_hits: int = 0
+    in_flight: int = 0
+    queued: int = 0
+    peak_in_flight: int = 0
+    peak_queued: int = 0
+    queue_wait_ms: list[float] = field(default_factory=list)
+    total_ms: list[float] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "streamed": self.streamed,
+            "rejected": self.rejected,
+            "fixture_hits": self.fixture_hits,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "peak_in_flight": self.peak_in_flight,
+            "peak_queued": self.peak_queued,
+            "queue_wait_ms": summarize(self.queue_wait_ms),
+            "total_ms": summarize(self.total_ms),
+        }
+
+
+class AIStub:
+    """The stub server. Usable in-process as an async context manager."""
+
+    def __init__(self, config: StubConfig | None = None, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> None:
+        self.config = config or StubConfig()
+        self.host = host
+        self.port = port
+        self.stats = StubStats()
+        self._rng = random.Random(self.config.seed)
+        self._canned = CannedResponses(self.config.fixtures_dir)
+        self._slots = asyncio.Semaphore(self.config.max_concurrency)
+        self._server: asyncio.base_events.Server | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> AIStub:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> AIStub:
+        return await self.start()
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.stop()
+
+    def reset_stats(self) -> None:
+        self.stats = StubStats()
+
+    def reconfigure(self, values: dict[str, Any]) -> None:
+        self.config.update(values)
+        if "seed" in values:
+            self._rng = random.Random(self.config.seed)
+        if "fixtures_dir" in values:
+            self._canned = CannedResponses(self.config.fixtures_dir)
+        if "max_concurrency" in values:
+            self._slots = asyncio.Semaphore(self.config.max_concurrency)
+
+    # -- HTTP plumbing -----------------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                keep_alive = await self._dispatch(method, path, body, writer) and keep_alive
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter) -> bool:
+        """Serve one request; returns False when the connection must close."""
+        path = path.split("?", 1)[0]
+        try:
+            payload = json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            await _write_json(writer, 400, _error("invalid_request_error", "body is not valid JSON"))
+            return True
+
+        if path == "/v1/messages":
+            if method != "POST":
+                await _write_json(writer, 405, _error("invalid_request_error", "use POST"))
+                return True
+            return await self._messages(payload, writer)
+        if path == "/_stub/stats" and method == "GET":
+            await _write_json(writer, 200, {"config": self.config.as_dict(), "stats": self.stats.as_dict()})
+        elif path == "/_stub/config" and method == "POST":
+            try:
+                self.reconfigure(payload)
+            except ValueError as exc:
+                await _write_json(writer, 400, _error("invalid_request_error", str(exc)))
+                return True
+            await _write_json(writer, 200, self.config.as_dict())
+        elif path == "/_stub/reset" and method == "POST":
+            self.reset_stats()
+            await _write_json(writer, 200, {"ok": True})
+        else:
+            await _write_json(writer, 404, _error("not_found_error", f"no route for {method} {path}"))
+        return True
+
+    async def _messages(self, body: dict[str, Any], writer: asyncio.StreamWriter) -> bool:
+        stats = self.stats
+        stats.requests += 1
+        if stats.queued >= self.config.max_queue:
+            stats.rejected += 1
+            await _write_json(writer, 529, _error("overloaded_error", "Overloaded"))
+            return True
+
+        arrived = time.perf_counter()
+        stats.queued += 1
+        stats.peak_queued = max(stats.peak_queued, stats.queued)
+        async with self._slots:
+            stats.queued -= 1
+            stats.in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+            stats.queue_wait_ms.append((time.perf_counter() - arrived) * 1000)
+            try:
+                key = request_key(body)
+                text, from_fixture = self._canned.text_for(body, key)
+                stats.fixture_hits += from_fixture
+                await asyncio.sleep(self.config.latency.sample(self._rng))
+                if body.get("stream"):
+                    stats.streamed += 1
+                    await self._stream(body, key, text, writer)
+                    return False
+                await _write_json(writer, 200, _message(body, key, text))
+                return True
+            finally:
+                stats.in_flight -= 1
+                stats.total_ms.append((time.perf_counter() - arrived) * 1000)
+
+    async def _stream(self, body: dict[str, Any], key: str, text: str, writer: asyncio.StreamWriter) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\ncontent-type: text/event-stream\r\ncache-control: no-cache\r\n"
+            b"transfer-encoding: chunked\r\nconnection: close\r\n\r\n"
+        )
+        message = _message(body, key, "")
+        message["usage"]["output_tokens"] = 0
+        await _write_event(writer, "message_start", {"type": "message_start", "message": message})
+        await _write_event(
+            writer,
+            "content_block_start",
+            {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+        )
+        size = max(self.config.chunk_chars, 1)
+        for start in range(0, len(text), size):
+            if start:
+                await asyncio.sleep(self.config.chunk_interval_ms / 1000)
+            delta = {"type": "text_delta", "text": text[start : start + size]}
+            await _write_event(writer, "content_block_delta", {"type": "content_block_delta", "index": 0, "delta": delta})
+        await _write_event(writer, "content_block_stop", {"type": "content_block_stop", "index": 0})
+        await _write_event(
+            writer,
+            "message_delta",
+            {
+                "type": "message_delta",
+                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                "usage": {"output_tokens": _tokens(text)},
+            },
+        )
+        await _write_event(writer, "message_stop", {"type": "message_stop"})
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _message(body: dict[str, Any], key: str, text: str) -> dict[str, Any]:
+    return {
+        "id": f"msg_stub_{key}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "stub"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": _tokens(json.dumps(body.get("messages", []))), "output_tokens": _tokens(text)},
+    }
+
+
+def _error(kind: str, message: str) -> dict[str, Any]:
+    return {"type": "error", "error": {"type": kind, "message": message}}
+
+
+async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str, dict[str, str], bytes] | None:
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, path, _ = line.decode("latin-1").split(" ", 2)
+    headers: dict[str, str] = {}
+    while True:
+        raw = await reader.readline()
+        if raw in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = raw.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0) or 0)
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+async def _write_json(writer: asyncio.StreamWriter, status: int, payload: dict[str, Any]) -> None:
+    data = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+        f"content-type: application/json\r\ncontent-length: {len(data)}\r\n"
+    )
+    if status == 529:
+        head += "retry-after: 1\r\n"
+    writer.write(head.encode() + b"\r\n" + data)
+    await writer.drain()
+
+
+async def _write_event(writer: asyncio.StreamWriter, event: str, data: dict[str, Any]) -> None:
+    frame = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+    writer.write(f"{len(frame):x}\r\n".encode() + frame + b"\r\n")
+    await writer.drain()
+
+
+async def route_browser(context: Any, stub_url: str) -> None:
+    """Send a Playwright context's requests for ``api.anthropic.com`` to the stub."""
+
+    async def forward(route: Any) -> None:
+        target = stub_url + route.request.url[len(ANTHROPIC_ORIGIN) :]
+        response = await route.fetch(url=target)
+        await route.fulfill(response=response)
+
+    await context.route(f"{ANTHROPIC_ORIGIN}/**", forward)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=LatencyModel.parse, default=LatencyModel(), help="e.g. lognormal:800,0.4")
+    parser.add_argument("--chunk-chars", type=int, default=24)
+    parser.add_argument("--chunk-interval-ms", type=float, default=30.0)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", type=Path, default=None, help="directory of <request_key>.txt responses")
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        latency=args.latency,
+        chunk_chars=args.chunk_chars,
+        chunk_interval_ms=args.chunk_interval_ms,
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+        seed=args.seed,
+        fixtures_dir=args.fixtures,
+    )
+
+    async def serve() -> None:
+        stub = await AIStub(config, args.host, args.port).start()
+        print(f"AI stub listening on {stub.url} ({config.as_dict()})")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Failure-only artefact retention for engine runs (an :class:`engine.Hook`).
+
+While a test runs, evidence is kept in a rolling window instead of being
+written out in full:
+
+- ``trace``   Playwright tracing in chunks, rotated every ``window / 2`` seconds;
+  only chunks that overlap the last ``window`` seconds are kept
+- ``screens`` a JPEG after every executed step, held in memory and pruned to
+  the last ``window`` seconds
+- ``video``   a low-resolution context recording; on failure it is cut to the
+  last ``window`` seconds when ``ffmpeg`` is available
+
+On pass everything is discarded (the video file deleted, the trace chunk
+dropped unwritten). On failure the window plus a ``manifest.json`` (error,
+failed step, the last steps' timeline) is packed into one
+``tmp/artefacts/<run>/<test>.zip``.
+
+    python -m harness.engine --artefacts trace,screens --artefact-window 20
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+import zipfile
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from playwright.async_api import Error as PlaywrightError, Video
+
+from .config import TMP_DIR
+from .engine import Engine, Hook, StepRecord, TestRun
+from .plan import CompiledTest, Step
+
+ARTEFACTS_DIR = TMP_DIR / "artefacts"
+KINDS = ("trace", "screens", "video")
+VIDEO_SIZE = {"width": 640, "height": 360}
+
+
+@dataclass
+class Buffer:
+    workdir: Path
+    chunk_started: float = 0.0
+    chunks: deque[tuple[float, float, Path]] = field(default_factory=deque)  # (start, end, file)
+    frames: deque[tuple[float, str, bytes]] = field(default_factory=deque)  # (time, name, jpeg)
+    videos: list[Video] = field(default_factory=list)
+
+
+class ArtefactKeeper(Hook):
+    def __init__(self, kinds: tuple[str, ...] = ("trace", "screens"), window_s: float = 20.0, jpeg_quality: int = 50) -> None:
+        unknown = set(kinds) - set(KINDS)
+        if unknown:
+            raise ValueError(f"unknown artefact kinds: {', '.join(sorted(unknown))}")
+        self.kinds = kinds
+        self.window_s = window_s
+        self.jpeg_quality = jpeg_quality
+        self.buffers: dict[int, Buffer] = {}
+        self.out_dir = ARTEFACTS_DIR / time.strftime("%Y%m%d-%H%M%S")
+        self.kept: list[tuple[str, int]] = []
+        self.discarded = 0
+
+    def buffer(self, run: TestRun) -> Buffer:
+        return self.buffers[id(run)]
+
+    def context_options(self, test: CompiledTest) -> dict[str, Any]:
+        if "video" not in self.kinds:
+            return {}
+        return {"record_video_dir": tempfile.mkdtemp(prefix=f"video-{test.id}-"), "record_video_size": VIDEO_SIZE}
+
+    async def test_started(self, run: TestRun) -> None:
+        buffer = self.buffers[id(run)] = Buffer(Path(tempfile.mkdtemp(prefix=f"artefacts-{run.test.id}-")))
+        if "trace" in self.kinds:
+            await run.context.tracing.start(screenshots=True, snapshots=True)
+            await run.context.tracing.start_chunk()
+            buffer.chunk_started = time.monotonic()
+
+    async def rotate(self, run: TestRun, buffer: Buffer) -> None:
+        now = time.monotonic()
+        path = buffer.workdir / f"trace-{len(buffer.chunks):04d}.zip"
+        await run.context.tracing.stop_chunk(path=path)
+        buffer.chunks.append((buffer.chunk_started, now, path))
+        while buffer.chunks and buffer.chunks[0][1] < now - self.window_s:
+            buffer.chunks.popleft()[2].unlink(missing_ok=True)
+        await run.context.tracing.start_chunk()
+        buffer.chunk_started = now
+
+    async def step_started(self, run: TestRun, step: Step, record: StepRecord) -> None:
+        buffer = self.buffer(run)
+        if "trace" in self.kinds and time.monotonic() - buffer.chunk_started >= self.window_s / 2:
+            await self.rotate(run, buffer)
+
+    async def step_finished(self, run: TestRun, step: Step, record: StepRecord) -> None:
+        if "screens" not in self.kinds or record.status not in ("pass", "fail"):
+            return
+        buffer = self.buffer(run)
+        try:
+            jpeg = await run.page.screenshot(type="jpeg", quality=self.jpeg_quality, animations="disabled")
+        except PlaywrightError:
+            return
+        now = time.monotonic()
+        buffer.frames.append((now, f"{record.index:03d}-{record.op}.jpg", jpeg))
+        while buffer.frames and buffer.frames[0][0] < now - self.window_s:
+            buffer.frames.popleft()
+
+    async def test_finished(self, run: TestRun) -> None:
+        buffer = self.buffer(run)
+        buffer.videos = [page.video for page in run.context.pages if page.video]
+        if "trace" not in self.kinds:
+            return
+        try:
+            if run.status == "pass":
+                await run.context.tracing.stop_chunk()
+            else:
+                await self.rotate(run, buffer)
+                await run.context.tracing.stop_chunk()
+            await run.context.tracing.stop()
+        except PlaywrightError as exc:
+            run.data["artefact_error"] = str(exc).splitlines()[0][:120]
+
+    async def test_closed(self, run: TestRun) -> None:
+        buffer = self.buffers.pop(id(run))
+        try:
+            if run.status == "pass":
+                for video in buffer.videos:
+                    await video.delete()
+                self.discarded += 1
+                return
+            path = await self.pack(run, buffer)
+            run.data["artefacts"] = str(path)
+            self.kept.append((run.test.id, path.stat().st_size))
+        finally:
+            shutil.rmtree(buffer.workdir, ignore_errors=True)
+            for video in buffer.videos:
+                try:
+                    shutil.rmtree(Path(await video.path()).parent, ignore_errors=True)
+                except PlaywrightError:
+                    pass
+
+    async def trim_video(self, source: Path, target: Path) -> Path:
+        """Last ``window`` seconds of ``source`` via ffmpeg, or ``source`` itself without it."""
+        if not shutil.which("ffmpeg"):
+            return source
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-y", "-loglevel", "error", "-sseof", f"-{self.window_s}", "-i", str(source), "-c", "copy", str(target)
+        )
+        return target if await process.wait() == 0 and target.exists() else source
+
+    async def pack(self, run: TestRun, buffer: Buffer) -> Path:
+        failed = run.failed_step
+        last = [r for r in run.records if r.status in ("pass", "fail")][-10:]
+        manifest = {
+            "test": run.test.id,
+            "title": run.test.title,
+            "status": run.status,
+            "error": run.error,
+            "failed_step": failed.__dict__ if failed else None,
+            "window_s": self.window_s,
+            "last_steps": [{"index": r.index, "label": r.label, "status": r.status, "ms": round(r.ms, 1), "error": r.error} for r in last],
+        }
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        path = self.out_dir / f"{run.test.id}.zip"
+        videos = []
+        for i, video in enumerate(buffer.videos):
+            try:
+                source = Path(await video.path())
+            except PlaywrightError:
+                continue
+            videos.append((f"video-{i}.webm", await self.trim_video(source, buffer.workdir / f"video-{i}.webm")))
+        with zipfile.ZipFile(path, "w") as bundle:
+            bundle.writestr("manifest.json", json.dumps(manifest, indent=1), compress_type=zipfile.ZIP_DEFLATED)
+            # Traces, JPEGs and WebM are already compressed; storing avoids paying for deflate twice
+            for _, _, chunk in buffer.chunks:
+                if chunk.exists():
+                    bundle.write(chunk, chunk.name, compress_type=zipfile.ZIP_STORED)
+            for _, name, jpeg in buffer.frames:
+                bundle.writestr(f"screens/{name}", jpeg, compress_type=zipfile.ZIP_STORED)
+            for name, video_path in videos:
+                if video_path.exists():
+                    bundle.write(video_path, name, compress_type=zipfile.ZIP_STORED)
+        return path
+
+    async def engine_finished(self, engine: Engine, runs: list[TestRun]) -> None:
+        total = sum(size for _, size in self.kept)
+        print(f"artefacts: {len(self.kept)} failure bundles ({total / 2**20:.1f} MB) in {self.out_dir}, {self.discarded} passing tests discarded")
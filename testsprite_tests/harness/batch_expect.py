@@ -0,0 +1,240 @@
+"""Batched visibility/text checks: one injected script per poll for many expectations.
+
+The TC scripts check a page with long runs of
+``expect(frame.locator('text=...').first).to_be_visible()``. Each of those
+calls runs its own polling loop with several protocol round-trips, and the
+first one that fails hides the others. :func:`expect_all` checks a whole list
+in a single ``evaluate`` per poll. It keeps polling the ones still missing
+on Playwright's own schedule (100, 250, 500, then 1000 ms) until all have
+been seen or the budget runs out, then raises one
+:class:`BatchAssertionError` naming every missing check.
+
+Supported selectors (``.first`` semantics, like the scripts):
+
+- ``text=Foo`` (case-insensitive substring), ``text="Foo"`` (exact) and
+  ``text=/re/i``: the first smallest element in document order must be visible
+- ``role=button[name="Save"]``: some visible element with that explicit or
+  implicit role whose accessible name matches
+- ``css=...`` or a plain CSS selector: the first match must be visible
+
+``expect_text`` steps check that the first match contains the text instead.
+Other selectors (XPath, ``>>`` chains, Playwright pseudo-classes) keep their
+individual ``expect``. An expectation counts as met once it has been seen,
+as it would with sequential ``expect`` calls.
+
+    python -m harness.engine --batch-expects --only TC005,TC010,TC013
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from playwright.async_api import Error as PlaywrightError, Frame, Page
+
+from .plan import Step
+
+POLL_INTERVALS = (100, 250, 500, 1000)  # ms, as Playwright's expect; the last one repeats
+BATCHABLE_OPS = {"expect_visible", "expect_text"}
+_ROLE_RE = re.compile(r"^role=([\w-]+)\s*(?:\[\s*name\s*=\s*(.+?)\s*\])?$")
+_PLAYWRIGHT_ONLY = (">>", ":has-text(", ":text(", ":text-is(", ":text-matches(", ":visible", ":nth-match(", "internal:")
+
+# Takes [{kind, query, name, contains}], returns [[ok, error]] in the same order
+CHECK_SCRIPT = """(specs) => {
+  const norm = (s) => (s || '').replace(/\\s+/g, ' ').trim();
+  const SKIP = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE', 'HEAD']);
+  // contained: an ancestor of a match always matches too, so the search can prune
+  const matcher = (q) => {
+    const re = /^\\/(.*)\\/([a-z]*)$/s.exec(q);
+    if (re) { const r = new RegExp(re[1], re[2]); return { test: (t) => r.test(t), contained: false }; }
+    if (q.length > 1 && (q[0] === '"' || q[0] === "'") && q[q.length - 1] === q[0]) {
+      const exact = norm(q.slice(1, -1));
+      return { test: (t) => t === exact, contained: false };
+    }
+    const needle = norm(q).toLowerCase();
+    return { test: (t) => t.toLowerCase().includes(needle), contained: true };
+  };
+  const visible = (el) => {
+    const r = el.getBoundingClientRect();
+    if (!(r.width > 0 && r.height > 0)) return false;
+    const v = getComputedStyle(el).visibility;
+    return v !== 'hidden' && v !== 'collapse';
+  };
+  const matches = (el, m) => !SKIP.has(el.tagName) && m.test(norm(el.textContent));
+  // First element in document order that matches, narrowed to its deepest matching descendant
+  const smallest = (m) => {
+    const first = (el) => {
+      if (matches(el, m)) return el;
+      if (m.contained) return null;
+      for (const child of el.children) {
+        const found = first(child);
+        if (found) return found;
+      }
+      return null;
+    };
+    let el = document.body && first(document.body);
+    if (!el) return null;
+    descend: for (;;) {
+      for (const child of el.children) {
+        if (matches(child, m)) { el = child; continue descend; }
+      }
+      return el;
+    }
+  };
+  const IMPLICIT = {
+    button: 'button,input[type=button],input[type=submit],input[type=reset],summary',
+    link: 'a[href],area[href]',
+    heading: 'h1,h2,h3,h4,h5,h6',
+    textbox: 'input:not([type]),input[type=text],input[type=email],input[type=search],input[type=tel],input[type=url],textarea',
+    checkbox: 'input[type=checkbox]', radio: 'input[type=radio]', combobox: 'select',
+    img: 'img[alt]:not([alt=""])', list: 'ul,ol', listitem: 'li', navigation: 'nav', main: 'main',
+    dialog: 'dialog', form: 'form', table: 'table', row: 'tr', cell: 'td', banner: 'header', contentinfo: 'footer',
+  };
+  const accessibleName = (el) => {
+    const label = el.getAttribute('aria-label');
+    if (label) return norm(label);
+    const ids = el.getAttribute('aria-labelledby');
+    if (ids) return norm(ids.split(/\\s+/).map((id) => document.getElementById(id)?.textContent || '').join(' '));
+    if (el.labels && el.labels.length) return norm([...el.labels].map((l) => l.textContent).join(' '));
+    return norm(el.getAttribute('alt') || el.textContent || el.getAttribute('placeholder') || el.getAttribute('title'));
+  };
+  const byRole = (role, name) => {
+    const test = name ? matcher(name).test : () => true;
+    const selector = `[role="${role}"]` + (IMPLICIT[role] ? ',' + IMPLICIT[role] : '');
+    for (const el of document.querySelectorAll(selector)) {
+      const explicit = el.getAttribute('role');
+      if ((!explicit || explicit === role) && test(accessibleName(el)) && visible(el)) return el;
+    }
+    return null;
+  };
+  return specs.map((spec) => {
+    try {
+      let el;
+      if (spec.kind === 'role') return [byRole(spec.query, spec.name) !== null, null];
+      el = spec.kind === 'text' ? smallest(matcher(spec.query)) : document.querySelector(spec.query);
+      if (!el) return [false, null];
+      if (spec.contains !== null) return [norm(el.textContent).includes(norm(spec.contains)), null];
+      return [visible(el), null];
+    } catch (e) {
+      return [false, String(e)];
+    }
+  });
+}"""
+
+
+def _role_name(raw: str | None) -> str | None:
+    """Role ``[name=...]`` in text syntax: quotes are plain string quotes, a trailing ``s`` makes it exact."""
+    if not raw:
+        return None
+    exact = raw[-1] == "s" and len(raw) > 2 and raw[-2] in "\"'"
+    if exact:
+        return raw[:-1]
+    if raw[-1] == "i" and len(raw) > 2 and raw[-2] in "\"'":
+        raw = raw[:-1]
+    if len(raw) > 1 and raw[0] in "\"'" and raw[-1] == raw[0]:
+        return raw[1:-1]
+    return raw
+
+
+@dataclass(frozen=True)
+class Expectation:
+    kind: str  # text, role or css
+    query: str  # text body (quotes/regex kept), role, or CSS selector
+    name: str | None = None  # role: accessible name, in text= syntax
+    contains: str | None = None  # check the element's text instead of its visibility
+    label: str = ""
+
+    @classmethod
+    def parse(cls, selector: str, contains: str | None = None) -> Expectation | None:
+        """The expectation for a Playwright selector, or ``None`` when it needs Playwright itself."""
+        selector = selector.strip()
+        if selector.startswith("text="):
+            return cls("text", selector[5:], contains=contains, label=selector)
+        role = _ROLE_RE.match(selector)
+        if role:
+            if contains is not None:
+                return None
+            return cls("role", role.group(1), _role_name(role.group(2)), label=selector)
+        if selector.startswith("css="):
+            return cls("css", selector[4:], contains=contains, label=selector)
+        if re.match(r"^[\w-]+=", selector) or selector.startswith(("//", "..", "(")) or any(p in selector for p in _PLAYWRIGHT_ONLY):
+            return None
+        return cls("css", selector, contains=contains, label=selector)
+
+    def as_js(self) -> dict[str, Any]:
+        return {"kind": self.kind, "query": self.query, "name": self.name, "contains": self.contains}
+
+
+def expectation_for(step: Step) -> Expectation | None:
+    if step.op not in BATCHABLE_OPS or not step.selector or step.nth != 0:
+        return None
+    return Expectation.parse(step.selector, step.value if step.op == "expect_text" else None)
+
+
+def batch_groups(steps: list[Step]) -> list[list[int]]:
+    """Step indices grouped so that consecutive batchable expectations share one group."""
+    groups: list[list[int]] = []
+    for index, step in enumerate(steps):
+        batchable = expectation_for(step) is not None
+        if batchable and groups and groups[-1][-1] == index - 1 and expectation_for(steps[index - 1]) is not None:
+            groups[-1].append(index)
+        else:
+            groups.append([index])
+    return groups
+
+
+@dataclass
+class BatchResult:
+    expectations: list[Expectation]
+    seen_ms: list[float | None]  # first time each was met, ms since the batch started
+    errors: dict[int, str] = field(default_factory=dict)
+    polls: int = 0
+    ms: float = 0.0
+
+    @property
+    def missing(self) -> list[int]:
+        return [i for i, seen in enumerate(self.seen_ms) if seen is None]
+
+
+class BatchAssertionError(AssertionError):
+    def __init__(self, result: BatchResult) -> None:
+        self.result = result
+        labels = "; ".join(result.expectations[i].label + (f" ({result.errors[i]})" if i in result.errors else "") for i in result.missing)
+        super().__init__(f"{len(result.missing)} of {len(result.expectations)} checks not met after {result.ms:.0f}ms: {labels}")
+
+
+async def check_all(target: Page | Frame, expectations: list[Expectation], timeout: float) -> BatchResult:
+    """Poll every expectation in one ``evaluate`` per round until all were met or ``timeout`` (ms) passed."""
+    result = BatchResult(expectations, [None] * len(expectations))
+    pending = list(range(len(expectations)))
+    start = time.perf_counter()
+    while True:
+        result.polls += 1
+        try:
+            outcomes = await target.evaluate(CHECK_SCRIPT, [expectations[i].as_js() for i in pending])
+        except PlaywrightError:
+            outcomes = [[False, None]] * len(pending)  # navigation in progress; try again next poll
+        now = (time.perf_counter() - start) * 1000
+        for i, (ok, error) in zip(pending, outcomes):
+            if ok:
+                result.seen_ms[i] = now
+            elif error:
+                result.errors[i] = error
+        pending = [i for i in pending if result.seen_ms[i] is None and i not in result.errors]
+        if not pending or now >= timeout:
+            break
+        interval = POLL_INTERVALS[min(result.polls - 1, len(POLL_INTERVALS) - 1)]
+        await asyncio.sleep(min(interval, timeout - now) / 1000)
+    result.ms = (time.perf_counter() - start) * 1000
+    return result
+
+
+async def expect_all(target: Page | Frame, expectations: list[Expectation], timeout: float = 30000) -> BatchResult:
+    """:func:`check_all`, raising :class:`BatchAssertionError` listing every missing check."""
+    result = await check_all(target, expectations, timeout)
+    if result.missing:
+        raise BatchAssertionError(result)
+    return result
@@ -0,0 +1,209 @@
+"""Bulk Markdown export benchmark with streaming verification (TC010 at scale).
+
+Seeds 1k-10k notes containing the TC010 content (headings, list, code block,
+link), exports them and verifies every exported body against the seed data
+without holding the export in memory. Reports export time, bytes/s and
+notes/s.
+
+Two export paths:
+
+- ``--mode action`` (default): the markdown exporter the app ships today,
+  ``exportNoteToBlog``, called for every seeded note with bounded concurrency.
+- ``--mode download``: a UI control that produces a file download (single
+  ``.md`` or ``.zip``), captured through Playwright's download API and parsed
+  from disk in chunks. Give the page and the trigger with ``--download-route``
+  and ``--download-trigger``.
+
+    python -m harness.bench_export --notes 2000 --concurrency 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import resource
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from playwright.async_api import Page, async_playwright
+
+from .config import load_settings
+from .convex import ConvexClient
+from .export_verify import ExportedNote, body_sha256, iter_documents, iter_export, verify
+from .results import ResultsStore
+from .session import AuthSession, api_login, launch_browser, new_context
+from .settle import install, wait_for_settled
+
+CREATE_NOTE = "features/notes/index:createNote"
+EXPORT_NOTE = "features/export/blog:exportNoteToBlog"
+
+CODE = "const example = 'code block';\nconsole.log(example);"
+
+
+def _text(value: str, marks: list[dict[str, Any]] | None = None) -> dict[str, Any]:
+    node: dict[str, Any] = {"type": "text", "text": value}
+    if marks:
+        node["marks"] = marks
+    return node
+
+
+def seed_note(marker: str) -> tuple[str, str]:
+    """ProseMirror JSON for one seeded note and the markdown body it must export to."""
+    doc = {
+        "type": "doc",
+        "content": [
+            {"type": "paragraph", "content": [_text(f"{marker} exported by bench_export")]},
+            {"type": "heading", "attrs": {"level": 2}, "content": [_text("Heading 2")]},
+            {"type": "heading", "attrs": {"level": 3}, "content": [_text("Heading 3")]},
+            {
+                "type": "bullet_list",
+                "content": [
+                    {"type": "list_item", "content": [{"type": "paragraph", "content": [_text(item)]}]}
+                    for item in ("List item 1", "List item 2")
+                ],
+            },
+            {"type": "code_block", "content": [_text(CODE)]},
+            {
+                "type": "paragraph",
+                "content": [_text("Link to OpenAI", [{"type": "link", "attrs": {"href": "https://openai.com"}}])],
+            },
+        ],
+    }
+    markdown = (
+        f"{marker} exported by bench_export\n\n## Heading 2\n\n### Heading 3\n\n"
+        f"- List item 1\n- List item 2\n\n```\n{CODE}\n```\n\nLink to OpenAI"
+    )
+    return json.dumps(doc), markdown
+
+
+async def seed_notes(convex: ConvexClient, session: AuthSession, count: int, tag: str, concurrency: int) -> dict[str, tuple[str, str]]:
+    """Create ``count`` notes; returns ``{title: (note_id, expected body hash)}``."""
+    slots = asyncio.Semaphore(concurrency)
+    seeded: dict[str, tuple[str, str]] = {}
+
+    async def create(index: int) -> None:
+        title = f"Export bench {tag} {index:05d}"
+        content, markdown = seed_note(f"[{tag}-{index:05d}]")
+        async with slots:
+            note_id = await convex.mutation(CREATE_NOTE, {"sessionId": session.session_id, "title": title, "content": content})
+        seeded[title] = (note_id, body_sha256(markdown))
+
+    await asyncio.gather(*(create(i) for i in range(count)))
+    return seeded
+
+
+async def export_via_action(convex: ConvexClient, session: AuthSession, note_ids: list[str], concurrency: int) -> tuple[list[ExportedNote], float]:
+    slots = asyncio.Semaphore(concurrency)
+    notes: list[ExportedNote] = []
+
+    async def export(note_id: str) -> None:
+        async with slots:
+            result = await convex.action(EXPORT_NOTE, {"sessionId": session.session_id, "noteId": note_id})
+        # Parse each document as it arrives; only the per-note digest is kept
+        notes.extend(iter_documents([result["content"]]))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(export(note_id) for note_id in note_ids))
+    return notes, time.perf_counter() - start
+
+
+async def export_via_download(page: Page, route: str, trigger: str, timeout_ms: float) -> tuple[Path, float]:
+    await page.goto(route, wait_until="commit")
+    await wait_for_settled(page)
+    start = time.perf_counter()
+    async with page.expect_download(timeout=timeout_ms) as info:
+        await page.locator(trigger).first.click()
+    download = await info.value
+    path = Path(await download.path())  # resolves once the download has finished
+    return path, time.perf_counter() - start
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main_async(args: argparse.Namespace) -> dict[str, Any]:
+    settings = load_settings()
+    if not settings.convex_url:
+        raise SystemExit("PUBLIC_CONVEX_URL is not set (env or .env.local)")
+    tag = f"exp-{uuid.uuid4().hex[:6]}"
+    store = ResultsStore("bench_export", notes=args.notes, mode=args.mode)
+
+    async with async_playwright() as pw:
+        session = await api_login(pw, settings)
+        request = await pw.request.new_context()
+        convex = ConvexClient(request, settings.convex_url)
+        try:
+            seed_start = time.perf_counter()
+            seeded = await seed_notes(convex, session, args.notes, tag, args.seed_concurrency)
+            seed_s = time.perf_counter() - seed_start
+            expected = {title: digest for title, (_, digest) in seeded.items()}
+            rss_before = max_rss_mb()
+
+            if args.mode == "action":
+                notes, export_s = await export_via_action(convex, session, [nid for nid, _ in seeded.values()], args.concurrency)
+                verification = verify(notes, expected)
+                exported_bytes = verification.bytes
+            else:
+                browser = await launch_browser(pw)
+                try:
+                    context = await new_context(browser, settings, session, accept_downloads=True)
+                    await install(context)
+                    page = await context.new_page()
+                    path, export_s = await export_via_download(page, args.download_route, args.download_trigger, args.timeout)
+                    parse_start = time.perf_counter()
+                    verification = verify(iter_export(path), expected)
+                    parse_s = time.perf_counter() - parse_start
+                    exported_bytes = path.stat().st_size
+                finally:
+                    await browser.close()
+        finally:
+            await request.dispose()
+
+    report = {
+        "tag": tag,
+        "mode": args.mode,
+        "notes": len(seeded),
+        "seed_s": round(seed_s, 3),
+        "export_s": round(export_s, 3),
+        "bytes": exported_bytes,
+        "bytes_per_s": round(exported_bytes / export_s, 1) if export_s else None,
+        "notes_per_s": round(len(seeded) / export_s, 2) if export_s else None,
+        "verification": verification.as_dict(),
+        "rss_growth_mb": round(max_rss_mb() - rss_before, 1),
+    }
+    if args.mode == "download":
+        report["parse_s"] = round(parse_s, 3)
+    store.record("export", export_s * 1000)
+    store.record("export_bytes_per_s", report["bytes_per_s"] or 0, "B/s")
+    path = store.write_report(report)
+    print(
+        f"exported {len(seeded)} notes, {exported_bytes} bytes in {export_s:.2f}s "
+        f"({report['bytes_per_s']} B/s); verification {'ok' if verification.ok else 'FAILED'}"
+    )
+    print(f"report: {path}")
+    if not verification.ok:
+        raise SystemExit(1)
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk Markdown export benchmark")
+    parser.add_argument("--notes", type=int, default=1000, help="notes to seed (1000-10000)")
+    parser.add_argument("--mode", choices=("action", "download"), default="action")
+    parser.add_argument("--concurrency", type=int, default=16, help="parallel exports in action mode")
+    parser.add_argument("--seed-concurrency", type=int, default=16)
+    parser.add_argument("--download-route", help="page holding the bulk export control (download mode)")
+    parser.add_argument("--download-trigger", help="selector of the control that starts the download")
+    parser.add_argument("--timeout", type=float, default=600_000, help="ms to wait for the download")
+    args = parser.parse_args(argv)
+    if args.mode == "download" and not (args.download_route and args.download_trigger):
+        parser.error("--mode download needs --download-route and --download-trigger")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Bulk flashcard-generation throughput benchmark (TC006 at scale).
+
+Seeds N highlights, then generates flashcards for them the way the inbox
+does (``fetchFlashcardsFromSource`` followed by ``createFlashcards``) at a
+ladder of concurrency levels, with Claude answered by the local AI stub.
+For each level it reports cards/s, client and stub queueing delay, and how
+long the cards take to show up on ``/flashcards``. A sample of items is also
+driven through the inbox UI ("Generate Flashcard" → review → accept).
+
+    python -m harness.bench_flashcards --highlights 1000 --concurrency 1,2,4,8,16,32
+
+Convex must be pointed at the stub (``CLAUDE_API_BASE_URL``); the run warns
+when the stub sees no traffic.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from playwright.async_api import Page, async_playwright
+
+from .ai_stub import AIStub, LatencyModel, StubConfig
+from .config import load_settings
+from .convex import ConvexClient, ConvexError
+from .results import ResultsStore
+from .session import AuthSession, api_login, launch_browser, new_context
+from .settle import install, wait_for_settled
+from .stats import summarize
+
+CREATE_HIGHLIGHT = "features/inbox/index:createHighlightInInbox"
+GENERATE = "features/flashcards/index:fetchFlashcardsFromSource"
+SAVE = "features/flashcards/index:createFlashcards"
+MARK_PROCESSED = "features/inbox/index:updateProcessed"
+
+SAMPLE_TEXT = (
+    "Spaced repetition schedules reviews just before an item would be forgotten. "
+    "Each successful recall lengthens the next interval. "
+    "Failed recalls reset the interval so the item is seen again soon."
+)
+
+
+@dataclass
+class Highlight:
+    marker: str
+    text: str
+    inbox_item_id: str
+
+
+@dataclass
+class Job:
+    enqueued: float
+    started: float = 0.0
+    generated: float = 0.0
+    saved: float = 0.0
+    cards: int = 0
+    error: str | None = None
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    items: int
+    jobs: list[Job] = field(default_factory=list)
+    wall_s: float = 0.0
+    visible_after_s: float | None = None
+    stub: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def cards(self) -> int:
+        return sum(job.cards for job in self.jobs)
+
+    @property
+    def cards_per_s(self) -> float:
+        return self.cards / self.wall_s if self.wall_s else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        ok = [job for job in self.jobs if job.error is None]
+        return {
+            "concurrency": self.concurrency,
+            "items": self.items,
+            "cards": self.cards,
+            "errors": len(self.jobs) - len(ok),
+            "wall_s": round(self.wall_s, 3),
+            "cards_per_s": round(self.cards_per_s, 3),
+            "queue_delay_ms": summarize((j.started - j.enqueued) * 1000 for j in ok),
+            "generate_ms": summarize((j.generated - j.started) * 1000 for j in ok),
+            "save_ms": summarize((j.saved - j.generated) * 1000 for j in ok),
+            "visible_after_last_save_s": self.visible_after_s,
+            "stub": self.stub,
+        }
+
+
+async def seed_highlights(convex: ConvexClient, session: AuthSession, count: int, tag: str, concurrency: int) -> list[Highlight]:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def create(index: int) -> Highlight:
+        marker = f"[{tag}-{index:05d}]"
+        text = f"{marker} {SAMPLE_TEXT}"
+        async with slots:
+            result = await convex.mutation(
+                CREATE_HIGHLIGHT,
+                {"sessionId": session.session_id, "text": text, "sourceTitle": f"Bench {tag}"},
+            )
+        return Highlight(marker, text, result["inboxItemId"])
+
+    return list(await asyncio.gather(*(create(i) for i in range(count))))
+
+
+async def generate_one(convex: ConvexClient, session: AuthSession, item: Highlight, slots: asyncio.Semaphore, job: Job) -> None:
+    async with slots:
+        job.started = time.perf_counter()
+        try:
+            result = await convex.action(GENERATE, {"sessionId": session.session_id, "text": item.text})
+            job.generated = time.perf_counter()
+            cards = result.get("flashcards") or []
+            await convex.mutation(
+                SAVE,
+                {
+                    "sessionId": session.session_id,
+                    "flashcards": [{"question": c["question"], "answer": c["answer"]} for c in cards],
+                    "sourceInboxItemId": item.inbox_item_id,
+                    "sourceType": "manual_text",
+                },
+            )
+            await convex.mutation(MARK_PROCESSED, {"sessionId": session.session_id, "inboxItemId": item.inbox_item_id})
+            job.saved = time.perf_counter()
+            job.cards = len(cards)
+        except ConvexError as exc:
+            job.error = str(exc)
+
+
+async def visible_markers(page: Page, tag: str) -> set[str]:
+    """Highlight markers currently rendered on the page (one round-trip)."""
+    text = await page.evaluate("() => document.body.innerText")
+    return set(re.findall(rf"\[{re.escape(tag)}-\d{{5}}\]", text))
+
+
+async def wait_until_visible(page: Page, tag: str, markers: set[str], timeout_s: float) -> float | None:
+    """Poll the live ``/flashcards`` page until a card for every marker has rendered."""
+    deadline = time.perf_counter() + timeout_s
+    while time.perf_counter() < deadline:
+        if markers <= await visible_markers(page, tag):
+            return time.perf_counter()
+        await asyncio.sleep(0.1)
+    return None
+
+
+async def run_level(
+    convex: ConvexClient,
+    session: AuthSession,
+    stub: AIStub | None,
+    items: list[Highlight],
+    concurrency: int,
+    cards_page: Page,
+    tag: str,
+    visibility_timeout_s: float,
+) -> LevelResult:
+    level = LevelResult(concurrency, len(items))
+    if stub:
+        stub.reset_stats()
+    slots = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    level.jobs = [Job(enqueued=start) for _ in items]
+    await asyncio.gather(*(generate_one(convex, session, item, slots, job) for item, job in zip(items, level.jobs)))
+    level.wall_s = time.perf_counter() - start
+    if stub:
+        level.stub = stub.stats.as_dict()
+
+    saved = {item.marker: job.saved for item, job in zip(items, level.jobs) if job.error is None and job.cards}
+    if saved:
+        seen = await wait_until_visible(cards_page, tag, set(saved), visibility_timeout_s)
+        level.visible_after_s = round(max(seen - max(saved.values()), 0.0), 3) if seen else None
+    return level
+
+
+def scaling_knee(levels: list[LevelResult], min_gain: float) -> int | None:
+    """Last concurrency that still paid off: doubling past it gained less than ``min_gain`` cards/s."""
+    for previous, current in zip(levels, levels[1:]):
+        if previous.cards_per_s and current.cards_per_s < previous.cards_per_s * (1 + min_gain):
+            return previous.concurrency
+    return None
+
+
+async def ui_generate(page: Page, session: AuthSession, item: Highlight, timeout_ms: float) -> tuple[float, float]:
+    """Drive one item through the inbox UI; returns (time to review modal, total) in ms."""
+    await page.goto(session.route("inbox"), wait_until="commit")
+    await wait_for_settled(page)  # time from a loaded inbox, not from navigation
+    start = time.perf_counter()
+    await page.get_by_text(item.marker).first.click()
+    await page.get_by_role("button", name="Generate Flashcard").click()
+    review = page.get_by_text("Review Flashcards")
+    await review.wait_for(timeout=timeout_ms)
+    modal_at = time.perf_counter()
+    while await review.is_visible():
+        await page.keyboard.press("ArrowRight")
+        await page.wait_for_timeout(450)  # accept animation in FlashcardReviewModal
+    return (modal_at - start) * 1000, (time.perf_counter() - start) * 1000
+
+
+async def run_ui_sample(browser: Any, settings: Any, session: AuthSession, items: list[Highlight], workers: int, timeout_ms: float) -> dict[str, Any]:
+    queue: asyncio.Queue[Highlight] = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    to_modal: list[float] = []
+    totals: list[float] = []
+    errors: list[str] = []
+
+    async def worker() -> None:
+        context = await new_context(browser, settings, session)
+        await install(context)
+        page = await context.new_page()
+        try:
+            while not queue.empty():
+                item = queue.get_nowait()
+                try:
+                    modal_ms, total_ms = await ui_generate(page, session, item, timeout_ms)
+                    to_modal.append(modal_ms)
+                    totals.append(total_ms)
+                except Exception as exc:  # keep the sample going; report every failure
+                    errors.append(f"{item.marker}: {exc}")
+        finally:
+            await context.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    wall = time.perf_counter() - start
+    return {
+        "items": len(items),
+        "workers": workers,
+        "items_per_s": round(len(totals) / wall, 3) if wall else 0.0,
+        "to_review_modal_ms": summarize(to_modal),
+        "total_ms": summarize(totals),
+        "errors": errors,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> dict[str, Any]:
+    settings = load_settings()
+    if not settings.convex_url:
+        raise SystemExit("PUBLIC_CONVEX_URL is not set (env or .env.local)")
+    levels = [int(c) for c in args.concurrency.split(",")]
+    tag = f"fcb-{uuid.uuid4().hex[:6]}"
+    store = ResultsStore("bench_flashcards", highlights=args.highlights)
+
+    stub = None
+    if not args.no_stub:
+        stub = await AIStub(StubConfig(latency=args.stub_latency, max_concurrency=args.stub_concurrency), port=args.stub_port).start()
+
+    async with async_playwright() as pw:
+        session = await api_login(pw, settings)
+        request = await pw.request.new_context()
+        convex = ConvexClient(request, settings.convex_url)
+        browser = await launch_browser(pw)
+        try:
+            seed_start = time.perf_counter()
+            highlights = await seed_highlights(convex, session, args.highlights, tag, args.seed_concurrency)
+            seed_s = time.perf_counter() - seed_start
+            store.record("seed_per_s", len(highlights) / seed_s, "items/s")
+
+            cards_context = await new_context(browser, settings, session)
+            cards_page = await cards_context.new_page()
+            await cards_page.goto(session.route("flashcards"))
+
+            ui_items = highlights[: args.ui_sample]
+            api_items = highlights[args.ui_sample :]
+            per_level = max(1, len(api_items) // len(levels))
+            results: list[LevelResult] = []
+            for index, concurrency in enumerate(levels):
+                batch = api_items[index * per_level : (index + 1) * per_level]
+                if not batch:
+                    break
+                level = await run_level(convex, session, stub, batch, concurrency, cards_page, tag, args.visibility_timeout)
+                results.append(level)
+                summary = level.as_dict()
+                store.record("cards_per_s", level.cards_per_s, "cards/s", concurrency=concurrency, mode="api")
+                if level.visible_after_s is not None:
+                    store.record("visible_after_save", level.visible_after_s * 1000, concurrency=concurrency, mode="api")
+                print(
+                    f"  c={concurrency:>3}  {level.cards_per_s:7.2f} cards/s  "
+                    f"errors={summary['errors']}  visible_after={level.visible_after_s}s"
+                )
+            if stub and results and not any(r.stub.get("requests") for r in results):
+                print("warning: the AI stub saw no requests; is CLAUDE_API_BASE_URL set on the Convex deployment?")
+
+            ui = await run_ui_sample(browser, settings, session, ui_items, args.ui_workers, args.ui_timeout) if ui_items else None
+            if ui:
+                store.record("ui_items_per_s", ui["items_per_s"], "items/s", mode="ui")
+            await cards_context.close()
+        finally:
+            await browser.close()
+            await request.dispose()
+            if stub:
+                await stub.stop()
+
+    knee = scaling_knee(results, args.min_gain)
+    report = {
+        "tag": tag,
+        "seeded": len(highlights),
+        "seed_per_s": round(len(highlights) / seed_s, 3),
+        "levels": [level.as_dict() for level in results],
+        "scaling_stops_at": knee,
+        "ui": ui,
+    }
+    path = store.write_report(report)
+    print(f"throughput stops scaling at concurrency {knee}" if knee else "throughput scaled across all levels")
+    print(f"report: {path}")
+    return report
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk flashcard-generation throughput benchmark")
+    parser.add_argument("--highlights", type=int, default=500, help="highlights to seed (100-5000)")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32", help="comma-separated concurrency ladder")
+    parser.add_argument("--seed-concurrency", type=int, default=16)
+    parser.add_argument("--min-gain", type=float, default=0.10, help="throughput gain below which scaling has stopped")
+    parser.add_argument("--visibility-timeout", type=float, default=60.0, help="seconds to wait for cards on /flashcards")
+    parser.add_argument("--ui-sample", type=int, default=20, help="items driven through the inbox UI")
+    parser.add_argument("--ui-workers", type=int, default=4)
+    parser.add_argument("--ui-timeout", type=float, default=30000, help="ms to wait for the review modal")
+    parser.add_argument("--no-stub", action="store_true", help="use whatever Claude endpoint Convex is configured with")
+    parser.add_argument("--stub-port", type=int, default=8787)
+    parser.add_argument("--stub-latency", type=LatencyModel.parse, default=LatencyModel.parse("lognormal:800,0.4"))
+    parser.add_argument("--stub-concurrency", type=int, default=8)
+    args = parser.parse_args(argv)
+    if not 1 <= args.highlights <= 5000:
+        parser.error("--highlights must be between 1 and 5000")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
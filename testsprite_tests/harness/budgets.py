@@ -0,0 +1,282 @@
+"""Per-route performance budgets from ``perf_budgets.json``, enforced during normal TC runs.
+
+The budget file sits next to ``standard_prd.json`` and declares, per route
+template and throttling profile, upper limits for:
+
+- ``lcp_ms``          Largest Contentful Paint of a route entered by a page load
+- ``tbt_ms``          blocking time (long-task time past 50 ms) while on the route
+- ``transfer_bytes``  bytes transferred for the route (document + resources)
+- ``requests``        resource count for the route
+- ``js_heap_bytes``   peak JS heap used (CDP ``Performance.getMetrics``)
+- ``dom_nodes``       peak DOM node count
+
+A route's ``"*"`` entry applies to every profile, and a named profile entry
+overrides single metrics. A limit is a number (level from the file's
+``"level"``) or ``{"max": n, "level": "warn"}``. ``"targets"`` caps the level
+per target: the Vite dev server serves modules unbundled and compiles them on
+first request, so ``"dev": "warn"`` only reports what ``prod`` enforces.
+
+The :class:`BudgetMeter` hook samples the current page after every executed
+step. Consecutive steps on the same route template and document make up one
+*visit*. Client-side navigations start a new visit at the previous sample,
+and have no LCP of their own. Resource Timing reports ``transferSize`` 0 for
+cross-origin responses without ``Timing-Allow-Origin``, so Convex traffic
+counts as requests but not bytes. Every visit is checked against its budgets.
+The measurements and any violations (limit, actual value and delta) go into
+the test's ``data`` in the engine report, and the measurements also go into
+the history tagged by route. With ``--budgets fail``, a fail-level violation
+fails an otherwise passing test. With ``--budgets warn``, every violation is
+only reported.
+
+    python -m harness.engine --budgets fail --only TC001,TC004,TC013
+    python -m harness.budgets                                      # the budget table
+    python -m harness.budgets --check tmp/results/engine-<run>.json  # re-check a report
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from playwright.async_api import CDPSession, Error as PlaywrightError, Page
+
+from .config import TESTS_DIR
+from .engine import Engine, Hook, StepRecord, TestRun
+from .plan import Step
+from .routes import route_template
+
+BUDGETS_PATH = TESTS_DIR / "perf_budgets.json"
+METRICS = ("lcp_ms", "tbt_ms", "transfer_bytes", "requests", "js_heap_bytes", "dom_nodes")
+LEVELS = ("warn", "fail")
+
+# Installed in every document: LCP and long tasks are only observable from inside the page
+OBSERVER_SCRIPT = """(() => {
+  if (window.__perfBudget) return;
+  const state = (window.__perfBudget = { lcp: null, longtasks: [] });
+  try {
+    performance.setResourceTimingBufferSize(5000);
+    new PerformanceObserver((list) => {
+      for (const e of list.getEntries()) state.lcp = e.renderTime || e.loadTime || e.startTime;
+    }).observe({ type: 'largest-contentful-paint', buffered: true });
+    new PerformanceObserver((list) => {
+      for (const e of list.getEntries()) state.longtasks.push([e.startTime, e.duration]);
+    }).observe({ type: 'longtask', buffered: true });
+  } catch (e) {}
+})();"""
+
+# Takes {origin, since}; counts from ``since`` (ms on the page clock) unless this is another document
+SAMPLE_SCRIPT = """(visit) => {
+  const state = window.__perfBudget || { lcp: null, longtasks: [] };
+  const origin = performance.timeOrigin;
+  const since = origin === visit.origin ? visit.since : 0;
+  let bytes = 0, requests = 0, tbt = 0;
+  for (const e of [...performance.getEntriesByType('navigation'), ...performance.getEntriesByType('resource')]) {
+    if (e.startTime >= since) { bytes += e.transferSize || 0; requests += 1; }
+  }
+  for (const [start, duration] of state.longtasks) if (start >= since) tbt += Math.max(0, duration - 50);
+  return { origin, since, now: performance.now(), lcp: state.lcp, tbt, bytes, requests };
+}"""
+
+
+def load_budgets(path: Path = BUDGETS_PATH) -> dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {"routes": {}}
+
+
+@dataclass(frozen=True)
+class Budget:
+    metric: str
+    limit: float
+    level: str  # warn or fail
+
+
+def budgets_for(config: dict[str, Any], route: str, profile: str, target: str = "prod") -> dict[str, Budget]:
+    """The limits for ``route`` under ``profile``: the route's ``"*"`` entry overlaid with the profile's.
+
+    Levels are capped at the ``"targets"`` entry for ``target``, if any.
+    """
+    entry = config.get("routes", {}).get(route, {})
+    default_level = config.get("level", "fail")
+    cap = config.get("targets", {}).get(target, "fail")
+    if cap not in LEVELS:
+        raise ValueError(f"target {target}: level must be warn or fail, not {cap!r}")
+    merged = {**entry.get("*", {}), **entry.get(profile, {})}
+    budgets = {}
+    for metric, spec in merged.items():
+        if metric not in METRICS:
+            raise ValueError(f"{route} [{profile}]: unknown budget metric {metric!r}; choose from {', '.join(METRICS)}")
+        limit, level = (spec["max"], spec.get("level", default_level)) if isinstance(spec, dict) else (spec, default_level)
+        if level not in LEVELS:
+            raise ValueError(f"{route} [{profile}] {metric}: level must be warn or fail, not {level!r}")
+        budgets[metric] = Budget(metric, float(limit), "warn" if cap == "warn" else level)
+    return budgets
+
+
+@dataclass
+class Violation:
+    test: str
+    route: str
+    metric: str
+    limit: float
+    actual: float
+    level: str
+
+    @property
+    def delta(self) -> float:
+        return self.actual - self.limit
+
+    def describe(self) -> str:
+        return f"{self.route} {self.metric} {self.actual:.0f} > {self.limit:.0f} (+{self.delta:.0f}, +{self.delta / self.limit:.0%})"
+
+
+def check_visits(
+    config: dict[str, Any], visits: list[dict[str, Any]], profile: str, test: str, enforce: str = "fail", target: str = "prod"
+) -> list[Violation]:
+    """Every budget exceeded by ``visits``; with ``enforce="warn"`` all of them are warnings."""
+    violations = []
+    for visit in visits:
+        for metric, budget in budgets_for(config, visit["route"], profile, target).items():
+            actual = visit["metrics"].get(metric)
+            if actual is not None and actual > budget.limit:
+                level = budget.level if enforce == "fail" else "warn"
+                violations.append(Violation(test, visit["route"], metric, budget.limit, actual, level))
+    return violations
+
+
+@dataclass
+class _Visit:
+    route: str
+    origin: float
+    since: float
+    now: float
+    hard: bool  # entered by a page load, so it has an LCP
+    metrics: dict[str, float] = field(default_factory=dict)
+
+
+class BudgetMeter(Hook):
+    def __init__(
+        self, config: dict[str, Any], profile: str = "none", per_test: dict[str, str] | None = None, enforce: str = "fail", target: str = "dev"
+    ) -> None:
+        self.config = config
+        self.profile = profile
+        self.per_test = per_test or {}
+        self.enforce = enforce
+        self.target = target
+        self.sessions: dict[Page, CDPSession] = {}
+        self.instrumented: set[Any] = set()
+        self.visits: dict[str, list[_Visit]] = {}
+        self.violations: list[Violation] = []
+        self.reuse_context = False
+
+    async def engine_started(self, engine: Engine) -> None:
+        self.reuse_context = engine.options.reuse_context
+
+    def profile_for(self, run: TestRun) -> str:
+        return self.per_test.get(run.test.id, self.profile)
+
+    async def test_started(self, run: TestRun) -> None:
+        self.visits[run.test.id] = []
+        if run.context not in self.instrumented:
+            await run.context.add_init_script(script=OBSERVER_SCRIPT)
+            self.instrumented.add(run.context)
+
+    async def session(self, run: TestRun) -> CDPSession:
+        page = run.page
+        if page not in self.sessions:
+            cdp = await run.context.new_cdp_session(page)
+            await cdp.send("Performance.enable")
+            self.sessions[page] = cdp
+        return self.sessions[page]
+
+    async def step_finished(self, run: TestRun, step: Step, record: StepRecord) -> None:
+        if record.status not in ("pass", "fail"):
+            return
+        url = urlsplit(run.page.url)
+        if url.scheme not in ("http", "https"):
+            return
+        route = route_template(url.path or "/")
+        visits = self.visits[run.test.id]
+        last = visits[-1] if visits else None
+        since = 0.0 if last is None else last.since if last.route == route else last.now
+        try:
+            sample = await run.page.evaluate(SAMPLE_SCRIPT, {"origin": last.origin if last else None, "since": since})
+            cdp = await self.session(run)
+            metrics = {m["name"]: m["value"] for m in (await cdp.send("Performance.getMetrics"))["metrics"]}
+        except PlaywrightError:
+            return  # the page is navigating; the next step samples the new document
+        new_document = last is None or sample["origin"] != last.origin
+        if new_document or route != last.route:
+            last = _Visit(route, sample["origin"], sample["since"], sample["now"], new_document)
+            visits.append(last)
+        last.now = sample["now"]
+        last.metrics.update(tbt_ms=round(sample["tbt"], 1), transfer_bytes=sample["bytes"], requests=sample["requests"])
+        if last.hard and sample["lcp"] is not None:
+            last.metrics["lcp_ms"] = round(sample["lcp"], 1)
+        for name, key in (("JSHeapUsedSize", "js_heap_bytes"), ("Nodes", "dom_nodes")):
+            if metrics.get(name) is not None:
+                last.metrics[key] = max(last.metrics.get(key, 0), metrics[name])
+
+    async def test_finished(self, run: TestRun) -> None:
+        visits = [{"route": v.route, "hard": v.hard, "metrics": v.metrics} for v in self.visits.pop(run.test.id, [])]
+        run.data["route_metrics"] = visits
+        violations = check_visits(self.config, visits, self.profile_for(run), run.test.id, self.enforce, self.target)
+        if violations:
+            run.data["budget_violations"] = [{**asdict(v), "delta": round(v.delta, 1)} for v in violations]
+            self.violations.extend(violations)
+        failing = [v for v in violations if v.level == "fail"]
+        if failing and run.status == "pass":
+            run.status = "fail"
+            run.error = "performance budget exceeded: " + "; ".join(v.describe() for v in failing)
+        for page in [p for p in self.sessions if p.context == run.context]:
+            del self.sessions[page]
+
+    async def test_closed(self, run: TestRun) -> None:
+        if not self.reuse_context:
+            self.instrumented.discard(run.context)
+
+    async def engine_finished(self, engine: Engine, runs: list[TestRun]) -> None:
+        visits = sum(len(r.data.get("route_metrics", [])) for r in runs)
+        counts = {level: sum(v.level == level for v in self.violations) for level in LEVELS}
+        print(f"budgets: {visits} route visits checked [{self.target}, {self.profile}], {counts['fail']} over budget, {counts['warn']} warnings")
+        for v in self.violations:
+            print(f"  {v.level:<4} {v.test} {v.describe()}")
+
+
+def print_budgets(config: dict[str, Any]) -> None:
+    for target, level in config.get("targets", {}).items():
+        print(f"target {target}: at most {level}")
+    print(f"{'route':<24} {'profile':<12} " + " ".join(f"{m:>14}" for m in METRICS))
+    for route, entry in config.get("routes", {}).items():
+        for profile in entry:
+            budgets = budgets_for(config, route, profile)
+            cells = [f"{budgets[m].limit:>13.0f}{'w' if budgets[m].level == 'warn' else ' '}" if m in budgets else f"{'-':>14}" for m in METRICS]
+            print(f"{route:<24} {profile:<12} " + " ".join(cells))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Show the per-route performance budgets or re-check an engine report against them")
+    parser.add_argument("--budgets", type=Path, default=BUDGETS_PATH)
+    parser.add_argument("--check", type=Path, help="engine report (tmp/results/engine-<run>.json) run with --budgets")
+    args = parser.parse_args(argv)
+
+    config = load_budgets(args.budgets)
+    if not args.check:
+        print_budgets(config)
+        return
+    report = json.loads(args.check.read_text(encoding="utf-8"))
+    violations = []
+    for test in report["tests"]:
+        profile = test["data"].get("profile", report.get("profile", "none"))
+        violations += check_visits(config, test["data"].get("route_metrics", []), profile, test["id"], target=report.get("target", "dev"))
+    for v in violations:
+        print(f"{v.level:<4} {v.test} {v.describe()}")
+    print(f"{len(violations)} budgets exceeded in {args.check.name}")
+    if any(v.level == "fail" for v in violations):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
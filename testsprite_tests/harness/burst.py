@@ -0,0 +1,265 @@
+"""Concurrency bursts against the login and waitlist endpoints (TC003/TC014 under load).
+
+Fires a burst of simultaneous requests from a pool of API clients, then
+probes once per ``--probe-interval`` until the endpoint accepts requests
+again. For each burst size it reports latency, status codes, where the
+first ``429`` appeared (completion order and ms into the burst), how many
+requests got through before that, and the recovery time.
+
+- ``login``     ``POST /auth/login`` with a wrong password by default (no sessions created);
+  limited by ``RATE_LIMITS.login`` in ``src/lib/server/middleware/rateLimit.ts``
+- ``waitlist``  the landing page's Convex mutation ``joinWaitlist`` with a unique
+  address per request (entries stay in the waitlist table)
+
+    python -m harness.burst login --burst 5,10,50 --clients 8 --reset
+
+The server keys limits by ``X-Forwarded-For``/``X-Real-IP`` (``unknown`` on
+localhost), so every client shares one bucket unless ``--isolate`` gives each
+its own ``X-Test-ID`` (honoured with ``E2E_TEST_MODE=true``). ``--reset`` clears
+the limits through ``/test/reset-rate-limits`` before each burst.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from playwright.async_api import APIRequestContext, APIResponse, Error as PlaywrightError, async_playwright
+
+from .config import Settings, load_settings
+from .results import ResultsStore
+from .stats import summarize
+
+JOIN_WAITLIST = "features/waitlist/index:joinWaitlist"
+
+
+@dataclass
+class Shot:
+    index: int
+    client: int
+    ms: float = 0.0
+    done_at: float = 0.0  # ms since the burst started
+    status: int = 0
+    outcome: str = ""  # ok, denied, limited or error
+    remaining: str | None = None
+    detail: str = ""
+
+
+@dataclass
+class BurstResult:
+    endpoint: str
+    size: int
+    shots: list[Shot]
+    wall_ms: float
+    started: float = 0.0  # perf_counter() when the burst was released
+    limit_header: str | None = None
+    retry_after: str | None = None
+    recovery_s: float | None = None
+    probes: int = 0
+    codes: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def limited(self) -> list[Shot]:
+        return sorted((s for s in self.shots if s.outcome == "limited"), key=lambda s: s.done_at)
+
+    def summary(self) -> dict[str, Any]:
+        completed = sorted(self.shots, key=lambda s: s.done_at)
+        first = self.limited[0] if self.limited else None
+        return {
+            "endpoint": self.endpoint,
+            "size": self.size,
+            "wall_ms": round(self.wall_ms, 2),
+            "codes": self.codes,
+            "outcomes": dict(Counter(s.outcome for s in self.shots)),
+            "latency_ms": summarize(s.ms for s in self.shots),
+            "accepted_before_limit": sum(s.outcome != "limited" for s in completed[: completed.index(first)]) if first else len(completed),
+            "first_429_rank": completed.index(first) + 1 if first else None,
+            "first_429_at_ms": round(first.done_at, 2) if first else None,
+            "advertised_limit": self.limit_header,
+            "retry_after_s": self.retry_after,
+            "recovery_s": None if self.recovery_s is None else round(self.recovery_s, 3),
+            "recovery_probes": self.probes,
+        }
+
+
+async def json_body(response: APIResponse) -> dict[str, Any] | None:
+    """The response's JSON object, or ``None`` for an HTML error page, an empty body or other non-object."""
+    try:
+        payload = await response.json()
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+class Target:
+    """One endpoint: ``send`` returns ``(status, outcome, headers)``."""
+
+    def __init__(self, name: str, settings: Settings, args: argparse.Namespace) -> None:
+        self.name = name
+        self.settings = settings
+        self.args = args
+        self.tag = uuid.uuid4().hex[:8]
+        self.counter = 0
+
+    async def send(self, request: APIRequestContext) -> tuple[int, str, dict[str, str]]:
+        if self.name == "login":
+            password = self.settings.login_password if self.args.valid_login else f"wrong-{self.tag}"
+            response = await request.post(
+                f"{self.settings.base_url}/auth/login", data={"email": self.settings.login_user, "password": password}
+            )
+            if response.status == 429:
+                return 429, "limited", response.headers
+            if response.ok:
+                payload = await json_body(response)
+                if payload is None:
+                    return response.status, "error", response.headers
+                if payload.get("success"):
+                    return response.status, "ok", response.headers
+            return response.status, ("error" if response.status >= 500 else "denied"), response.headers
+
+        self.counter += 1
+        email = f"burst+{self.tag}-{self.counter}@{self.args.email_domain}"
+        response = await request.post(
+            f"{self.settings.convex_url.rstrip('/')}/api/mutation",
+            data={"path": JOIN_WAITLIST, "args": {"email": email, "referralSource": "harness.burst"}, "format": "json"},
+        )
+        if response.status == 429:
+            return 429, "limited", response.headers
+        payload = await json_body(response)
+        if payload is None:
+            return response.status, "error", response.headers
+        if payload.get("status") == "success":
+            return response.status, "ok", response.headers
+        message = str(payload.get("errorMessage", "")).lower()
+        return response.status, ("limited" if "rate" in message or "too many" in message else "error"), response.headers
+
+
+async def reset_limits(request: APIRequestContext, settings: Settings) -> bool:
+    response = await request.post(f"{settings.base_url}/test/reset-rate-limits")
+    return response.ok
+
+
+async def fire(target: Target, clients: list[APIRequestContext], size: int) -> BurstResult:
+    go = asyncio.Event()
+    shots = [Shot(i, i % len(clients)) for i in range(size)]
+    headers_seen: list[dict[str, str]] = []
+    start = 0.0
+
+    async def one(shot: Shot) -> None:
+        await go.wait()
+        sent = time.perf_counter()
+        try:
+            shot.status, shot.outcome, headers = await target.send(clients[shot.client])
+            shot.remaining = headers.get("x-ratelimit-remaining")
+            headers_seen.append(headers)
+        except PlaywrightError as exc:
+            shot.outcome, shot.detail = "error", str(exc).splitlines()[0][:80]
+        done = time.perf_counter()
+        shot.ms = (done - sent) * 1000
+        shot.done_at = (done - start) * 1000
+
+    tasks = [asyncio.create_task(one(shot)) for shot in shots]
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    go.set()
+    await asyncio.gather(*tasks)
+    result = BurstResult(target.name, size, shots, (time.perf_counter() - start) * 1000, start)
+    result.codes = {str(code): n for code, n in sorted(Counter(s.status for s in shots).items())}
+    result.limit_header = next((h["x-ratelimit-limit"] for h in headers_seen if "x-ratelimit-limit" in h), None)
+    result.retry_after = next((h["retry-after"] for h in headers_seen if "retry-after" in h), None)
+    return result
+
+
+async def measure_recovery(target: Target, client: APIRequestContext, result: BurstResult, args: argparse.Namespace) -> None:
+    """Probe until a request is not rate limited; time is measured from the first 429."""
+    if not result.limited:
+        return
+    limited_since = result.started + result.limited[0].done_at / 1000
+    deadline = time.perf_counter() + args.recovery_timeout
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(args.probe_interval)
+        result.probes += 1
+        try:
+            _, outcome, _ = await target.send(client)
+        except PlaywrightError:
+            continue
+        if outcome != "limited":
+            result.recovery_s = time.perf_counter() - limited_since
+            return
+
+
+async def run_bursts(args: argparse.Namespace) -> list[BurstResult]:
+    settings = load_settings()
+    if args.endpoint == "waitlist" and not settings.convex_url:
+        raise SystemExit("PUBLIC_CONVEX_URL is not set")
+    target = Target(args.endpoint, settings, args)
+    results: list[BurstResult] = []
+    async with async_playwright() as pw:
+        clients = [
+            await pw.request.new_context(extra_http_headers={"x-test-id": f"burst-{target.tag}-{i}"} if args.isolate else None)
+            for i in range(args.clients)
+        ]
+        try:
+            for size in (int(s) for s in args.burst.split(",")):
+                if args.reset and not await reset_limits(clients[0], settings):
+                    print("warning: /test/reset-rate-limits unavailable (needs E2E_TEST_MODE=true on localhost)")
+                result = await fire(target, clients, size)
+                await measure_recovery(target, clients[0], result, args)
+                results.append(result)
+                summary = result.summary()
+                print(
+                    f"{args.endpoint} burst {size:>4}: {summary['codes']} p95 {summary['latency_ms'].get('p95')} ms, "
+                    f"first 429 at #{summary['first_429_rank']} ({summary['first_429_at_ms']} ms), "
+                    f"{summary['accepted_before_limit']} through, recovery {summary['recovery_s']} s"
+                )
+                if args.pause:
+                    await asyncio.sleep(args.pause)
+        finally:
+            for client in clients:
+                await client.dispose()
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Burst and rate-limit characterisation")
+    parser.add_argument("endpoint", choices=("login", "waitlist"))
+    parser.add_argument("--burst", default="5,10,25,50", help="comma-separated burst sizes, run in order")
+    parser.add_argument("--clients", type=int, default=8, help="API request contexts the burst is spread over")
+    parser.add_argument("--isolate", action="store_true", help="give each client its own X-Test-ID rate-limit bucket")
+    parser.add_argument("--reset", action="store_true", help="clear server rate limits before every burst")
+    parser.add_argument("--valid-login", action="store_true", help="use the real password (creates sessions)")
+    parser.add_argument("--email-domain", default="example.com")
+    parser.add_argument("--probe-interval", type=float, default=1.0, help="seconds between recovery probes")
+    parser.add_argument("--recovery-timeout", type=float, default=120.0)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to wait between bursts")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_bursts(args))
+    store = ResultsStore("burst", endpoint=args.endpoint, clients=args.clients, isolate=args.isolate)
+    for result in results:
+        summary = result.summary()
+        store.record("burst_wall", result.wall_ms, size=result.size)
+        store.record("burst_p95", summary["latency_ms"].get("p95", 0.0), size=result.size)
+        if summary["first_429_at_ms"] is not None:
+            store.record("first_429", summary["first_429_at_ms"], size=result.size, rank=summary["first_429_rank"])
+        if result.recovery_s is not None:
+            store.record("recovery", result.recovery_s, unit="s", size=result.size)
+    path = store.write_report(
+        {
+            "endpoint": args.endpoint,
+            "bursts": [r.summary() for r in results],
+            "shots": {r.size: [s.__dict__ for s in r.shots] for r in results},
+        }
+    )
+    if not any(r.limited for r in results):
+        print(f"no 429 at any burst size up to {max(r.size for r in results)}")
+    print(f"report: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Run configuration shared by the harness modules.
+
+Defaults come from ``tmp/config.json`` (written by TestSprite); environment
+variables override them so the same tools work against other targets.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = TESTS_DIR.parent
+TMP_DIR = TESTS_DIR / "tmp"
+AUTH_DIR = TMP_DIR / ".auth"
+
+# Same launch arguments as the generated TC scripts
+BROWSER_ARGS = [
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+    "--ipc=host",
+    "--single-process",
+]
+
+
+@dataclass(frozen=True)
+class Settings:
+    base_url: str
+    login_user: str
+    login_password: str
+    convex_url: str | None
+
+
+def _read_env_file(path: Path) -> dict[str, str]:
+    values: dict[str, str] = {}
+    if not path.exists():
+        return values
+    for line in path.read_text(encoding="utf-8").splitlines():
+        key, sep, value = line.partition("=")
+        if sep and not key.lstrip().startswith("#"):
+            values[key.strip()] = value.strip().strip('"').strip("'")
+    return values
+
+
+def load_settings() -> Settings:
+    config_path = TMP_DIR / "config.json"
+    config = json.loads(config_path.read_text(encoding="utf-8")) if config_path.exists() else {}
+    dotenv = {**_read_env_file(REPO_ROOT / ".env"), **_read_env_file(REPO_ROOT / ".env.local")}
+    return Settings(
+        base_url=os.environ.get("TESTSPRITE_BASE_URL", config.get("localEndpoint", "http://localhost:5173")).rstrip("/"),
+        login_user=os.environ.get("TESTSPRITE_LOGIN_USER", config.get("loginUser", "")),
+        login_password=os.environ.get("TESTSPRITE_LOGIN_PASSWORD", config.get("loginPassword", "")),
+        convex_url=os.environ.get("PUBLIC_CONVEX_URL", dotenv.get("PUBLIC_CONVEX_URL")),
+    )
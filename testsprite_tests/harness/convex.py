@@ -0,0 +1,52 @@
+"""Minimal Convex HTTP API client on a Playwright ``APIRequestContext``.
+
+Function paths use Convex's ``module:export`` form, e.g.
+``features/inbox/index:createHighlightInInbox``.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from playwright.async_api import APIRequestContext
+
+
+class ConvexError(RuntimeError):
+    def __init__(self, path: str, message: str, data: Any = None) -> None:
+        super().__init__(f"{path}: {message}")
+        self.path = path
+        self.data = data
+
+
+class ConvexClient:
+    def __init__(self, request: APIRequestContext, url: str) -> None:
+        self.request = request
+        self.url = url.rstrip("/")
+
+    async def query(self, path: str, args: dict[str, Any] | None = None) -> Any:
+        return await self._call("query", path, args)
+
+    async def mutation(self, path: str, args: dict[str, Any] | None = None) -> Any:
+        return await self._call("mutation", path, args)
+
+    async def action(self, path: str, args: dict[str, Any] | None = None) -> Any:
+        return await self._call("action", path, args)
+
+    async def _call(self, kind: str, path: str, args: dict[str, Any] | None) -> Any:
+        response = await self.request.post(
+            f"{self.url}/api/{kind}",
+            data={"path": path, "args": args or {}, "format": "json"},
+        )
+        # Function errors come back as JSON, a gateway or proxy failure as an HTML or empty body
+        body = await response.text()
+        try:
+            payload = json.loads(body) if "json" in response.headers.get("content-type", "") else None
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            snippet = " ".join(body.split())[:120] or "empty body"
+            raise ConvexError(path, f"HTTP {response.status}, not a Convex response: {snippet}")
+        if payload.get("status") != "success":
+            raise ConvexError(path, payload.get("errorMessage", f"HTTP {response.status}"), payload.get("errorData"))
+        return payload["value"]
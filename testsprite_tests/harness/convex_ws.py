@@ -0,0 +1,284 @@
+"""Convex WebSocket frame instrumentation: subscriptions, mutations and the updates they cause.
+
+The app's data arrives over the Convex sync WebSocket, which request timing
+and the network log (:mod:`harness.network`) do not see. The
+:class:`ConvexFrameRecorder` hook attaches ``page.on("websocket")`` to every
+page and logs each frame of a Convex sync socket with its direction, size
+and time. It decodes the sync protocol messages:
+
+- ``ModifyQuerySet`` (sent): subscriptions added and removed, per function
+- ``Mutation`` / ``Action`` (sent) and their ``MutationResponse`` /
+  ``ActionResponse``: server round-trip per function
+- ``Transition`` (received): ``QueryUpdated`` / ``QueryFailed`` per subscribed
+  query, with the size of each update
+
+A successful mutation reports the commit timestamp ``ts``. The first
+``Transition`` whose end version reaches that timestamp is the update that
+makes the mutation visible. The queries it updates are the ones the mutation
+triggered, and the time from sending the mutation to that transition is the
+*mutation-to-update latency*. Per test, ``data.convex`` holds message counts
+and bytes per type, the peak number of active subscriptions, each query's
+subscribe/update counts and update bytes (chatty queries first), and every
+mutation with its latencies. Those latencies also go into the history as
+``convex_mutation`` / ``convex_mutation_update``, tagged by function
+(``udf``), with ``status=pass`` for successful mutations so
+:mod:`harness.regress` compares them; the protocol's ``ok``/``error`` is
+kept as ``convex_status``.
+
+    python -m harness.engine --convex-ws --only TC004,TC006,TC017
+    python -m harness.convex_ws tmp/results/engine-<run>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import binascii
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from playwright.async_api import Page, WebSocket
+
+from .engine import Engine, Hook, StepRecord, TestRun
+from .plan import Step
+from .stats import summarize
+
+
+def decode_ts(value: Any) -> int | None:
+    """A protocol timestamp: a little-endian u64 in base64, or a plain number."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int.from_bytes(base64.b64decode(value), "little")
+        except (ValueError, binascii.Error):
+            return None
+    return None
+
+
+@dataclass
+class _Mutation:
+    udf: str
+    kind: str  # mutation or action
+    sent_ms: float
+    status: str = "pending"  # pending, ok, error
+    server_ms: float | None = None
+    update_ms: float | None = None
+    ts: int | None = None
+    updated: list[str] = field(default_factory=list)
+
+
+@dataclass
+class SyncLog:
+    """The decoded sync traffic of one test; ``socket`` keys keep query and request ids apart."""
+
+    sockets: int = 0
+    frames: Counter[str] = field(default_factory=Counter)
+    bytes: Counter[str] = field(default_factory=Counter)
+    messages: dict[str, Counter[str]] = field(default_factory=lambda: {"sent": Counter(), "received": Counter()})
+    queries: dict[tuple[int, int], str] = field(default_factory=dict)  # (socket, query id) -> function
+    per_query: dict[str, Counter[str]] = field(default_factory=dict)
+    active: int = 0
+    peak_active: int = 0
+    mutations: dict[tuple[int, Any], _Mutation] = field(default_factory=dict)
+    undecoded: int = 0
+
+    def _query(self, udf: str) -> Counter[str]:
+        return self.per_query.setdefault(udf, Counter())
+
+    @staticmethod
+    def _size(payload: str | bytes) -> int:
+        return len(payload.encode()) if isinstance(payload, str) else len(payload)
+
+    def _parse(self, payload: str | bytes) -> dict[str, Any] | None:
+        try:
+            message = json.loads(payload)
+        except (ValueError, UnicodeDecodeError):
+            self.undecoded += 1
+            return None
+        return message if isinstance(message, dict) else None
+
+    def sent(self, socket: int, ms: float, payload: str | bytes) -> None:
+        self.frames["sent"] += 1
+        self.bytes["sent"] += self._size(payload)
+        message = self._parse(payload)
+        if message is None:
+            return
+        kind = message.get("type", "?")
+        self.messages["sent"][kind] += 1
+        if kind == "ModifyQuerySet":
+            for change in message.get("modifications", []):
+                key = (socket, change.get("queryId"))
+                if change.get("type") == "Add":
+                    udf = change.get("udfPath", "?")
+                    self.queries[key] = udf
+                    self._query(udf)["subscribed"] += 1
+                    self.active += 1
+                    self.peak_active = max(self.peak_active, self.active)
+                elif change.get("type") == "Remove" and key in self.queries:
+                    self._query(self.queries[key])["removed"] += 1
+                    self.active -= 1
+        elif kind in ("Mutation", "Action"):
+            self.mutations[(socket, message.get("requestId"))] = _Mutation(message.get("udfPath", "?"), kind.lower(), ms)
+
+    def received(self, socket: int, ms: float, payload: str | bytes) -> None:
+        self.frames["received"] += 1
+        self.bytes["received"] += self._size(payload)
+        message = self._parse(payload)
+        if message is None:
+            return
+        kind = message.get("type", "?")
+        self.messages["received"][kind] += 1
+        if kind in ("MutationResponse", "ActionResponse"):
+            mutation = self.mutations.get((socket, message.get("requestId")))
+            if mutation is not None:
+                mutation.server_ms = ms - mutation.sent_ms
+                mutation.status = "ok" if message.get("success") else "error"
+                mutation.ts = decode_ts(message.get("ts")) if mutation.status == "ok" else None
+        elif kind == "Transition":
+            updated = []
+            for change in message.get("modifications", []):
+                udf = self.queries.get((socket, change.get("queryId")), "?")
+                if change.get("type") == "QueryUpdated":
+                    self._query(udf)["updates"] += 1
+                    self._query(udf)["update_bytes"] += len(json.dumps(change.get("value")))
+                    updated.append(udf)
+                elif change.get("type") == "QueryFailed":
+                    self._query(udf)["failed"] += 1
+            end = decode_ts((message.get("endVersion") or {}).get("ts"))
+            for (sock, _), mutation in self.mutations.items():
+                if sock == socket and mutation.ts is not None and mutation.update_ms is None and end is not None and end >= mutation.ts:
+                    mutation.update_ms = ms - mutation.sent_ms
+                    mutation.updated = sorted(set(updated))
+
+    def summary(self) -> dict[str, Any]:
+        mutations = list(self.mutations.values())
+        return {
+            "sockets": self.sockets,
+            "frames": dict(self.frames),
+            "bytes": dict(self.bytes),
+            "messages": {direction: dict(counts) for direction, counts in self.messages.items()},
+            "undecoded": self.undecoded,
+            "subscriptions": {
+                "added": sum(q["subscribed"] for q in self.per_query.values()),
+                "removed": sum(q["removed"] for q in self.per_query.values()),
+                "peak_active": self.peak_active,
+            },
+            "queries": dict(sorted(((udf, dict(c)) for udf, c in self.per_query.items()), key=lambda kv: -kv[1].get("updates", 0))),
+            "mutations": [
+                {
+                    "udf": m.udf,
+                    "kind": m.kind,
+                    "status": m.status,
+                    "server_ms": None if m.server_ms is None else round(m.server_ms, 1),
+                    "update_ms": None if m.update_ms is None else round(m.update_ms, 1),
+                    "updated": m.updated,
+                }
+                for m in mutations
+            ],
+            "latency": {
+                "server": summarize(m.server_ms for m in mutations if m.server_ms is not None),
+                "update": summarize(m.update_ms for m in mutations if m.update_ms is not None),
+            },
+        }
+
+
+def is_convex_socket(url: str, convex_url: str | None) -> bool:
+    if convex_url:
+        host = convex_url.split("://", 1)[-1].split("/", 1)[0]
+        if host not in url:
+            return False
+    return "/sync" in url
+
+
+class ConvexFrameRecorder(Hook):
+    def __init__(self) -> None:
+        self.convex_url: str | None = None
+        self.pages: set[Page] = set()
+        self.logs: dict[str, SyncLog] = {}
+
+    async def engine_started(self, engine: Engine) -> None:
+        self.convex_url = engine.settings.convex_url
+
+    def ensure(self, run: TestRun) -> None:
+        page = run.page
+        if page in self.pages:
+            return
+        self.pages.add(page)
+        log = self.logs[run.test.id]
+
+        def opened(ws: WebSocket) -> None:
+            if not is_convex_socket(ws.url, self.convex_url):
+                return
+            log.sockets += 1
+            socket = log.sockets
+
+            def now() -> float:
+                return (time.perf_counter() - run.started_at) * 1000
+
+            ws.on("framesent", lambda payload: log.sent(socket, now(), payload))
+            ws.on("framereceived", lambda payload: log.received(socket, now(), payload))
+
+        page.on("websocket", opened)
+
+    async def test_started(self, run: TestRun) -> None:
+        self.logs[run.test.id] = SyncLog()
+        self.ensure(run)
+
+    async def step_started(self, run: TestRun, step: Step, record: StepRecord) -> None:
+        # Pages opened by a click (new tabs) are followed from their first step on
+        self.ensure(run)
+
+    async def test_finished(self, run: TestRun) -> None:
+        log = self.logs.pop(run.test.id, None)
+        if log is not None and log.sockets:
+            run.data["convex"] = log.summary()
+        self.pages -= {p for p in self.pages if p.context == run.context}
+
+    async def engine_finished(self, engine: Engine, runs: list[TestRun]) -> None:
+        traced = [r for r in runs if "convex" in r.data]
+        print(f"convex: sync traffic in {len(traced)} of {len(runs)} tests")
+        for run in traced:
+            print_summary(run.test.id, run.data["convex"], limit=3)
+
+
+def print_summary(test_id: str, convex: dict[str, Any], limit: int = 10) -> None:
+    frames, size, subs = convex["frames"], convex["bytes"], convex["subscriptions"]
+    server, update = convex["latency"]["server"], convex["latency"]["update"]
+    line = (
+        f"  {test_id}: {frames.get('sent', 0)} sent / {frames.get('received', 0)} received frames, "
+        f"{size.get('sent', 0) / 1024:,.1f} / {size.get('received', 0) / 1024:,.1f} KB, "
+        f"{subs['added']} subscriptions (peak {subs['peak_active']} active), {len(convex['mutations'])} mutations"
+    )
+    if update["count"]:
+        line += f", mutation→update median {update['median']:.0f}ms (server {server['median']:.0f}ms)"
+    print(line)
+    for udf, counts in list(convex["queries"].items())[:limit]:
+        print(f"    {counts.get('updates', 0):>4} updates  {counts.get('update_bytes', 0) / 1024:8.1f} KB  ×{counts.get('subscribed', 0)} subscribed  {udf}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Convex sync traffic per test from an engine report run with --convex-ws")
+    parser.add_argument("report", type=Path, help="tmp/results/engine-<run>.json")
+    parser.add_argument("--only", help="comma-separated test ids")
+    parser.add_argument("--top", type=int, default=10, help="queries listed per test, most updated first")
+    args = parser.parse_args(argv)
+
+    report = json.loads(args.report.read_text(encoding="utf-8"))
+    wanted = {t.strip().upper() for t in args.only.split(",")} if args.only else None
+    for test in report["tests"]:
+        if "convex" not in test["data"] or wanted and test["id"] not in wanted:
+            continue
+        print_summary(test["id"], test["data"]["convex"], args.top)
+        for mutation in test["data"]["convex"]["mutations"]:
+            latency = "no update seen" if mutation["update_ms"] is None else f"update after {mutation['update_ms']:.0f}ms"
+            server = "" if mutation["server_ms"] is None else f"response {mutation['server_ms']:.0f}ms, "
+            print(f"    {mutation['kind']} {mutation['udf']} [{mutation['status']}]: {server}{latency} → {', '.join(mutation['updated']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Fail-fast dependency graph: gate checks run first, dependents of a failed gate are blocked.
+
+When WorkOS login breaks, every authenticated TC still clicks through its
+sleeps and 5–30 s timeouts before failing. ``dependencies.json`` declares
+*gates*, in order:
+
+- a **test gate** is open when its TC passes; ``"gates": "login"`` makes every
+  test that logs in through the UI (a password ``fill`` in the compiled plan)
+  a dependent, minus ``exclude``
+- a **route gate** logs in headlessly (``POST /auth/login``) and requests a
+  workspace route such as ``/w/<slug>/inbox`` without following redirects;
+  it is open on HTTP 200
+- ``requires`` names earlier gates; a gate behind a closed one is closed too
+
+With ``--fail-fast`` (the default) the engine resolves the gates before
+anything else. A test gate only runs when its TC is selected; an unselected
+one gates nothing. Route gates run whenever a selected test depends on them.
+Dependents of a closed gate are not started: they are reported as
+``blocked`` with the gate and its failure, and count as not passing. The
+remaining tests then run as usual, ``--parallel`` at a time.
+
+    python -m harness.engine                      # TC001 and the inbox probe first
+    python -m harness.engine --no-fail-fast
+    python -m harness.depgraph                    # the resolved graph
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from playwright.async_api import Error as PlaywrightError
+
+from .engine import Engine, StepRecord, TestRun
+from .plan import CompiledTest, compile_plan
+from .session import LoginError, api_login
+
+DEFAULT_GRAPH = Path(__file__).with_name("dependencies.json")
+
+
+@dataclass(frozen=True)
+class Gate:
+    name: str
+    test: str | None  # TC that must pass
+    route: str | None  # or workspace route that must answer 200
+    requires: tuple[str, ...]
+    dependents: tuple[str, ...]
+
+    @property
+    def label(self) -> str:
+        return self.test or f"/w/{{slug}}/{self.route}"
+
+
+def logs_in(test: CompiledTest) -> bool:
+    """The test signs in through the UI: it fills the login password."""
+    return any(
+        s.op == "fill" and (s.value == "{login_password}" or (bool(s.value) and "password" in s.note.lower())) for s in test.steps
+    )
+
+
+def load_graph(tests: list[CompiledTest], path: Path = DEFAULT_GRAPH) -> list[Gate]:
+    """The gates of ``path`` with their dependents resolved against ``tests``, in file order."""
+    spec = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {"gates": []}
+    gates: list[Gate] = []
+    for entry in spec.get("gates", []):
+        name = entry["name"]
+        if ("test" in entry) == ("route" in entry):
+            raise ValueError(f"gate {name}: give exactly one of test or route")
+        unknown = [r for r in entry.get("requires", []) if r not in {g.name for g in gates}]
+        if unknown:
+            raise ValueError(f"gate {name} requires {', '.join(unknown)}, which must be declared before it")
+        selector = entry.get("gates", [])
+        if selector == "login":
+            dependents = [t.id for t in tests if logs_in(t)]
+        elif isinstance(selector, list):
+            dependents = [t.strip().upper() for t in selector]
+        else:
+            raise ValueError(f"gate {name}: gates must be \"login\" or a list of test ids")
+        excluded = {entry.get("test"), *entry.get("exclude", [])}
+        gate_tests = {g.test for g in gates}
+        dependents = [d for d in dependents if d not in excluded and d not in gate_tests]
+        gates.append(Gate(name, entry.get("test"), entry.get("route"), tuple(entry.get("requires", [])), tuple(dependents)))
+    return gates
+
+
+async def probe_route(engine: Engine, section: str) -> str | None:
+    """``None`` when the logged-in workspace route answers 200, else why not."""
+    try:
+        session = await api_login(engine.pw, engine.settings)
+        path = session.route(section)
+    except LoginError as exc:
+        return str(exc)
+    request = await engine.pw.request.new_context(base_url=engine.settings.base_url, storage_state=session.storage_state)
+    try:
+        response = await request.get(path, max_redirects=0)
+    except PlaywrightError as exc:
+        return f"GET {path}: {str(exc).splitlines()[0][:160]}"
+    finally:
+        await request.dispose()
+    if response.status == 200:
+        return None
+    location = response.headers.get("location")
+    return f"GET {path}: HTTP {response.status}" + (f" → {location}" if location else "")
+
+
+def blocked_run(test: CompiledTest, gate: Gate, reason: str) -> TestRun:
+    run = TestRun(test, records=[StepRecord(i, s.op, s.label, status="skip") for i, s in enumerate(test.steps)])
+    run.status = "blocked"
+    run.error = f"blocked by {gate.name} ({reason})"
+    run.data["blocked_by"] = gate.name
+    return run
+
+
+async def schedule(engine: Engine, tests: list[CompiledTest], gates: list[Gate]) -> list[TestRun]:
+    """Resolve ``gates`` in order, then run every test not behind a closed one; runs come back in ``tests`` order."""
+    selected = {t.id: t for t in tests}
+    closed: dict[str, str] = {}  # gate name -> reason
+    runs: dict[str, TestRun] = {}
+    for gate in gates:
+        behind = next((r for r in gate.requires if r in closed), None)
+        if behind is not None:
+            closed[gate.name] = f"{behind}: {closed[behind]}"
+        elif gate.test is not None:
+            if gate.test not in selected:
+                continue
+            run = runs[gate.test] = await engine.run_test(selected[gate.test])
+            if run.status != "pass":
+                closed[gate.name] = f"{gate.test} {run.status}: {run.error}"
+        elif any(d in selected for d in gate.dependents):
+            reason = await probe_route(engine, gate.route or "")
+            if reason is not None:
+                closed[gate.name] = reason
+        else:
+            continue
+        print(f"gate {gate.name} [{gate.label}]: " + (f"closed, {closed[gate.name]}" if gate.name in closed else "open"))
+
+    blocker: dict[str, Gate] = {}
+    for gate in gates:
+        if gate.name in closed:
+            for dependent in gate.dependents:
+                blocker.setdefault(dependent, gate)
+    runnable = []
+    for test in tests:
+        if test.id in runs:
+            continue
+        if test.id in blocker:
+            gate = blocker[test.id]
+            runs[test.id] = blocked_run(test, gate, closed[gate.name])
+        else:
+            runnable.append(test)
+    for run in await engine.run_many(runnable):
+        runs[run.test.id] = run
+    return [runs[t.id] for t in tests]
+
+
+def describe(gates: list[Gate]) -> list[dict[str, Any]]:
+    return [{"gate": g.name, "check": g.label, "requires": list(g.requires), "dependents": list(g.dependents)} for g in gates]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Show the fail-fast dependency graph resolved against the compiled plan")
+    parser.add_argument("--graph", type=Path, default=DEFAULT_GRAPH)
+    args = parser.parse_args(argv)
+
+    tests = compile_plan()
+    gates = load_graph(tests, args.graph)
+    gated = {d for g in gates for d in g.dependents} | {g.test for g in gates if g.test}
+    for gate in describe(gates):
+        requires = f" (after {', '.join(gate['requires'])})" if gate["requires"] else ""
+        print(f"{gate['gate']:<8} {gate['check']:<20}{requires}".rstrip())
+        print(f"         gates {', '.join(gate['dependents']) or '-'}")
+    free = [t.id for t in tests if t.id not in gated]
+    print(f"ungated: {', '.join(free) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,568 @@
+"""Shared async step engine for the compiled TC plans (see :mod:`harness.plan`).
+
+One Playwright instance and one browser serve every test; each test gets a
+fresh context and runs its steps in order, stopping at the first failure
+like the generated scripts do. Fixed sleeps are skipped unless
+``--keep-sleeps`` is given: clicks, fills and expectations already wait for
+their element.
+
+Engine-wide behaviour lives in :class:`Hook` subclasses, which see every test
+and step, so measurements and artefacts apply to all TCs at once. Gate checks
+(login, inbox) run first, and tests behind a failed gate are reported as
+blocked instead of timing out (see :mod:`harness.depgraph`).
+
+    python -m harness.engine --only TC001,TC013,TC018 --parallel 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import time
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from playwright.async_api import Browser, BrowserContext, Error as PlaywrightError, Page, async_playwright, expect
+
+from .batch_expect import batch_groups, check_all, expectation_for
+from .config import TMP_DIR, Settings, load_settings
+from .plan import CompiledTest, Step, compile_plan
+from .results import ResultsStore
+from .session import launch_browser, new_context
+from .settle import QUIET_MS, install, wait_for_settled
+from .timeouts import BudgetRule, learn, save, script_timeout, step_key
+
+TRACES_DIR = TMP_DIR / "traces"
+SETTLE_OPS = {"goto", "click"}
+
+
+@dataclass
+class EngineOptions:
+    keep_sleeps: bool = False
+    action_timeout: float = 5000  # ms, for steps that did not set one
+    expect_timeout: float = 30000
+    parallel: int = 1
+    trace: bool = False
+    headless: bool = True
+    reuse_context: bool = False  # one context for every test in turn (requires parallel == 1)
+    batch_expects: bool = False  # consecutive expectations checked in one script per poll (harness.batch_expect)
+    step_timeouts: dict[str, float] = field(default_factory=dict)  # step key -> learned budget (ms), see harness.timeouts
+    settle: bool = False  # after goto/click, wait for Convex data to settle instead of domcontentloaded (harness.settle)
+    settle_quiet_ms: float = QUIET_MS
+    fail_fast: bool = False  # resolve the gates in harness/dependencies.json first and block their dependents
+
+
+@dataclass
+class StepRecord:
+    index: int
+    op: str
+    label: str
+    started: float = 0.0  # ms since the test started
+    ms: float = 0.0
+    status: str = "pending"  # pass, fail, skip or pending
+    error: str = ""
+    data: dict[str, Any] = field(default_factory=dict)  # filled by hooks
+
+
+@dataclass
+class TestRun:
+    test: CompiledTest
+    context: BrowserContext | None = None
+    records: list[StepRecord] = field(default_factory=list)
+    status: str = "pending"  # pass, fail, error, blocked
+    error: str = ""
+    ms: float = 0.0
+    started_at: float = 0.0  # perf_counter()
+    data: dict[str, Any] = field(default_factory=dict)  # filled by hooks
+
+    @property
+    def page(self) -> Page:
+        """The most recently opened page, as ``context.pages[-1]`` in the scripts."""
+        return self.context.pages[-1]
+
+    @property
+    def failed_step(self) -> StepRecord | None:
+        return next((r for r in self.records if r.status == "fail"), None)
+
+
+class Hook:
+    """Extension point; every method is awaited for every test/step in registration order."""
+
+    def context_options(self, test: CompiledTest) -> dict[str, Any]:
+        """Extra ``browser.new_context`` arguments for ``test`` (e.g. video recording)."""
+        return {}
+
+    async def engine_started(self, engine: Engine) -> None:
+        pass
+
+    async def test_started(self, run: TestRun) -> None:
+        pass
+
+    async def step_started(self, run: TestRun, step: Step, record: StepRecord) -> None:
+        pass
+
+    async def verify(self, run: TestRun, step: Step, record: StepRecord) -> bool:
+        """True when the hook has already established that an expectation step holds; the engine then skips it."""
+        return False
+
+    async def step_finished(self, run: TestRun, step: Step, record: StepRecord) -> None:
+        pass
+
+    async def test_finished(self, run: TestRun) -> None:
+        pass
+
+    async def test_closed(self, run: TestRun) -> None:
+        """After the context is closed (videos are complete only now)."""
+        pass
+
+    async def engine_finished(self, engine: Engine, runs: list[TestRun]) -> None:
+        pass
+
+
+class Engine:
+    def __init__(self, settings: Settings, options: EngineOptions | None = None, hooks: Sequence[Hook] = ()) -> None:
+        self.settings = settings
+        self.options = options or EngineOptions()
+        self.hooks = list(hooks)
+        self.browser: Browser | None = None
+        self.pw: Any = None
+        self.shared: BrowserContext | None = None
+
+    def substitute(self, value: str | None) -> str | None:
+        if value is None:
+            return None
+        return value.replace("{login_user}", self.settings.login_user).replace("{login_password}", self.settings.login_password)
+
+    @contextlib.asynccontextmanager
+    async def open(self) -> AsyncIterator[Engine]:
+        """Start Playwright and the browser and notify the hooks; for callers that drive :meth:`run_test` themselves."""
+        if self.options.reuse_context and self.options.parallel > 1:
+            raise ValueError("reuse_context runs tests one after another; use parallel=1")
+        async with async_playwright() as pw:
+            self.pw = pw
+            self.browser = await launch_browser(pw, headless=self.options.headless)
+            try:
+                for hook in self.hooks:
+                    await hook.engine_started(self)
+                yield self
+            finally:
+                await self.browser.close()
+                self.shared = None
+
+    async def run(self, tests: Sequence[CompiledTest]) -> list[TestRun]:
+        async with self.open():
+            if self.options.fail_fast:
+                from .depgraph import load_graph, schedule
+
+                runs = await schedule(self, list(tests), load_graph(list(tests)))
+            else:
+                runs = await self.run_many(tests)
+            for hook in self.hooks:
+                await hook.engine_finished(self, runs)
+        return runs
+
+    async def run_many(self, tests: Sequence[CompiledTest]) -> list[TestRun]:
+        slots = asyncio.Semaphore(self.options.parallel)
+
+        async def bounded(test: CompiledTest) -> TestRun:
+            async with slots:
+                return await self.run_test(test)
+
+        return list(await asyncio.gather(*(bounded(t) for t in tests)))
+
+    async def run_test(self, test: CompiledTest) -> TestRun:
+        run = TestRun(test, records=[StepRecord(i, s.op, s.label) for i, s in enumerate(test.steps)])
+        extra: dict[str, Any] = {}
+        for hook in self.hooks:
+            extra.update(hook.context_options(test))
+        if self.options.reuse_context:
+            if self.shared is None:
+                self.shared = await self.new_context(extra)
+            run.context = self.shared
+        else:
+            run.context = await self.new_context(extra)
+        run.started_at = time.perf_counter()
+        if self.options.trace:
+            await run.context.tracing.start(screenshots=True, snapshots=True)
+        try:
+            await run.context.new_page()
+            for hook in self.hooks:
+                await hook.test_started(run)
+            run.status = "pass"
+            groups = batch_groups(test.steps) if self.options.batch_expects else [[i] for i in range(len(test.steps))]
+            for group in groups:
+                members = [(test.steps[i], run.records[i]) for i in group]
+                if await (self.run_batch(run, members) if len(members) > 1 else self.run_step(run, *members[0])):
+                    continue
+                failed = [r for _, r in members if r.status == "fail"]
+                run.status = "fail"
+                run.error = failed[0].error if len(failed) == 1 else f"{len(failed)} checks failed: " + "; ".join(r.error for r in failed)
+                break
+        except PlaywrightError as exc:
+            run.status, run.error = "error", str(exc).splitlines()[0][:200]
+        finally:
+            run.ms = (time.perf_counter() - run.started_at) * 1000
+            for record in run.records:
+                if record.status == "pending":
+                    record.status = "skip"
+            for hook in self.hooks:
+                await hook.test_finished(run)
+            if self.options.trace:
+                TRACES_DIR.mkdir(parents=True, exist_ok=True)
+                await run.context.tracing.stop(path=TRACES_DIR / f"{test.id}.zip")
+            if self.options.reuse_context:
+                for page in run.context.pages:
+                    await page.close()
+            else:
+                await run.context.close()
+            for hook in self.hooks:
+                await hook.test_closed(run)
+        return run
+
+    async def new_context(self, extra: dict[str, Any]) -> BrowserContext:
+        context = await new_context(self.browser, self.settings, **extra)
+        if self.options.settle:
+            await install(context)
+        return context
+
+    async def run_step(self, run: TestRun, step: Step, record: StepRecord) -> bool:
+        if step.op == "sleep" and not self.options.keep_sleeps:
+            record.status = "skip"
+            return True
+        for hook in self.hooks:
+            await hook.step_started(run, step, record)
+        script = script_timeout(step, self.options.action_timeout, self.options.expect_timeout)
+        budget = self.options.step_timeouts.get(step_key(run.test.id, record.index, step.op))
+        if budget:
+            record.data["budget"] = budget
+        start = time.perf_counter()
+        record.started = (start - run.started_at) * 1000
+        try:
+            if not (step.op.startswith("expect_") and await self.verified(run, step, record)):
+                await self.perform(run.page, step, budget or script)
+            if self.options.settle and step.op in SETTLE_OPS:
+                settled = await wait_for_settled(run.page, self.options.settle_quiet_ms)
+                record.data["settle"] = {"ms": round(settled.ms, 1), **({} if settled.settled else {"pending": settled.pending})}
+            record.status = "pass"
+        except (PlaywrightError, AssertionError) as exc:
+            record.status = "fail"
+            record.error = step.message or str(exc).splitlines()[0][:200]
+        record.ms = (time.perf_counter() - start) * 1000
+        if record.status == "fail" and budget and budget < script and record.ms >= budget:
+            record.error += f" (learned budget {budget:.0f}ms, script allows {script:.0f}ms)"
+        for hook in self.hooks:
+            await hook.step_finished(run, step, record)
+        return record.status == "pass"
+
+    async def verified(self, run: TestRun, step: Step, record: StepRecord) -> bool:
+        for hook in self.hooks:
+            if await hook.verify(run, step, record):
+                return True
+        return False
+
+    async def run_batch(self, run: TestRun, members: list[tuple[Step, StepRecord]]) -> bool:
+        """Consecutive expectations in one polling loop; every unmet one fails, not just the first."""
+        start = time.perf_counter()
+        for step, record in members:
+            for hook in self.hooks:
+                await hook.step_started(run, step, record)
+            if await self.verified(run, step, record):
+                record.status, record.started = "pass", (start - run.started_at) * 1000
+        live = [(step, record) for step, record in members if record.status != "pass"]
+        if live:
+            await self.check_batch(run, live)
+        for step, record in members:
+            for hook in self.hooks:
+                await hook.step_finished(run, step, record)
+        return all(record.status == "pass" for _, record in members)
+
+    async def check_batch(self, run: TestRun, members: list[tuple[Step, StepRecord]]) -> None:
+        timeouts = []
+        for step, record in members:
+            budget = self.options.step_timeouts.get(step_key(run.test.id, record.index, step.op))
+            if budget:
+                record.data["budget"] = budget
+            timeouts.append(budget or script_timeout(step, self.options.action_timeout, self.options.expect_timeout))
+        start = time.perf_counter()
+        result = await check_all(run.page, [expectation_for(step) for step, _ in members], max(timeouts))
+        done = 0.0
+        for i, (step, record) in enumerate(members):
+            record.started = (start - run.started_at) * 1000
+            record.data["batch"] = {"first": members[0][1].index, "size": len(members), "polls": result.polls}
+            seen = result.seen_ms[i]
+            if seen is not None:
+                # Time past the previous check, as if the expectations had run one after another
+                record.status, record.ms = "pass", max(seen - done, 0.0)
+                done = max(done, seen)
+            else:
+                record.status, record.ms = "fail", max(result.ms - done, 0.0)
+                record.error = step.message or result.errors.get(i) or f"not met after {result.ms:.0f}ms: {step.label}"
+
+    async def perform(self, page: Page, step: Step, timeout: float) -> None:
+        if step.op == "goto":
+            await page.goto(step.url, wait_until="commit" if self.options.settle else "domcontentloaded", timeout=timeout)
+        elif step.op == "click":
+            await page.locator(step.selector).nth(step.nth).click(timeout=timeout)
+        elif step.op == "fill":
+            await page.locator(step.selector).nth(step.nth).fill(self.substitute(step.value) or "", timeout=timeout)
+        elif step.op == "scroll":
+            dy = step.dy
+            if isinstance(dy, str):
+                height = await page.evaluate("() => window.innerHeight")
+                dy = -height if dy.startswith("-") else height
+            await page.mouse.wheel(0, dy)
+        elif step.op == "sleep":
+            await page.wait_for_timeout(step.ms or 0)
+        elif step.op.startswith("expect_"):
+            await self.check(page, step, timeout)
+        else:
+            raise AssertionError(f"unsupported step: {step.value}")
+
+    async def check(self, page: Page, step: Step, timeout: float) -> None:
+        if step.op == "expect_url":
+            await expect(page).to_have_url(self.substitute(step.value), timeout=timeout)
+            return
+        locator = page.locator(step.selector).nth(step.nth)
+        if step.op == "expect_visible":
+            await expect(locator).to_be_visible(timeout=timeout)
+        else:
+            await expect(locator).to_contain_text(self.substitute(step.value) or "", timeout=timeout)
+
+
+def select(tests: list[CompiledTest], only: str | None) -> list[CompiledTest]:
+    if not only:
+        return tests
+    wanted = {t.strip().upper() for t in only.split(",")}
+    return [t for t in tests if t.id in wanted]
+
+
+def print_runs(runs: list[TestRun]) -> None:
+    for run in runs:
+        executed = [r for r in run.records if r.status in ("pass", "fail")]
+        line = f"{run.test.id}  {run.status:<7} {run.ms / 1000:6.1f}s  {len(executed):>3}/{len(run.records)} steps  {run.test.title}"
+        print(line)
+        failed = run.failed_step
+        if failed:
+            print(f"    step {failed.index} {failed.label}: {failed.error}")
+        elif run.error:
+            print(f"    {run.error}")
+
+
+def record_runs(store: ResultsStore, runs: list[TestRun]) -> None:
+    for run in runs:
+        if run.status == "blocked":
+            continue  # never started; the report lists it with its gate
+        # Per-test throttling overrides tag their own records
+        tags = {"profile": run.data["profile"]} if "profile" in run.data else {}
+        store.record("test", run.ms, test=run.test.id, status=run.status, **tags)
+        for key, value in run.data.get("memory_peak", {}).items():
+            if value is not None:
+                store.record(f"peak_{key}", value, unit="bytes" if key.startswith(("js_heap", "browser")) else "count", test=run.test.id, **tags)
+        for visit in run.data.get("route_metrics", []):
+            for metric, value in visit["metrics"].items():
+                unit = "ms" if metric.endswith("_ms") else "bytes" if metric.endswith("_bytes") else "count"
+                store.record(metric, value, unit=unit, test=run.test.id, route=visit["route"], **tags)
+        for mutation in run.data.get("convex", {}).get("mutations", []):
+            # status is pass/fail like every other record; the sync protocol's ok/error goes alongside
+            status = "pass" if mutation["status"] == "ok" else "fail"
+            for metric, key in (("convex_mutation", "server_ms"), ("convex_mutation_update", "update_ms")):
+                if mutation[key] is not None:
+                    store.record(metric, mutation[key], test=run.test.id, udf=mutation["udf"], status=status, convex_status=mutation["status"], **tags)
+        for route, rollup in run.data.get("network", {}).items():
+            for key in ("requests", "transfer_bytes", "decoded_bytes", "uncached_repeats", "uncached_repeat_bytes"):
+                store.record(f"net_{key}", rollup[key], unit="bytes" if key.endswith("bytes") else "count", test=run.test.id, route=route, **tags)
+        for record in run.records:
+            # An expectation answered from a DOM snapshot never waited on the page; it has no timing
+            if record.status in ("pass", "fail") and not record.data.get("offline"):
+                batched = {"batched": True} if "batch" in record.data else {}
+                store.record("step", record.ms, test=run.test.id, step=record.index, op=record.op, status=record.status, **tags, **batched)
+
+
+def add_engine_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--only", help="comma-separated test ids, e.g. TC001,TC003")
+    parser.add_argument("--fail-fast", action=argparse.BooleanOptionalAction, default=True, help="run gate checks first and block their dependents (harness.depgraph)")
+    parser.add_argument("--parallel", type=int, default=1, help="tests run concurrently (one context each)")
+    parser.add_argument("--keep-sleeps", action="store_true", help="honour the scripts' fixed sleeps")
+    parser.add_argument("--action-timeout", type=float, default=5000, help="ms, for steps without their own timeout")
+    parser.add_argument("--expect-timeout", type=float, default=30000)
+    parser.add_argument("--batch-expects", action="store_true", help="check consecutive expectations in one script per poll and report all misses")
+    parser.add_argument("--snapshots", action="store_true", help="DOM snapshot after each step; expectations checked offline first (harness.snapshot)")
+    parser.add_argument("--regress", action="store_true", help="compare with the previous runs and fail on significant slowdowns (harness.regress)")
+    parser.add_argument("--regress-recent", type=int, default=1, help="latest runs pooled as the current sample, this one included")
+    parser.add_argument("--regress-window", type=int, default=20, help="runs before those that form the baseline")
+    parser.add_argument("--settle", action="store_true", help="after goto/click wait until Convex data and the DOM settle (harness.settle)")
+    parser.add_argument("--settle-quiet", type=float, default=QUIET_MS, help="ms without DOM changes that count as settled")
+    parser.add_argument("--timeouts", choices=("learned", "script"), default="learned", help="per-step budgets from the history (harness.timeouts) or the scripts' own")
+    parser.add_argument("--trace", action="store_true", help="save a Playwright trace per test to tmp/traces")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--profile", default="none", help="throttling profiles run in turn, plus TCxxx=<profile> overrides (see harness.throttle)")
+    parser.add_argument("--target", default="dev", help="dev, prod (vite build + preview) or both, run in turn (see harness.target)")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the prod target even when the build is up to date")
+    parser.add_argument("--warmup", action="store_true", help="compile every route on the dev server first (harness.warmup)")
+    parser.add_argument("--budgets", choices=("warn", "fail"), help="check every route visit against perf_budgets.json (harness.budgets)")
+    parser.add_argument("--memory", action="store_true", help="sample JS heap, DOM nodes, listeners and RSS after every step")
+    parser.add_argument("--memory-gc", action="store_true", help="force GC before each memory sample")
+    parser.add_argument("--network", action="store_true", help="log every response and roll it up per route (harness.network)")
+    parser.add_argument("--network-top", type=int, default=10, help="heaviest URLs kept per route")
+    parser.add_argument("--convex-ws", action="store_true", help="decode Convex sync frames: subscriptions, mutations, mutation-to-update latency")
+    parser.add_argument("--artefacts", default="", help="keep trace,screens,video from the last --artefact-window seconds of failing tests only")
+    parser.add_argument("--artefact-window", type=float, default=20.0, help="seconds of evidence kept before a failure")
+    parser.add_argument("--screens", action="store_true", help="screenshot every step and diff against baselines (harness.visual)")
+    parser.add_argument("--accept-screens", action="store_true", help="store this run's screenshots as the new baselines")
+
+
+def options_from(args: argparse.Namespace, step_timeouts: dict[str, float] | None = None) -> EngineOptions:
+    return EngineOptions(
+        keep_sleeps=args.keep_sleeps,
+        action_timeout=args.action_timeout,
+        expect_timeout=args.expect_timeout,
+        parallel=args.parallel,
+        trace=args.trace,
+        headless=not args.headed,
+        batch_expects=args.batch_expects,
+        step_timeouts=step_timeouts or {},
+        settle=args.settle,
+        settle_quiet_ms=args.settle_quiet,
+        fail_fast=args.fail_fast,
+    )
+
+
+def build_hooks(args: argparse.Namespace) -> list[Hook]:
+    hooks: list[Hook] = []
+    if args.memory or args.memory_gc:
+        from .memory import MemorySampler
+
+        hooks.append(MemorySampler(gc=args.memory_gc))
+    if args.network:
+        from .network import NetworkRecorder
+
+        hooks.append(NetworkRecorder(top=args.network_top))
+    if args.convex_ws:
+        from .convex_ws import ConvexFrameRecorder
+
+        hooks.append(ConvexFrameRecorder())
+    if args.screens or args.accept_screens:
+        from .visual import ScreenshotRecorder
+
+        hooks.append(ScreenshotRecorder(accept=args.accept_screens))
+    # After every hook that can fail a test in test_finished: the trace chunk is kept or dropped there
+    if args.artefacts:
+        from .artefacts import ArtefactKeeper
+
+        kinds = tuple(k.strip() for k in args.artefacts.split(",") if k.strip())
+        if "trace" in kinds and args.trace:
+            raise SystemExit("--trace records full traces; drop it when --artefacts includes trace")
+        hooks.append(ArtefactKeeper(kinds, args.artefact_window))
+    if args.snapshots:
+        from .snapshot import DomSnapshotter
+
+        hooks.append(DomSnapshotter())
+    return hooks
+
+
+def run_suite(
+    settings: Settings,
+    tests: list[CompiledTest],
+    args: argparse.Namespace,
+    hooks: list[Hook],
+    profile: str,
+    target: str = "dev",
+    step_timeouts: dict[str, float] | None = None,
+) -> tuple[list[TestRun], str]:
+    """Run ``tests`` once, print and store the results; returns the runs and the results run id."""
+    start = time.perf_counter()
+    runs = asyncio.run(Engine(settings, options_from(args, step_timeouts), hooks).run(tests))
+    elapsed = time.perf_counter() - start
+
+    print_runs(runs)
+    counts = {status: sum(r.status == status for r in runs) for status in ("pass", "fail", "error", "blocked")}
+    print(f"\n{len(runs)} tests in {elapsed:.1f}s [{target}, {profile}]: {counts}")
+    # Sleeps, settle waits and snapshot captures all add to step times, so each mode forms its own series
+    tags = {mode: True for mode in ("keep_sleeps", "settle", "snapshots") if getattr(args, mode)}
+    store = ResultsStore("engine", parallel=args.parallel, profile=profile, target=target, base_url=settings.base_url, **tags)
+    store.record("suite_wall", elapsed * 1000, tests=len(runs))
+    record_runs(store, runs)
+    path = store.write_report(
+        {
+            "elapsed_s": round(elapsed, 3),
+            "counts": counts,
+            "tests": [
+                {"id": r.test.id, "status": r.status, "ms": round(r.ms, 2), "error": r.error, "data": r.data, "steps": [s.__dict__ for s in r.records]}
+                for r in runs
+            ],
+        }
+    )
+    print(f"report: {path}")
+    return runs, store.run_id
+
+
+def learned_timeouts(tests: list[CompiledTest], args: argparse.Namespace, profile: str, target: str, per_test: dict[str, str]) -> dict[str, float]:
+    if args.timeouts != "learned":
+        return {}
+    rule = BudgetRule()
+    mode = {"parallel": args.parallel, "keep_sleeps": args.keep_sleeps, "settle": args.settle, "snapshots": args.snapshots}
+    budgets = learn(tests, profile, target, rule, args.action_timeout, args.expect_timeout, per_test, **mode)
+    if budgets:
+        save(budgets, profile, target, rule)
+        cut = sum(b["script"] - b["timeout"] for b in budgets.values())
+        print(f"timeouts: {len(budgets)} steps on learned budgets ({target}, {profile}), worst-case wait cut by {cut / 1000:.0f}s")
+    return {key: b["timeout"] for key, b in budgets.items()}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run compiled TC plans on one shared engine")
+    add_engine_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from .target import TargetError, parse_targets, print_side_by_side, target_settings
+    from .throttle import Throttler, parse_profiles
+
+    settings = load_settings()
+    tests = select(compile_plan(settings=settings), args.only)
+    profiles, per_test = parse_profiles(args.profile)
+    targets = parse_targets(args.target)
+    passed = True
+    timings: dict[str, dict[str, dict[str, list[float]]]] = {}
+    for target in targets:
+        try:
+            with target_settings(settings, target, rebuild=True if args.rebuild else None) as target_config:
+                if args.warmup and target == "dev":
+                    from .warmup import report, warm_up
+
+                    report(asyncio.run(warm_up(target_config)), ResultsStore("warmup"))
+                for profile in profiles:
+                    hooks = build_hooks(args)
+                    if profile.throttled or per_test:
+                        hooks.append(Throttler(profile, per_test))
+                    if args.budgets:
+                        from .budgets import BudgetMeter, load_budgets
+
+                        # Ahead of ArtefactKeeper, which needs the budget verdict when the test finishes
+                        hooks.insert(0, BudgetMeter(load_budgets(), profile.name, {k: p.name for k, p in per_test.items()}, args.budgets, target))
+                    budgets = learned_timeouts(tests, args, profile.name, target, {k: p.name for k, p in per_test.items()})
+                    runs, run_id = run_suite(target_config, tests, args, hooks, profile.name, target, budgets)
+                    passed = passed and all(r.status == "pass" for r in runs)
+                    if args.regress:
+                        from .regress import check_run
+
+                        findings = check_run("engine", run_id, args.regress_window, args.regress_recent, profile=profile.name, target=target)
+                        passed = passed and not any(f.verdict == "regression" for f in findings)
+                    by_test = timings.setdefault(profile.name, {}).setdefault(target, {})
+                    for run in runs:
+                        if run.status == "pass":
+                            by_test.setdefault(run.test.id, []).append(run.ms)
+        except TargetError as exc:
+            print(f"target {target}: {exc}")
+            passed = False
+    if len(targets) > 1:
+        for profile_name, by_target in timings.items():
+            print(f"\ndev vs prod [{profile_name}], median test time of passing runs:")
+            print_side_by_side(by_target)
+    if not passed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Streaming verification of exported Markdown (TC010 at scale).
+
+Exports are parsed incrementally, so a 10k-note export never has to be held
+in memory: the input may be one concatenated ``.md`` file (documents start
+with a ``---`` / ``title:`` frontmatter block) or a ``.zip`` with one file
+per note. Each note body is hashed line by line and compared with the
+hash of what the seed data should export to.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import zipfile
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class ExportedNote:
+    title: str | None
+    slug: str | None
+    body_sha256: str
+    bytes: int
+    lines: int
+
+
+@dataclass
+class _Draft:
+    meta: dict[str, str] = field(default_factory=dict)
+    digest: Any = field(default_factory=hashlib.sha256)
+    bytes: int = 0
+    lines: int = 0
+    pending_blank: int = 0
+    started_body: bool = False
+
+    def add_body_line(self, line: str) -> None:
+        # Blank lines are only committed once more content follows, so trailing
+        # whitespace never changes the hash (the exporter trims the body).
+        if not line.strip():
+            if self.started_body:
+                self.pending_blank += 1
+            return
+        self.digest.update(b"\n" * self.pending_blank)
+        if self.started_body:
+            self.digest.update(b"\n")
+        self.digest.update(line.encode())
+        self.pending_blank = 0
+        self.started_body = True
+        self.lines += 1
+
+    def finish(self) -> ExportedNote:
+        return ExportedNote(
+            title=self.meta.get("title"),
+            slug=self.meta.get("slug"),
+            body_sha256=self.digest.hexdigest(),
+            bytes=self.bytes,
+            lines=self.lines,
+        )
+
+
+class MarkdownExportParser:
+    """Feed bytes in any chunking; completed notes come back from :meth:`feed` and :meth:`close`."""
+
+    def __init__(self) -> None:
+        self._tail = b""
+        self._draft: _Draft | None = None
+        self._in_frontmatter = False
+        self._pending_rule = 0  # size of a '---' seen in a body; a new document only if 'title:' follows
+
+    def feed(self, chunk: bytes) -> list[ExportedNote]:
+        data = self._tail + chunk
+        *complete, self._tail = data.split(b"\n")
+        done: list[ExportedNote] = []
+        for raw in complete:
+            self._line(raw.decode("utf-8", errors="replace").rstrip("\r"), len(raw) + 1, done)
+        return done
+
+    def close(self) -> list[ExportedNote]:
+        done: list[ExportedNote] = []
+        if self._tail:
+            self._line(self._tail.decode("utf-8", errors="replace").rstrip("\r"), len(self._tail), done)
+            self._tail = b""
+        if self._pending_rule and self._draft:
+            self._draft.bytes += self._pending_rule
+            self._draft.add_body_line("---")
+        self._pending_rule = 0
+        if self._draft:
+            done.append(self._draft.finish())
+            self._draft = None
+        return done
+
+    def _line(self, line: str, size: int, done: list[ExportedNote]) -> None:
+        if self._draft is None:
+            if line.strip() == "---":
+                self._draft = _Draft(bytes=size)
+                self._in_frontmatter = True
+            elif line.strip():
+                # Export without frontmatter: the whole stream is one untitled note
+                self._draft = _Draft(bytes=size)
+                self._draft.add_body_line(line)
+            return
+
+        if self._in_frontmatter:
+            self._draft.bytes += size
+            if line.strip() == "---":
+                self._in_frontmatter = False
+            else:
+                key, _, value = line.partition(":")
+                self._draft.meta[key.strip()] = value.strip().strip('"')
+            return
+
+        if self._pending_rule:
+            rule_size, self._pending_rule = self._pending_rule, 0
+            if line.startswith("title:"):
+                done.append(self._draft.finish())
+                self._draft = _Draft(bytes=rule_size)
+                self._in_frontmatter = True
+                self._line(line, size, done)
+                return
+            self._draft.bytes += rule_size
+            self._draft.add_body_line("---")
+
+        if line.strip() == "---":
+            self._pending_rule = size
+            return
+        self._draft.bytes += size
+        self._draft.add_body_line(line)
+
+
+def _chunks(stream: Any) -> Iterator[bytes]:
+    while chunk := stream.read(CHUNK_SIZE):
+        yield chunk
+
+
+def iter_export(path: Path) -> Iterator[ExportedNote]:
+    """Parse an exported file (``.md`` or ``.zip``) from disk, chunk by chunk."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not member.filename.endswith(".md"):
+                    continue
+                parser = MarkdownExportParser()
+                with archive.open(member) as fh:
+                    for chunk in _chunks(fh):
+                        yield from parser.feed(chunk)
+                for note in parser.close():
+                    note.slug = note.slug or Path(member.filename).stem
+                    yield note
+        return
+    parser = MarkdownExportParser()
+    with path.open("rb") as fh:
+        for chunk in _chunks(fh):
+            yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def iter_documents(documents: Iterable[str]) -> Iterator[ExportedNote]:
+    """Parse already-separated documents (one export per note) with the same parser."""
+    for document in documents:
+        parser = MarkdownExportParser()
+        data = document.encode()
+        for start in range(0, len(data), CHUNK_SIZE):
+            yield from parser.feed(data[start : start + CHUNK_SIZE])
+        yield from parser.close()
+
+
+def body_sha256(markdown: str) -> str:
+    """Hash ``markdown`` the way :class:`MarkdownExportParser` hashes a note body."""
+    draft = _Draft()
+    for line in markdown.split("\n"):
+        draft.add_body_line(line)
+    return draft.digest.hexdigest()
+
+
+@dataclass
+class Verification:
+    matched: int = 0
+    bytes: int = 0
+    mismatched: list[str] = field(default_factory=list)
+    unexpected: int = 0
+    missing: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.mismatched or self.missing)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "matched": self.matched,
+            "bytes": self.bytes,
+            "mismatched": self.mismatched[:50],
+            "missing": self.missing[:50],
+            "unexpected": self.unexpected,
+        }
+
+
+def verify(notes: Iterable[ExportedNote], expected: dict[str, str]) -> Verification:
+    """Compare exported notes with ``{title: body_sha256}`` from the seed data.
+
+    Notes whose title is not in ``expected`` (pre-existing data) are counted
+    as unexpected but do not fail the verification.
+    """
+    result = Verification()
+    seen: set[str] = set()
+    for note in notes:
+        result.bytes += note.bytes
+        title = note.title or ""
+        if title not in expected:
+            result.unexpected += 1
+            continue
+        seen.add(title)
+        if note.body_sha256 == expected[title]:
+            result.matched += 1
+        else:
+            result.mismatched.append(title)
+    result.missing = sorted(set(expected) - seen)
+    return result
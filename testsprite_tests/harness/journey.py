@@ -0,0 +1,179 @@
+"""Journey benchmarks: the TC flows as repeatable scenarios with per-phase percentiles.
+
+A scenario is a compiled TC (see :mod:`harness.plan`), e.g. TC006 = landing
+→ login → inbox → select highlight → generate flashcards. The runner does
+``--warmup`` untimed iterations, then ``--repeat`` timed ones, on one
+browser:
+
+- ``--contexts fresh``  a new context per iteration (cold cache, no session)
+- ``--contexts reuse``  one context for all iterations (warm HTTP cache);
+  cookies are cleared between iterations unless ``--keep-session`` is given,
+  because the flows log in through the UI
+
+Each iteration is split into *phases* by the page route the steps end on
+(``/``, ``/login``, ``/w/{slug}/inbox``...). A step that navigates counts
+towards the page it lands on, and a route visited twice gets a ``#2``
+suffix. The output gives min/median/p95/max per phase and for the whole
+journey, as JSON. It also goes into the history (``suite=journey``, tagged
+by scenario, phase, contexts, sleep and settle mode and commit), so ``harness.regress --suite
+journey`` and ``--compare`` answer "is it faster?".
+
+    python -m harness.journey TC006 --warmup 2 --repeat 10
+    python -m harness.journey TC013 --contexts reuse --repeat 20 --compare tmp/results/journey-<old>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from .config import load_settings
+from .engine import Engine, EngineOptions, Hook, StepRecord, TestRun, select
+from .plan import CompiledTest, Step, compile_plan
+from .results import ResultsStore
+from .routes import route_template
+from .stats import summarize
+from .throttle import Profile, Throttler
+
+
+class PhaseTracker(Hook):
+    """Tags every executed step with the route template of the page it ended on."""
+
+    async def step_finished(self, run: TestRun, step: Step, record: StepRecord) -> None:
+        if record.status in ("pass", "fail"):
+            record.data["route"] = route_template(urlsplit(run.page.url).path or "/")
+
+
+def phases(run: TestRun) -> dict[str, float]:
+    """Executed step time summed per consecutive route segment, in journey order."""
+    totals: dict[str, float] = {}
+    visits: dict[str, int] = {}
+    current = None
+    for record in run.records:
+        route = record.data.get("route")
+        if route is None:
+            continue
+        if route != current:
+            visits[route] = visits.get(route, 0) + 1
+            current = route
+        name = route if visits[route] == 1 else f"{route}#{visits[route]}"
+        totals[name] = totals.get(name, 0.0) + record.ms
+    return totals
+
+
+async def bench(engine: Engine, test: CompiledTest, warmup: int, repeat: int, keep_session: bool) -> list[TestRun]:
+    runs = []
+    async with engine.open():
+        for iteration in range(warmup + repeat):
+            if engine.shared is not None and not keep_session:
+                await engine.shared.clear_cookies()
+            run = await engine.run_test(test)
+            run.data["warmup"] = iteration < warmup
+            runs.append(run)
+            kind = "warm-up" if iteration < warmup else f"{iteration - warmup + 1}/{repeat}"
+            print(f"  {test.id} {kind:<8} {run.status:<5} {run.ms:8.0f}ms" + (f"  {run.error}" if run.error else ""))
+    return runs
+
+
+def summarize_runs(runs: list[TestRun]) -> dict[str, Any]:
+    timed = [r for r in runs if not r.data.get("warmup")]
+    passed = [r for r in timed if r.status == "pass"]
+    per_phase: dict[str, list[float]] = {}
+    for run in passed:
+        for name, ms in phases(run).items():
+            per_phase.setdefault(name, []).append(ms)
+    return {
+        "iterations": len(timed),
+        "passed": len(passed),
+        "total": summarize(r.ms for r in passed),
+        "phases": {name: summarize(values) for name, values in per_phase.items()},
+        "samples": {"total": [round(r.ms, 1) for r in passed], **{name: [round(v, 1) for v in values] for name, values in per_phase.items()}},
+        "failures": [r.error for r in timed if r.status != "pass"],
+    }
+
+
+def compare(previous: dict[str, Any], current: dict[str, Any]) -> None:
+    """Per-phase median change against an earlier journey report, with a one-sided Mann-Whitney p."""
+    from .regress import mann_whitney_greater
+
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    print(f"\nvs {previous.get('run')} ({previous.get('commit')}):")
+    for name, samples in current["samples"].items():
+        before = previous.get("samples", {}).get(name)
+        if not before or not samples:
+            continue
+        x, y = np.asarray(samples), np.asarray(before)
+        old, new = float(np.median(y)), float(np.median(x))
+        slower = mann_whitney_greater(x, y, rng)
+        faster = mann_whitney_greater(-x, -y, rng)
+        verdict = "slower" if slower < 0.05 else "faster" if faster < 0.05 else "no significant change"
+        print(f"  {name:<28} {old:8.0f} → {new:8.0f}ms  {new / old - 1:+6.1%}  {verdict} (p={min(slower, faster):.3f})")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark TC flows as journeys: warm-up, repetitions, per-phase percentiles")
+    parser.add_argument("scenarios", help="comma-separated test ids, e.g. TC006 or TC005,TC013")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed iterations first")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--contexts", choices=("fresh", "reuse"), default="fresh")
+    parser.add_argument("--keep-session", action="store_true", help="with --contexts reuse, keep cookies between iterations")
+    parser.add_argument("--profile", default="none", help="throttling profile (see harness.throttle)")
+    parser.add_argument("--keep-sleeps", action="store_true")
+    parser.add_argument("--settle", action="store_true", help="after goto/click wait for Convex data to settle (harness.settle)")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--compare", type=Path, help="earlier journey report to compare medians with")
+    args = parser.parse_args(argv)
+    if args.keep_session and args.contexts != "reuse":
+        parser.error("--keep-session needs --contexts reuse; a fresh context never has a session to keep")
+
+    settings = load_settings()
+    tests = select(compile_plan(settings=settings), args.scenarios)
+    if not tests:
+        raise SystemExit(f"no compiled test matches {args.scenarios}")
+    profile = Profile.parse(args.profile)
+    options = EngineOptions(keep_sleeps=args.keep_sleeps, headless=not args.headed, reuse_context=args.contexts == "reuse", settle=args.settle)
+    hooks: list[Hook] = [PhaseTracker()]
+    if profile.throttled:
+        hooks.append(Throttler(profile))
+
+    # Fixed sleeps and settle waits are part of the measured time, so each mode forms its own series
+    tags = {mode: True for mode in ("keep_sleeps", "settle") if getattr(args, mode)}
+    store = ResultsStore("journey", contexts=args.contexts, profile=profile.name, **tags)
+    results = {}
+    for test in tests:
+        print(f"{test.id} {test.title}: {args.warmup} warm-up + {args.repeat} timed, {args.contexts} contexts")
+        runs = asyncio.run(bench(Engine(settings, options, hooks), test, args.warmup, args.repeat, args.keep_session))
+        summary = summarize_runs(runs)
+        results[test.id] = summary
+        total = summary["total"]
+        if total["count"]:
+            print(f"{test.id} total  min {total['min']:.0f}  median {total['median']:.0f}  p95 {total['p95']:.0f}  max {total['max']:.0f} ms")
+        for name, stats in summary["phases"].items():
+            print(f"  {name:<28} min {stats['min']:7.0f}  median {stats['median']:7.0f}  p95 {stats['p95']:7.0f}  max {stats['max']:7.0f}")
+        for value in summary["samples"]["total"]:
+            store.record("journey", value, test=test.id)
+        for name, values in summary["samples"].items():
+            if name != "total":
+                for value in values:
+                    store.record("phase", value, test=test.id, phase=name)
+
+    report = {"warmup": args.warmup, "repeat": args.repeat, "scenarios": results}
+    path = store.write_report(report)
+    print(f"report: {path}")
+    if args.compare:
+        previous = json.loads(args.compare.read_text(encoding="utf-8"))
+        for test_id, summary in results.items():
+            if test_id in previous.get("scenarios", {}):
+                compare({**previous, **previous["scenarios"][test_id]}, summary)
+    if any(s["passed"] < s["iterations"] for s in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
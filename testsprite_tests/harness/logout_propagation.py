@@ -0,0 +1,268 @@
+"""Multi-tab logout propagation latency (TC016 across tabs).
+
+Opens N authenticated tabs on a throwaway session, logs out in the first one
+and timestamps how each other tab reacts:
+
+- ``redirect``  the tab navigates off the protected route (e.g. to ``/login``)
+- ``cleared``   the data selector (sidebar by default) disappears from the page
+- ``convex``    a Convex subscription is rejected (``QueryFailed``/auth error frame)
+
+Latency is measured from the moment the logout request is sent, on the
+page clock (``performance.timeOrigin + performance.now()``). Redirects are
+seen from Python (``framenavigated``) and converted to the page clock with an
+offset measured per tab before the logout. A tab whose
+URL is still protected and whose data selector is still visible at the end of
+the observation window *keeps showing data* and fails the run.
+
+    python -m harness.logout_propagation --tabs 8 --mode tabs --runs 3
+
+``--mode tabs`` shares one browser context (one cookie jar, like tabs in one
+window); ``--mode contexts`` gives every tab its own context with a copy of the
+same session cookies (like separate browsers on a shared workstation). Each run
+logs in once; the login rate limit is 5/min per client.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlsplit
+
+from playwright.async_api import Browser, BrowserContext, Error as PlaywrightError, Page, async_playwright
+
+from .config import Settings, load_settings
+from .results import ResultsStore
+from .routes import load_public_rules
+from .session import AuthSession, api_login, launch_browser, new_context
+from .stats import summarize
+
+DEFAULT_SECTIONS = ["inbox", "flashcards", "settings", "tags"]
+DEFAULT_DATA_SELECTOR = "aside nav"
+PAGE_CLOCK = "() => performance.timeOrigin + performance.now()"
+
+# Reports reactions back to Python with browser-side epoch timestamps; re-installed on every navigation
+PROBE_SCRIPT = """
+(selector) => {
+  const mark = (kind, detail) =>
+    window.__logoutMark(kind, String(detail ?? '').slice(0, 200), performance.timeOrigin + performance.now());
+  const Native = window.WebSocket;
+  window.WebSocket = class extends Native {
+    constructor(...args) {
+      super(...args);
+      this.addEventListener('message', (event) => {
+        if (typeof event.data === 'string' && /QueryFailed|AuthError|[Uu]nauthenticated|[Ss]ession (expired|not found|invalid)/.test(event.data)) {
+          mark('convex', event.data);
+        }
+      });
+    }
+  };
+  let seen = false;
+  const check = () => {
+    const present = !!document.querySelector(selector);
+    if (present && !seen) mark('shown', selector);
+    if (!present && seen) mark('cleared', selector);
+    seen = present;
+  };
+  document.addEventListener('DOMContentLoaded', () => {
+    check();
+    new MutationObserver(check).observe(document.documentElement, { childList: true, subtree: true });
+  });
+}
+"""
+
+LOGOUT_SCRIPT = """
+async (csrf) => {
+  const sent = performance.timeOrigin + performance.now();
+  const response = await fetch('/logout', { method: 'POST', headers: { 'X-CSRF-Token': csrf }, credentials: 'include' });
+  return { sent, status: response.status, done: performance.timeOrigin + performance.now() };
+}
+"""
+
+
+def _path(url: str) -> str:
+    return urlsplit(url).path or "/"
+
+
+@dataclass
+class Tab:
+    index: int
+    path: str
+    page: Page | None = None
+    events: list[tuple[str, str, float]] = field(default_factory=list)
+    still_showing: bool = False
+    final_url: str = ""
+    offset: float = 0.0  # page clock minus time.time(), in ms
+
+    async def measure_offset(self) -> None:
+        """Map Python's wall clock onto the page clock, from the midpoint of one round-trip."""
+        before = time.time() * 1000
+        page_now = await self.page.evaluate(PAGE_CLOCK)
+        after = time.time() * 1000
+        self.offset = page_now - (before + after) / 2
+
+    def first(self, since: float, kinds: tuple[str, ...] = ("redirect", "cleared", "convex")) -> tuple[str, float] | None:
+        hits = [(t, kind) for kind, _, t in self.events if kind in kinds and t >= since]
+        if not hits:
+            return None
+        t, kind = min(hits)
+        return kind, t - since
+
+
+@dataclass
+class RunResult:
+    run: int
+    logout_status: int
+    logout_ms: float
+    tabs: list[Tab]
+    sent_at: float
+
+    def reactions(self) -> dict[str, float | None]:
+        return {f"tab{t.index}": (r[1] if (r := t.first(self.sent_at)) else None) for t in self.tabs[1:]}
+
+
+async def instrument(context: BrowserContext, tabs_by_page: dict[Page, Tab], selector: str) -> None:
+    def on_mark(source: dict[str, Any], kind: str, detail: str, t: float) -> None:
+        tab = tabs_by_page.get(source["page"])
+        if tab is not None:
+            tab.events.append((kind, detail, t))
+
+    await context.expose_binding("__logoutMark", on_mark)
+    await context.add_init_script(f"({PROBE_SCRIPT})({json.dumps(selector)})")
+
+
+async def open_tabs(browser: Browser, settings: Settings, session: AuthSession, args: argparse.Namespace) -> tuple[list[Tab], list[BrowserContext]]:
+    sections = args.sections.split(",")
+    tabs = [Tab(i, session.route(sections[i % len(sections)])) for i in range(args.tabs)]
+    tabs_by_page: dict[Page, Tab] = {}
+    contexts: list[BrowserContext] = []
+    rules = load_public_rules()
+
+    async def context_for() -> BrowserContext:
+        if args.mode == "contexts" or not contexts:
+            context = await new_context(browser, settings, session)
+            await instrument(context, tabs_by_page, args.data_selector)
+            contexts.append(context)
+        return contexts[-1]
+
+    for tab in tabs:
+        context = await context_for()
+        tab.page = await context.new_page()
+        tabs_by_page[tab.page] = tab
+
+        def on_navigate(frame: Any, tab: Tab = tab) -> None:
+            if frame.parent_frame is None and rules.is_public(_path(frame.url)):
+                tab.events.append(("redirect", _path(frame.url), time.time() * 1000 + tab.offset))
+
+        tab.page.on("framenavigated", on_navigate)
+
+    await asyncio.gather(*(t.page.goto(t.path, wait_until="domcontentloaded") for t in tabs))
+    await asyncio.gather(*(t.page.locator(args.data_selector).first.wait_for(state="visible", timeout=args.load_timeout) for t in tabs))
+    for tab in tabs:
+        await tab.measure_offset()
+    return tabs, contexts
+
+
+async def run_once(pw: Any, browser: Browser, settings: Settings, run: int, args: argparse.Namespace) -> RunResult:
+    session = await api_login(pw, settings, use_cache=False)
+    tabs, contexts = await open_tabs(browser, settings, session, args)
+    try:
+        outcome = await tabs[0].page.evaluate(LOGOUT_SCRIPT, session.csrf_token or "")
+        await tabs[0].page.goto("/login", wait_until="commit")
+        await asyncio.sleep(args.observe)
+        rules = load_public_rules()
+        for tab in tabs[1:]:
+            tab.final_url = tab.page.url
+            try:
+                visible = await tab.page.locator(args.data_selector).first.is_visible()
+            except PlaywrightError:
+                visible = False
+            tab.still_showing = visible and not rules.is_public(_path(tab.final_url))
+            if tab.still_showing and args.reload_stale:
+                await tab.page.reload(wait_until="domcontentloaded")
+                tab.final_url = tab.page.url
+    finally:
+        for context in contexts:
+            await context.close()
+    return RunResult(run, outcome["status"], outcome["done"] - outcome["sent"], tabs, outcome["sent"])
+
+
+async def run_all(args: argparse.Namespace) -> list[RunResult]:
+    settings = load_settings()
+    async with async_playwright() as pw:
+        browser = await launch_browser(pw)
+        try:
+            return [await run_once(pw, browser, settings, run, args) for run in range(args.runs)]
+        finally:
+            await browser.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Multi-tab logout propagation latency")
+    parser.add_argument("--tabs", type=int, default=4, help="tabs including the one that logs out")
+    parser.add_argument("--mode", choices=("tabs", "contexts"), default="tabs")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--sections", default=",".join(DEFAULT_SECTIONS), help="workspace sections the tabs cycle through")
+    parser.add_argument("--data-selector", default=DEFAULT_DATA_SELECTOR, help="element that only renders with session data")
+    parser.add_argument("--observe", type=float, default=10.0, help="seconds to watch the other tabs after logout")
+    parser.add_argument("--load-timeout", type=float, default=15000, help="ms for each tab to show the data selector")
+    parser.add_argument("--reload-stale", action="store_true", help="reload tabs still showing data and record where they land")
+    args = parser.parse_args(argv)
+    if args.tabs < 2:
+        parser.error("--tabs must be at least 2")
+
+    results = asyncio.run(run_all(args))
+    store = ResultsStore("logout_propagation", mode=args.mode, tabs=args.tabs)
+    latencies: list[float] = []
+    by_kind: dict[str, list[float]] = {}
+    stale: list[dict[str, Any]] = []
+    for result in results:
+        store.record("logout_request", result.logout_ms, run=result.run, status=result.logout_status)
+        for tab in result.tabs[1:]:
+            for kind in ("redirect", "cleared", "convex"):
+                hit = tab.first(result.sent_at, (kind,))
+                if hit:
+                    by_kind.setdefault(kind, []).append(hit[1])
+            reaction = tab.first(result.sent_at)
+            if reaction:
+                latencies.append(reaction[1])
+                store.record("propagation", reaction[1], run=result.run, tab=tab.index, path=tab.path, reaction=reaction[0])
+            if tab.still_showing:
+                stale.append({"run": result.run, "tab": tab.index, "path": tab.path, "final_url": tab.final_url, "reaction": reaction and reaction[0]})
+        print(f"run {result.run}: logout HTTP {result.logout_status} in {result.logout_ms:.0f} ms; " + ", ".join(
+            f"{name}={'—' if ms is None else f'{ms:.0f}ms'}" for name, ms in result.reactions().items()
+        ))
+
+    observed = sum(len(r.tabs) - 1 for r in results)
+    print(f"\nfirst reaction (ms): {summarize(latencies)}")
+    for kind, values in sorted(by_kind.items()):
+        print(f"  {kind:<8} {summarize(values)}")
+    print(f"{observed - len(latencies)}/{observed} tabs never reacted within {args.observe:.0f}s")
+    for entry in stale:
+        print(f"  still showing data: run {entry['run']} tab {entry['tab']} {entry['path']} → {entry['final_url']}")
+
+    path = store.write_report(
+        {
+            "mode": args.mode,
+            "tabs": args.tabs,
+            "observe_s": args.observe,
+            "first_reaction_ms": summarize(latencies),
+            "by_reaction_ms": {kind: summarize(values) for kind, values in by_kind.items()},
+            "unreacted": observed - len(latencies),
+            "still_showing": stale,
+            "runs": [
+                {"run": r.run, "logout_status": r.logout_status, "logout_ms": round(r.logout_ms, 2), "reactions": r.reactions()}
+                for r in results
+            ],
+        }
+    )
+    print(f"report: {path}")
+    if stale or any(r.logout_status >= 400 for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Per-step browser memory sampling over CDP (an :class:`engine.Hook`).
+
+After every executed step the sampler reads ``Performance.getMetrics`` for
+the test's current page (JS heap used/total, DOM nodes, event listeners,
+documents) and the resident set size of the browser and runner processes
+from ``/proc``. Samples go into ``StepRecord.data["memory"]``, so they
+appear in the engine's step timeline.
+
+A test *grows* when a metric rises after every navigation (``goto``) and
+ends at least ``growth_threshold`` above its first post-navigation value;
+those series land in ``TestRun.data["memory_growth"]``. With ``gc=True``
+the sampler forces a garbage collection before reading, which makes heap
+growth mean retained memory rather than garbage not yet collected.
+
+    python -m harness.engine --memory --memory-gc --parallel 4
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+
+from playwright.async_api import CDPSession, Error as PlaywrightError, Page
+
+from .engine import Engine, Hook, StepRecord, TestRun
+from .plan import Step
+from .stats import summarize
+
+METRICS = {
+    "JSHeapUsedSize": "js_heap_used",
+    "JSHeapTotalSize": "js_heap_total",
+    "Nodes": "nodes",
+    "JSEventListeners": "listeners",
+    "Documents": "documents",
+}
+GROWTH_METRICS = ("js_heap_used", "nodes", "listeners")
+BROWSER_NAMES = ("chrome", "chromium", "headless_shell")
+
+
+def _proc_tree(root: int) -> dict[int, tuple[str, int]]:
+    """``pid -> (command line, RSS bytes)`` for ``root`` and its descendants (Linux only)."""
+    proc = Path("/proc")
+    if not proc.exists():
+        return {}
+    parents: dict[int, int] = {}
+    for entry in proc.iterdir():
+        if entry.name.isdigit():
+            try:
+                stat = (entry / "stat").read_text()
+            except OSError:
+                continue
+            parents[int(entry.name)] = int(stat.rsplit(")", 1)[1].split()[1])
+    tree, frontier = {root}, [root]
+    while frontier:
+        pid = frontier.pop()
+        children = [child for child, parent in parents.items() if parent == pid]
+        tree.update(children)
+        frontier.extend(children)
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    result: dict[int, tuple[str, int]] = {}
+    for pid in tree:
+        try:
+            cmdline = (proc / str(pid) / "cmdline").read_bytes().replace(b"\0", b" ").decode(errors="replace")
+            rss_pages = int((proc / str(pid) / "statm").read_text().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        result[pid] = (cmdline, rss_pages * page_size)
+    return result
+
+
+def process_rss() -> dict[str, int | None]:
+    """RSS of the browser processes and of the runner (Python + Playwright driver)."""
+    tree = _proc_tree(os.getpid())
+    if not tree:
+        return {"browser_rss": None, "runner_rss": None}
+    browser = sum(rss for cmd, rss in tree.values() if any(name in cmd for name in BROWSER_NAMES))
+    return {"browser_rss": browser, "runner_rss": sum(rss for _, rss in tree.values()) - browser}
+
+
+def available_memory() -> int | None:
+    try:
+        for line in Path("/proc/meminfo").read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def growth(series: list[float], threshold: float) -> bool:
+    """Non-decreasing across every sample and ending ``threshold`` (fraction) above the start."""
+    if len(series) < 3 or series[0] <= 0:
+        return False
+    rising = all(b >= a for a, b in zip(series, series[1:]))
+    return rising and (series[-1] - series[0]) / series[0] >= threshold
+
+
+class MemorySampler(Hook):
+    def __init__(self, gc: bool = False, growth_threshold: float = 0.1) -> None:
+        self.gc = gc
+        self.growth_threshold = growth_threshold
+        self.sessions: dict[Page, CDPSession] = {}
+        self.baseline: dict[str, int | None] = {}
+        self.peak_browser_rss = 0
+        self.parallel = 1
+
+    async def engine_started(self, engine: Engine) -> None:
+        self.baseline = process_rss()
+        self.parallel = engine.options.parallel
+
+    async def session(self, run: TestRun) -> CDPSession:
+        page = run.page
+        if page not in self.sessions:
+            cdp = await run.context.new_cdp_session(page)
+            await cdp.send("Performance.enable")
+            self.sessions[page] = cdp
+        return self.sessions[page]
+
+    async def sample(self, run: TestRun) -> dict[str, Any]:
+        cdp = await self.session(run)
+        if self.gc:
+            await cdp.send("HeapProfiler.collectGarbage")
+        metrics = {m["name"]: m["value"] for m in (await cdp.send("Performance.getMetrics"))["metrics"]}
+        sample: dict[str, Any] = {key: metrics.get(name) for name, key in METRICS.items()}
+        sample.update(process_rss())
+        if sample["browser_rss"]:
+            self.peak_browser_rss = max(self.peak_browser_rss, sample["browser_rss"])
+        return sample
+
+    async def step_finished(self, run: TestRun, step: Step, record: StepRecord) -> None:
+        if record.status not in ("pass", "fail"):
+            return
+        try:
+            record.data["memory"] = await self.sample(run)
+        except PlaywrightError as exc:
+            record.data["memory"] = {"error": str(exc).splitlines()[0][:120]}
+
+    async def test_finished(self, run: TestRun) -> None:
+        samples = [(r, r.data["memory"]) for r in run.records if "memory" in r.data and "error" not in r.data["memory"]]
+        after_navigation = [m for r, m in samples if r.op == "goto"]
+        flagged = {}
+        for key in GROWTH_METRICS:
+            series = [m[key] for m in after_navigation if m.get(key) is not None]
+            if growth(series, self.growth_threshold):
+                flagged[key] = series
+        run.data["memory_peak"] = {
+            key: max((m[key] for _, m in samples if m.get(key) is not None), default=None) for key in (*METRICS.values(), "browser_rss")
+        }
+        if flagged:
+            run.data["memory_growth"] = flagged
+        for page in [p for p in self.sessions if p.context == run.context]:
+            del self.sessions[page]
+
+    async def engine_finished(self, engine: Engine, runs: list[TestRun]) -> None:
+        grown = [r for r in runs if r.data.get("memory_growth")]
+        heap = [r.data["memory_peak"]["js_heap_used"] for r in runs if r.data.get("memory_peak", {}).get("js_heap_used")]
+        print(f"memory: peak JS heap per test (MB) {summarize(h / 2**20 for h in heap)}")
+        base = self.baseline.get("browser_rss") or 0
+        available = available_memory()
+        if self.peak_browser_rss and available:
+            per_worker = max(self.peak_browser_rss - base, 1) / max(self.parallel, 1)
+            print(
+                f"memory: browser RSS peak {self.peak_browser_rss / 2**20:.0f} MB at --parallel {self.parallel}, "
+                f"~{per_worker / 2**20:.0f} MB per worker; ~{int(available / per_worker)} more fit in "
+                f"{available / 2**20:.0f} MB available"
+            )
+        for run in grown:
+            series = ", ".join(f"{k}: {v[0]:.0f}→{v[-1]:.0f}" for k, v in run.data["memory_growth"].items())
+            print(f"memory: {run.test.id} grows across {len(next(iter(run.data['memory_growth'].values())))} navigations ({series})")
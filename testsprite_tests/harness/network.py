@@ -0,0 +1,248 @@
+"""Per-route network accounting: every response of every test, rolled up by route.
+
+The :class:`NetworkRecorder` hook follows each page's ``Network`` domain over
+CDP and logs every request with its URL, resource type, status, transfer
+size (bytes on the wire, headers included), decoded body size, cache status
+(``network``, ``revalidated`` for 304, ``memory``, ``disk``, ``prefetch``,
+``service-worker``) and timing (total and time to first byte). A request
+belongs to the route template the page was on when it was sent; a document
+request belongs to the route it loads.
+
+Per test and route the log is rolled up into:
+
+- request count, transferred and decoded bytes, per resource type
+- requests served from a cache
+- *duplicates*: URLs requested more than once on the route
+- *uncached repeats*: scripts, styles, images and fonts fetched over the
+  network again although the test had already downloaded them, and the
+  bytes that cost
+- the ``--network-top`` heaviest URLs by transferred bytes
+
+The roll-ups go into each test's ``data.network`` in the engine report and
+into the history as ``net_*`` metrics tagged by route. The raw log of the
+latest run of each test is kept in ``tmp/network/<test>.jsonl``. WebSocket
+frames are not responses and are left out.
+
+    python -m harness.engine --network --only TC004,TC005,TC013
+    python -m harness.network tmp/results/engine-<run>.json --route /
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from playwright.async_api import CDPSession, Error as PlaywrightError, Page
+
+from .config import TMP_DIR
+from .engine import Engine, Hook, StepRecord, TestRun
+from .plan import Step
+from .routes import route_template
+
+NETWORK_DIR = TMP_DIR / "network"
+STATIC_TYPES = {"Script", "Stylesheet", "Image", "Font", "Media", "Manifest"}  # a repeat of these should come from a cache
+
+
+def _route_of(url: str) -> str:
+    return route_template(urlsplit(url).path or "/")
+
+
+def _cache_status(response: dict[str, Any], served_from_cache: bool) -> str:
+    if served_from_cache:
+        return "memory"
+    if response.get("fromServiceWorker"):
+        return "service-worker"
+    if response.get("fromPrefetchCache"):
+        return "prefetch"
+    if response.get("fromDiskCache"):
+        return "disk"
+    return "revalidated" if response.get("status") == 304 else "network"
+
+
+class NetworkRecorder(Hook):
+    def __init__(self, top: int = 10) -> None:
+        self.top = top
+        self.sessions: dict[Page, CDPSession] = {}
+        self.logs: dict[str, dict[str, dict[str, Any]]] = {}  # test id -> "<page>:<request id>" -> entry
+        self.rollups: dict[str, list[dict[str, Any]]] = defaultdict(list)  # route -> per-test roll-ups
+
+    async def ensure(self, run: TestRun) -> None:
+        page = run.page
+        if page in self.sessions:
+            return
+        log = self.logs[run.test.id]
+        prefix = f"{id(page):x}:"
+        served: set[str] = set()
+
+        def sent(event: dict[str, Any]) -> None:
+            url = event["request"]["url"]
+            if not url.startswith("http"):
+                return
+            route = _route_of(url) if event.get("type") == "Document" else _route_of(page.url)
+            # Redirects reuse the request id; the final hop is the one accounted
+            log[prefix + event["requestId"]] = {
+                "url": url,
+                "type": event.get("type", "Other"),
+                "route": route,
+                "status": None,
+                "cache": "network",
+                "transfer": 0,
+                "decoded": 0,
+                "ms": None,
+                "ttfb_ms": None,
+                "started": event["timestamp"],
+            }
+
+        def received(event: dict[str, Any]) -> None:
+            entry = log.get(prefix + event["requestId"])
+            if entry is None:
+                return
+            response = event["response"]
+            entry["status"] = response.get("status")
+            entry["cache"] = _cache_status(response, event["requestId"] in served)
+            timing = response.get("timing")
+            if timing and timing.get("receiveHeadersEnd", -1) >= 0:
+                entry["ttfb_ms"] = round(timing["receiveHeadersEnd"], 1)
+
+        def data(event: dict[str, Any]) -> None:
+            entry = log.get(prefix + event["requestId"])
+            if entry is not None:
+                entry["decoded"] += event.get("dataLength", 0)
+
+        def finished(event: dict[str, Any]) -> None:
+            entry = log.get(prefix + event["requestId"])
+            if entry is not None:
+                entry["transfer"] = int(event.get("encodedDataLength", 0))
+                entry["ms"] = round((event["timestamp"] - entry["started"]) * 1000, 1)
+
+        def failed(event: dict[str, Any]) -> None:
+            entry = log.get(prefix + event["requestId"])
+            if entry is not None:
+                entry["status"] = "failed"
+                entry["error"] = event.get("errorText", "")
+
+        try:
+            cdp = await run.context.new_cdp_session(page)
+            cdp.on("Network.requestWillBeSent", sent)
+            cdp.on("Network.requestServedFromCache", lambda event: served.add(event["requestId"]))
+            cdp.on("Network.responseReceived", received)
+            cdp.on("Network.dataReceived", data)
+            cdp.on("Network.loadingFinished", finished)
+            cdp.on("Network.loadingFailed", failed)
+            await cdp.send("Network.enable")
+        except PlaywrightError as exc:
+            run.data["network_error"] = str(exc).splitlines()[0][:120]
+            return
+        self.sessions[page] = cdp
+
+    async def test_started(self, run: TestRun) -> None:
+        self.logs[run.test.id] = {}
+        await self.ensure(run)
+
+    async def step_started(self, run: TestRun, step: Step, record: StepRecord) -> None:
+        # Pages opened by a click (new tabs) are followed from their first step on
+        await self.ensure(run)
+
+    async def test_finished(self, run: TestRun) -> None:
+        entries = list(self.logs.pop(run.test.id, {}).values())
+        for page in [p for p in self.sessions if p.context == run.context]:
+            del self.sessions[page]
+        for entry in entries:
+            entry.pop("started")
+        NETWORK_DIR.mkdir(parents=True, exist_ok=True)
+        with (NETWORK_DIR / f"{run.test.id}.jsonl").open("w", encoding="utf-8") as fh:
+            fh.writelines(json.dumps(entry) + "\n" for entry in entries)
+        run.data["network"] = account(entries, self.top)
+        for route, rollup in run.data["network"].items():
+            self.rollups[route].append({"test": run.test.id, **rollup})
+
+    async def engine_finished(self, engine: Engine, runs: list[TestRun]) -> None:
+        print(f"network: {sum(r['requests'] for rs in self.rollups.values() for r in rs)} requests over {len(self.rollups)} routes")
+        heaviest = sorted(self.rollups.items(), key=lambda item: -max(r["transfer_bytes"] for r in item[1]))
+        for route, rollups in heaviest[:10]:
+            print_rollup(route, max(rollups, key=lambda r: r["transfer_bytes"]), limit=3)
+
+
+def account(entries: list[dict[str, Any]], top: int = 10) -> dict[str, dict[str, Any]]:
+    """Per-route roll-up of one test's request log, in the order the routes were first seen."""
+    by_route: dict[str, list[dict[str, Any]]] = {}
+    downloaded: set[str] = set()
+    repeats: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for entry in entries:
+        by_route.setdefault(entry["route"], []).append(entry)
+        if entry["type"] in STATIC_TYPES and entry["cache"] == "network" and entry["status"] not in (None, "failed"):
+            if entry["url"] in downloaded:
+                repeats[entry["route"]].append(entry)
+            downloaded.add(entry["url"])
+
+    rollups = {}
+    for route, items in by_route.items():
+        per_url: dict[str, dict[str, Any]] = {}
+        by_type: dict[str, dict[str, int]] = {}
+        for entry in items:
+            url = per_url.setdefault(entry["url"], {"url": entry["url"], "type": entry["type"], "count": 0, "transfer": 0, "decoded": 0})
+            url["count"] += 1
+            url["transfer"] += entry["transfer"]
+            url["decoded"] += entry["decoded"]
+            kind = by_type.setdefault(entry["type"], {"count": 0, "transfer": 0})
+            kind["count"] += 1
+            kind["transfer"] += entry["transfer"]
+        repeated = repeats.get(route, [])
+        rollups[route] = {
+            "requests": len(items),
+            "transfer_bytes": sum(e["transfer"] for e in items),
+            "decoded_bytes": sum(e["decoded"] for e in items),
+            "cached": sum(e["cache"] not in ("network", "revalidated") for e in items),
+            "failed": sum(e["status"] == "failed" for e in items),
+            "by_type": dict(sorted(by_type.items(), key=lambda kv: -kv[1]["transfer"])),
+            "duplicates": sorted(({k: u[k] for k in ("url", "count", "transfer")} for u in per_url.values() if u["count"] > 1), key=lambda u: -u["count"]),
+            "uncached_repeats": len(repeated),
+            "uncached_repeat_bytes": sum(e["transfer"] for e in repeated),
+            "top": sorted(per_url.values(), key=lambda u: -u["transfer"])[:top],
+        }
+    return rollups
+
+
+def _kb(n: float) -> str:
+    return f"{n / 1024:,.1f} KB"
+
+
+def print_rollup(route: str, rollup: dict[str, Any], limit: int = 10) -> None:
+    test = f" ({rollup['test']})" if "test" in rollup else ""
+    print(
+        f"  {route}{test}: {rollup['requests']} requests, {_kb(rollup['transfer_bytes'])} transferred "
+        f"({_kb(rollup['decoded_bytes'])} decoded), {rollup['cached']} cached, {len(rollup['duplicates'])} duplicated URLs, "
+        f"{rollup['uncached_repeats']} uncached repeats ({_kb(rollup['uncached_repeat_bytes'])})"
+    )
+    for url in rollup["top"][:limit]:
+        repeat = f" ×{url['count']}" if url["count"] > 1 else ""
+        print(f"    {_kb(url['transfer']):>12}  {url['type']:<10} {url['url']}{repeat}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Per-route network roll-ups from an engine report run with --network")
+    parser.add_argument("report", type=Path, help="tmp/results/engine-<run>.json")
+    parser.add_argument("--route", help="only this route template, e.g. /w/{slug}/inbox")
+    parser.add_argument("--only", help="comma-separated test ids")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    report = json.loads(args.report.read_text(encoding="utf-8"))
+    wanted = {t.strip().upper() for t in args.only.split(",")} if args.only else None
+    for test in report["tests"]:
+        if wanted and test["id"] not in wanted or "network" not in test["data"]:
+            continue
+        print(test["id"])
+        for route, rollup in test["data"]["network"].items():
+            if args.route in (None, route):
+                print_rollup(route, rollup, args.top)
+                for dup in rollup["duplicates"][: args.top]:
+                    print(f"    duplicate ×{dup['count']}  {dup['url']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Compile the generated TC scripts into compact step lists.
+
+Every ``TC0xx_*.py`` is the same bootstrap around a run of
+``page.goto`` / ``elem.click`` / ``elem.fill`` / ``expect(...)`` statements.
+The compiler reads each script's ``run_test`` with ``ast``, keeps only those
+statements as :class:`Step` s, and joins them with the matching entry of
+``testsprite_frontend_test_plan.json`` (title, category, priority, the
+plan's own step descriptions). :mod:`harness.engine` runs the result.
+
+Fixed sleeps are kept as ``sleep`` steps so the engine can decide whether to
+honour them. Literal login credentials become ``{login_user}`` /
+``{login_password}`` and the base URL is stripped, so compiled plans carry
+no secrets and run against any target.
+
+    python -m harness.plan --out tmp/plan.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .config import TESTS_DIR, Settings, load_settings
+
+PLAN_PATH = TESTS_DIR / "testsprite_frontend_test_plan.json"
+SCRIPT_GLOB = "TC[0-9][0-9][0-9]_*.py"
+EXPECTATIONS = {"to_be_visible": "expect_visible", "to_contain_text": "expect_text", "to_have_text": "expect_text", "to_have_url": "expect_url"}
+# Bootstrap calls the engine does itself
+IGNORED_CALLS = {"page.wait_for_load_state", "frame.wait_for_load_state", "context.close", "browser.close", "pw.stop"}
+
+
+class CompileError(ValueError):
+    pass
+
+
+@dataclass
+class Step:
+    op: str  # goto, click, fill, expect_visible, expect_text, expect_url, scroll, sleep, unsupported
+    selector: str | None = None
+    nth: int = 0
+    value: str | None = None
+    url: str | None = None
+    ms: float | None = None
+    dy: float | str | None = None  # pixels, or "viewport"/"-viewport"
+    timeout: float | None = None
+    note: str = ""
+    message: str | None = None  # failure message of the original try/except AssertionError
+    line: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        defaults = Step(self.op)
+        return {k: v for k, v in asdict(self).items() if k == "op" or v != getattr(defaults, k)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Step:
+        return cls(**data)
+
+    @property
+    def label(self) -> str:
+        target = self.url or self.selector or self.value or self.dy or self.ms or ""
+        return f"{self.op} {str(target)[:60]}".strip()
+
+
+@dataclass
+class CompiledTest:
+    id: str
+    title: str
+    source: str
+    category: str = ""
+    priority: str = ""
+    description: str = ""
+    plan_steps: list[str] = field(default_factory=list)
+    steps: list[Step] = field(default_factory=list)
+
+    @property
+    def unsupported(self) -> list[Step]:
+        return [s for s in self.steps if s.op == "unsupported"]
+
+    @property
+    def sleep_ms(self) -> float:
+        return sum(s.ms or 0 for s in self.steps if s.op == "sleep")
+
+    def as_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["steps"] = [s.as_dict() for s in self.steps]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> CompiledTest:
+        return cls(**{**data, "steps": [Step.from_dict(s) for s in data.get("steps", [])]})
+
+
+def _constant(node: ast.AST) -> Any:
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        return None
+
+
+def _kwarg(call: ast.Call, name: str) -> Any:
+    return next((_constant(k.value) for k in call.keywords if k.arg == name), None)
+
+
+def _locator(node: ast.AST) -> tuple[str | None, int]:
+    """Selector and index of ``frame.locator(S).nth(N)`` / ``frame.locator(S).first``."""
+    nth = 0
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "nth":
+        nth = _constant(node.args[0]) or 0
+        node = node.func.value
+    elif isinstance(node, ast.Attribute) and node.attr == "first":
+        node = node.value
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "locator" and node.args:
+        return _constant(node.args[0]), nth
+    return None, nth
+
+
+class _ScriptCompiler:
+    def __init__(self, source: str, settings: Settings | None) -> None:
+        self.lines = source.splitlines()
+        self.settings = settings
+        self.steps: list[Step] = []
+        self.selector: tuple[str | None, int] = (None, 0)
+
+    def note(self, lineno: int) -> str:
+        """Nearest ``# comment`` directly above ``lineno`` (1-based)."""
+        for index in range(lineno - 2, max(lineno - 4, -1), -1):
+            text = self.lines[index].strip()
+            if text.startswith("#"):
+                return text.lstrip("#-> ").strip()
+            if text:
+                break
+        return ""
+
+    def scrub(self, value: Any) -> Any:
+        if not isinstance(value, str) or self.settings is None:
+            return value
+        if value == self.settings.login_user:
+            return "{login_user}"
+        if value == self.settings.login_password:
+            return "{login_password}"
+        return value
+
+    def relative(self, url: str) -> str:
+        match = re.match(r"https?://(?:localhost|127\.0\.0\.1)(?::\d+)?(/.*)?$", url)
+        if self.settings and url.startswith(self.settings.base_url):
+            return url[len(self.settings.base_url):] or "/"
+        return (match.group(1) or "/") if match else url
+
+    def block(self, body: list[ast.stmt], message: str | None = None) -> None:
+        for stmt in body:
+            self.statement(stmt, message)
+
+    def statement(self, stmt: ast.stmt, message: str | None) -> None:
+        if isinstance(stmt, ast.Try):
+            handler_message = None
+            for handler in stmt.handlers:
+                if ast.unparse(handler.type or ast.Name("")) == "AssertionError":
+                    raised = next((n for n in ast.walk(handler) if isinstance(n, ast.Raise)), None)
+                    if raised is not None and isinstance(raised.exc, ast.Call) and raised.exc.args:
+                        handler_message = _constant(raised.exc.args[0])
+            self.block(stmt.body, handler_message or message)
+            return
+        if isinstance(stmt, ast.For):  # "for frame in page.frames: wait_for_load_state"
+            return
+        if isinstance(stmt, ast.Assign):
+            target = ast.unparse(stmt.targets[0])
+            if target == "elem":
+                self.selector = _locator(stmt.value)
+            elif target != "frame":
+                self.unsupported(stmt)
+            return
+        if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Await) and isinstance(stmt.value.value, ast.Call):
+            self.call(stmt.value.value, stmt, message)
+            return
+        if not isinstance(stmt, ast.Pass):
+            self.unsupported(stmt)
+
+    def call(self, call: ast.Call, stmt: ast.stmt, message: str | None) -> None:
+        func = call.func
+        name = ast.unparse(func)
+        line = stmt.lineno
+        if name in IGNORED_CALLS:
+            return
+        if name == "page.goto":
+            self.steps.append(Step("goto", url=self.relative(_constant(call.args[0])), note=self.note(line), line=line))
+        elif name == "page.wait_for_timeout":
+            self.steps.append(Step("sleep", ms=float(_constant(call.args[0])), line=line))
+        elif name == "asyncio.sleep":
+            self.steps.append(Step("sleep", ms=float(_constant(call.args[0])) * 1000, line=line))
+        elif name in ("elem.click", "elem.fill"):
+            selector, nth = self.selector
+            step = Step(name.split(".")[1], selector=selector, nth=nth, timeout=_kwarg(call, "timeout"), note=self.note(line - 1), line=line)
+            if step.op == "fill":
+                step.value = self.scrub(_constant(call.args[0]))
+            self.steps.append(step)
+        elif name == "page.mouse.wheel":
+            dy = call.args[1]
+            if "innerHeight" in ast.unparse(dy):
+                self.steps.append(Step("scroll", dy="-viewport" if isinstance(dy, ast.UnaryOp) else "viewport", line=line))
+            else:
+                self.steps.append(Step("scroll", dy=_constant(dy), line=line))
+        elif isinstance(func, ast.Attribute) and func.attr in EXPECTATIONS and isinstance(func.value, ast.Call):
+            inner = func.value
+            selector, nth = _locator(inner.args[0]) if inner.args else (None, 0)
+            step = Step(EXPECTATIONS[func.attr], selector=selector, nth=nth, timeout=_kwarg(call, "timeout"), message=message, line=line)
+            if call.args:
+                step.value = self.scrub(_constant(call.args[0]))
+            self.steps.append(step)
+        else:
+            self.unsupported(stmt)
+
+    def unsupported(self, stmt: ast.stmt) -> None:
+        self.steps.append(Step("unsupported", value=ast.unparse(stmt)[:200], line=stmt.lineno))
+
+
+def compile_script(path: Path, settings: Settings | None = None) -> list[Step]:
+    source = path.read_text(encoding="utf-8")
+    tree = ast.parse(source, filename=str(path))
+    run_test = next((n for n in tree.body if isinstance(n, ast.AsyncFunctionDef) and n.name == "run_test"), None)
+    if run_test is None:
+        raise CompileError(f"{path.name}: no async def run_test()")
+    body = next((n for n in run_test.body if isinstance(n, ast.Try)), None)
+    if body is None:
+        raise CompileError(f"{path.name}: run_test has no try/finally body")
+    compiler = _ScriptCompiler(source, settings)
+    # The bootstrap (playwright start, launch, new_context, new_page) is assignment-only; skip up to the first goto
+    statements = body.body
+    start = next((i for i, s in enumerate(statements) if "page.goto" in ast.unparse(s)), 0)
+    compiler.block(statements[start:])
+    return compiler.steps
+
+
+def compile_plan(tests_dir: Path = TESTS_DIR, plan_path: Path = PLAN_PATH, settings: Settings | None = None) -> list[CompiledTest]:
+    """Every TC script in ``tests_dir`` joined with its plan entry, sorted by id."""
+    plan = {entry["id"]: entry for entry in json.loads(plan_path.read_text(encoding="utf-8"))} if plan_path.exists() else {}
+    compiled: list[CompiledTest] = []
+    for path in sorted(tests_dir.glob(SCRIPT_GLOB)):
+        test_id = path.name.split("_", 1)[0]
+        entry = plan.get(test_id, {})
+        compiled.append(
+            CompiledTest(
+                id=test_id,
+                title=entry.get("title", path.stem.split("_", 1)[1].replace("_", " ")),
+                source=path.name,
+                category=entry.get("category", ""),
+                priority=entry.get("priority", ""),
+                description=entry.get("description", ""),
+                plan_steps=[s.get("description", "") for s in entry.get("steps", [])],
+                steps=compile_script(path, settings),
+            )
+        )
+    return compiled
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Compile TC scripts into step lists")
+    parser.add_argument("--out", type=Path, help="write the compiled plan as JSON")
+    parser.add_argument("--show", help="print the steps of one test, e.g. TC001")
+    args = parser.parse_args(argv)
+
+    tests = compile_plan(settings=load_settings())
+    for test in tests:
+        ops = {op: sum(s.op == op for s in test.steps) for op in dict.fromkeys(s.op for s in test.steps)}
+        print(f"{test.id}  {len(test.steps):>3} steps  {test.sleep_ms / 1000:>5.0f}s fixed sleeps  {ops}  {test.title}")
+        if args.show == test.id:
+            for step in test.steps:
+                print(f"    L{step.line:<4} {step.label}" + (f"  # {step.note}" if step.note else ""))
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps([t.as_dict() for t in tests], indent=1), encoding="utf-8")
+        print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
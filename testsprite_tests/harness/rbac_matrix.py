@@ -0,0 +1,269 @@
+"""Concurrent role × route/action permission matrix (replaces TC011's sequential logins).
+
+Reads a matrix of roles and checks (``rbac_matrix.json`` by default), logs
+every role in once through ``/auth/login``, and evaluates every cell
+concurrently:
+
+- ``http``   GET the route with the role's cookies, redirects not followed.
+  ``200`` is *allow*; ``401/403/404`` or a redirect to ``/login`` is *deny*.
+- ``convex`` call a query/mutation/action with the role's ``sessionId``.
+  Success is *allow* unless the value is ``false``/``null``; a Convex error is *deny*.
+- ``ui``     load the page in a browser context for the role and look for
+  ``selector``. Visible is *allow*, absent is *deny*. Only used where the
+  server renders the same page for everyone and the difference is client-side.
+
+Placeholders: ``{slug}`` (the role's workspace), ``{slug:<role>}`` (another
+role's workspace) and ``{sessionId}``. A role without a session (anonymous)
+has no workspace, so its ``{slug}`` is the first logged-in role's; the cell
+is an error only when no role has one.
+
+    python -m harness.rbac_matrix --matrix harness/rbac_matrix.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from playwright.async_api import APIRequestContext, Browser, BrowserContext, Error as PlaywrightError, async_playwright
+
+from .config import Settings, load_settings
+from .convex import ConvexClient, ConvexError
+from .results import ResultsStore
+from .session import AuthSession, LoginError, api_login, launch_browser, new_context
+
+DEFAULT_MATRIX = Path(__file__).with_name("rbac_matrix.json")
+DENY_STATUSES = {401, 403, 404}
+
+
+@dataclass
+class Role:
+    name: str
+    session: AuthSession | None = None
+    skipped: str | None = None
+    request: APIRequestContext | None = None
+    context: BrowserContext | None = None
+    _context_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+@dataclass
+class Cell:
+    check: str
+    role: str
+    expected: str
+    observed: str = "skip"
+    detail: str = ""
+    ms: float = 0.0
+
+    @property
+    def status(self) -> str:
+        if self.observed in ("skip", "error"):
+            return self.observed
+        return "pass" if self.observed == self.expected else "fail"
+
+
+def resolve_credentials(spec: dict[str, Any], settings: Settings) -> tuple[str, str] | None:
+    if not spec:
+        return None
+    if spec.get("credentials") == "default":
+        return settings.login_user, settings.login_password
+    email = os.environ.get(spec.get("email_env", ""), spec.get("email", ""))
+    password = os.environ.get(spec.get("password_env", ""), spec.get("password", ""))
+    if not (email and password):
+        raise LoginError(f"set {spec.get('password_env') or 'a password'} to enable this role")
+    return email, password
+
+
+def fill(template: Any, role: Role, roles: dict[str, Role]) -> Any:
+    """Substitute ``{slug}``, ``{slug:<role>}`` and ``{sessionId}`` in strings, recursively."""
+    if isinstance(template, dict):
+        return {key: fill(value, role, roles) for key, value in template.items()}
+    if isinstance(template, list):
+        return [fill(value, role, roles) for value in template]
+    if not isinstance(template, str):
+        return template
+
+    def slug_of(match: re.Match[str]) -> str:
+        if match.group(1):
+            owners = [roles[match.group(1)]]
+        elif role.session is None:
+            # A role without a session has no workspace; probe someone else's
+            owners = [r for r in roles.values() if r.session and r.session.workspace_slug]
+        else:
+            owners = [role]
+        if not (owners and owners[0].session and owners[0].session.workspace_slug):
+            raise LoginError(f"no workspace slug for role {match.group(1) or role.name}")
+        return owners[0].session.workspace_slug
+
+    value = re.sub(r"\{slug(?::(\w+))?\}", slug_of, template)
+    if "{sessionId}" in value:
+        value = value.replace("{sessionId}", (role.session and role.session.session_id) or "")
+    return value
+
+
+async def prepare_role(pw: Any, settings: Settings, name: str, spec: dict[str, Any]) -> Role:
+    role = Role(name)
+    try:
+        credentials = resolve_credentials(spec, settings)
+        if credentials:
+            role.session = await api_login(pw, settings, *credentials)
+    except LoginError as exc:
+        role.skipped = str(exc)
+        return role
+    state = role.session.storage_state if role.session else None
+    role.request = await pw.request.new_context(base_url=settings.base_url, storage_state=state)
+    return role
+
+
+async def browser_context(role: Role, browser: Browser, settings: Settings) -> BrowserContext:
+    async with role._context_lock:
+        if role.context is None:
+            role.context = await new_context(browser, settings, role.session)
+        return role.context
+
+
+async def check_http(role: Role, path: str) -> tuple[str, str]:
+    response = await role.request.get(path, max_redirects=0)
+    location = response.headers.get("location", "")
+    if response.status == 200:
+        return "allow", "200"
+    if response.status in DENY_STATUSES:
+        return "deny", str(response.status)
+    if 300 <= response.status < 400:
+        return ("deny" if "/login" in location else "redirect"), f"{response.status} → {location}"
+    return "error", str(response.status)
+
+
+async def check_convex(role: Role, convex: ConvexClient, check: dict[str, Any], args: dict[str, Any]) -> tuple[str, str]:
+    call = getattr(convex, check.get("type", "query"))
+    try:
+        value = await call(check["path"], args)
+    except ConvexError as exc:
+        return "deny", str(exc).splitlines()[0][:120]
+    return ("deny" if value is None or value is False else "allow"), json.dumps(value)[:60]
+
+
+async def check_ui(role: Role, browser: Browser, settings: Settings, path: str, selector: str, timeout_ms: float) -> tuple[str, str]:
+    context = await browser_context(role, browser, settings)
+    page = await context.new_page()
+    try:
+        await page.goto(path, wait_until="domcontentloaded")
+        try:
+            await page.locator(selector).first.wait_for(state="visible", timeout=timeout_ms)
+            return "allow", f"{selector} visible"
+        except PlaywrightError:
+            return "deny", f"{selector} absent at {page.url}"
+    finally:
+        await page.close()
+
+
+async def run_matrix(matrix: dict[str, Any], args: argparse.Namespace) -> list[Cell]:
+    settings = load_settings()
+    async with async_playwright() as pw:
+        role_list = await asyncio.gather(
+            *(prepare_role(pw, settings, name, spec) for name, spec in matrix["roles"].items())
+        )
+        roles = {role.name: role for role in role_list}
+        convex_request = await pw.request.new_context()
+        convex = ConvexClient(convex_request, settings.convex_url) if settings.convex_url else None
+        browser = await launch_browser(pw) if any(c["kind"] == "ui" for c in matrix["checks"]) else None
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def evaluate(check: dict[str, Any], role: Role, expected: str) -> Cell:
+            cell = Cell(check["name"], role.name, expected)
+            if role.skipped:
+                cell.detail = role.skipped
+                return cell
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    if check["kind"] == "http":
+                        cell.observed, cell.detail = await check_http(role, fill(check["path"], role, roles))
+                    elif check["kind"] == "convex":
+                        if convex is None:
+                            cell.detail = "PUBLIC_CONVEX_URL not set"
+                            return cell
+                        cell.observed, cell.detail = await check_convex(role, convex, check, fill(check.get("args", {}), role, roles))
+                    elif check["kind"] == "ui":
+                        path = fill(check["path"], role, roles)
+                        cell.observed, cell.detail = await check_ui(role, browser, settings, path, check["selector"], args.ui_timeout)
+                    else:
+                        cell.observed, cell.detail = "error", f"unknown kind {check['kind']!r}"
+                except (LoginError, PlaywrightError) as exc:
+                    cell.observed, cell.detail = "error", str(exc).splitlines()[0][:120]
+                cell.ms = (time.perf_counter() - start) * 1000
+            return cell
+
+        try:
+            cells = await asyncio.gather(
+                *(
+                    evaluate(check, roles[role_name], expected)
+                    for check in matrix["checks"]
+                    for role_name, expected in check["expect"].items()
+                )
+            )
+        finally:
+            for role in roles.values():
+                if role.context:
+                    await role.context.close()
+                if role.request:
+                    await role.request.dispose()
+            if browser:
+                await browser.close()
+            await convex_request.dispose()
+    return list(cells)
+
+
+def render_grid(matrix: dict[str, Any], cells: list[Cell]) -> str:
+    """Checks as rows, roles as columns; each cell shows status and observed outcome."""
+    role_names = list(matrix["roles"])
+    by_key = {(c.check, c.role): c for c in cells}
+    marks = {"pass": "✓", "fail": "✗", "skip": "–", "error": "!"}
+    header = ["check", *role_names]
+    rows = [header]
+    for check in matrix["checks"]:
+        row = [check["name"]]
+        for role in role_names:
+            cell = by_key.get((check["name"], role))
+            row.append(f"{marks[cell.status]} {cell.observed}" if cell else "")
+        rows.append(row)
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join("  ".join(value.ljust(widths[i]) for i, value in enumerate(row)) for row in rows)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Concurrent RBAC permission matrix")
+    parser.add_argument("--matrix", type=Path, default=DEFAULT_MATRIX)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--ui-timeout", type=float, default=5000, help="ms to wait for a ui selector")
+    args = parser.parse_args(argv)
+
+    matrix = json.loads(args.matrix.read_text(encoding="utf-8"))
+    start = time.perf_counter()
+    cells = asyncio.run(run_matrix(matrix, args))
+    elapsed = time.perf_counter() - start
+
+    print(render_grid(matrix, cells))
+    counts = {status: sum(c.status == status for c in cells) for status in ("pass", "fail", "skip", "error")}
+    print(f"\n{len(cells)} cells in {elapsed:.1f}s: {counts}")
+    for cell in cells:
+        if cell.status in ("fail", "error", "skip"):
+            print(f"  {cell.status:<5} {cell.check} [{cell.role}] expected {cell.expected}: {cell.detail}")
+
+    store = ResultsStore("rbac_matrix")
+    store.record("matrix_wall", elapsed * 1000, cells=len(cells))
+    path = store.write_report({"elapsed_s": round(elapsed, 3), "counts": counts, "cells": [c.__dict__ | {"status": c.status} for c in cells]})
+    print(f"report: {path}")
+    if counts["fail"] or counts["error"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
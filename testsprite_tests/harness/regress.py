@@ -0,0 +1,254 @@
+"""Statistical regression detection over the results history (NumPy).
+
+Every timing series in ``history.jsonl`` is identified by its suite, metric
+and tags (test, step, op, route, phase, profile, target, parallel,
+contexts, udf, keep_sleeps, settle, snapshots, batched). For each series the ``--recent`` most recent runs
+(default: just the run under test) are compared with the ``--window`` runs
+before them:
+
+- median shift: ``median(current) / median(baseline) - 1``
+- one-sided Mann-Whitney U (current slower than baseline): a normal
+  approximation with tie correction when both sides have 10+ samples, a
+  permutation test otherwise
+- bootstrap confidence interval of the median ratio, from resampling both
+  sides
+
+A series counts as a *regression* when it is at least ``--min-shift`` and
+``--min-delta`` ms slower, ``p < --alpha``, and the whole interval lies
+above 1. Improvements are reported the same way in the other direction.
+Only passing samples are compared, and only runs with the same profile and
+target, because those tags are part of the series key. A rank test cannot go
+below ``1 / C(n_current + n_baseline, n_current)``: one current run needs at
+least ``1/alpha`` baseline runs (20 at ``alpha = 0.05``) before anything can
+be flagged, so series that cannot reach ``alpha`` are skipped and counted
+rather than reported unchanged. ``--recent`` pools several current runs
+(e.g. the suite run three times at the same commit) for more power.
+
+    python -m harness.regress                          # latest engine run
+    python -m harness.regress --suite warmup --recent 3
+    python -m harness.engine --regress                 # after the run; exit 1 on regression
+    python -m harness.engine --regress --regress-recent 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .results import HISTORY_PATH, RESULTS_DIR, ResultsStore, load_history
+
+IDENTITY = (
+    "suite", "metric", "test", "step", "op", "route", "phase", "profile", "target", "parallel", "contexts", "udf",
+    "keep_sleeps", "settle", "snapshots", "batched",
+)
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    min_shift: float = 0.10  # fraction of the baseline median
+    min_delta_ms: float = 20.0
+    alpha: float = 0.05
+    level: float = 0.95  # confidence level of the bootstrap interval
+    resamples: int = 2000
+    permutations: int = 5000
+
+
+@dataclass
+class Finding:
+    series: dict[str, Any]
+    verdict: str  # regression, improvement, unchanged
+    baseline_n: int
+    current_n: int
+    baseline_median: float
+    current_median: float
+    shift: float
+    p_slower: float
+    p_faster: float
+    ci_low: float
+    ci_high: float
+
+    @property
+    def label(self) -> str:
+        return " ".join(f"{k}={v}" for k, v in self.series.items() if k not in ("suite", "profile", "target", "parallel", "contexts", "settle"))
+
+
+def rankdata(values: np.ndarray) -> np.ndarray:
+    """1-based ranks, ties averaged."""
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    return (ends - (counts - 1) / 2)[inverse]
+
+
+def mann_whitney_greater(x: np.ndarray, y: np.ndarray, rng: np.random.Generator, permutations: int = 5000) -> float:
+    """One-sided p-value for ``x`` being stochastically greater than ``y``."""
+    n1, n2 = len(x), len(y)
+    pooled = np.concatenate([x, y])
+    ranks = rankdata(pooled)
+    r1 = ranks[:n1].sum()
+    if n1 >= 10 and n2 >= 10:
+        u = r1 - n1 * (n1 + 1) / 2
+        _, counts = np.unique(pooled, return_counts=True)
+        n = n1 + n2
+        tie = (counts**3 - counts).sum() / (n * (n - 1))
+        sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie))
+        if sigma == 0:
+            return 1.0
+        z = (u - n1 * n2 / 2 - 0.5) / sigma
+        return 0.5 * math.erfc(z / math.sqrt(2))
+    # Small samples: permutation distribution of the rank sum, vectorised over all permutations
+    shuffled = rng.permuted(np.tile(ranks, (permutations, 1)), axis=1)[:, :n1].sum(axis=1)
+    return float((np.count_nonzero(shuffled >= r1 - 1e-9) + 1) / (permutations + 1))
+
+
+def can_reach(current: int, baseline: int, alpha: float) -> bool:
+    """Whether a rank test on this many samples can give ``p < alpha`` at all.
+
+    The smallest attainable p-value is one over the number of ways to pick
+    the current samples from the pooled ones: a single current sample against
+    ``n`` baseline samples can never get below ``1 / (n + 1)``.
+    """
+    return math.comb(current + baseline, current) * alpha > 1
+
+
+def bootstrap_ratio(x: np.ndarray, y: np.ndarray, rng: np.random.Generator, resamples: int = 2000, level: float = 0.95) -> tuple[float, float]:
+    """Percentile interval of ``median(x) / median(y)`` under resampling of both sides."""
+    mx = np.median(rng.choice(x, (resamples, len(x))), axis=1)
+    my = np.median(rng.choice(y, (resamples, len(y))), axis=1)
+    ratio = mx / np.maximum(my, 1e-9)
+    tail = (1 - level) / 2 * 100
+    low, high = np.percentile(ratio, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def series_key(record: dict[str, Any]) -> tuple[Any, ...]:
+    return tuple(record.get(field) for field in IDENTITY)
+
+
+def collect(
+    suite: str, run: str | None = None, window: int = 20, recent: int = 1, path: Path = HISTORY_PATH, **filters: Any
+) -> tuple[str, dict[tuple[Any, ...], tuple[list[float], list[float]]]]:
+    """``(run id, series key -> (current samples, baseline samples))`` for timing metrics of passing records."""
+    records = [
+        r
+        for r in load_history(path, suite=suite, **filters)
+        if r.get("unit", "ms") == "ms" and r.get("status", "pass") == "pass" and isinstance(r.get("value"), (int, float))
+    ]
+    runs = list(dict.fromkeys(r["run"] for r in records))
+    if not runs:
+        raise LookupError(f"no {suite} runs in the history")
+    if run is None:
+        run = runs[-1]
+    if run not in runs:
+        raise LookupError(f"run {run} is not in the {suite} history")
+    end = runs.index(run) + 1
+    current_runs = set(runs[max(end - recent, 0) : end])
+    baseline_runs = set(runs[max(end - recent - window, 0) : max(end - recent, 0)])
+    series: dict[tuple[Any, ...], tuple[list[float], list[float]]] = {}
+    for record in records:
+        side = 0 if record["run"] in current_runs else 1 if record["run"] in baseline_runs else None
+        if side is not None:
+            series.setdefault(series_key(record), ([], []))[side].append(float(record["value"]))
+    return run, series
+
+
+def analyse(
+    series: dict[tuple[Any, ...], tuple[list[float], list[float]]], thresholds: Thresholds | None = None, min_baseline: int = 5, seed: int = 0
+) -> list[Finding]:
+    """Findings for every series with ``min_baseline`` baseline samples and enough samples to reach ``alpha``."""
+    thresholds = thresholds or Thresholds()
+    rng = np.random.default_rng(seed)
+    findings = []
+    for key, (current, baseline) in series.items():
+        if not current or len(baseline) < min_baseline or not can_reach(len(current), len(baseline), thresholds.alpha):
+            continue
+        x, y = np.asarray(current), np.asarray(baseline)
+        cur, base = float(np.median(x)), float(np.median(y))
+        shift = cur / base - 1 if base > 0 else 0.0
+        p_slower = mann_whitney_greater(x, y, rng, thresholds.permutations)
+        p_faster = mann_whitney_greater(-x, -y, rng, thresholds.permutations)
+        low, high = bootstrap_ratio(x, y, rng, thresholds.resamples, thresholds.level)
+        verdict = "unchanged"
+        if shift >= thresholds.min_shift and cur - base >= thresholds.min_delta_ms and p_slower < thresholds.alpha and low > 1:
+            verdict = "regression"
+        elif -shift >= thresholds.min_shift and base - cur >= thresholds.min_delta_ms and p_faster < thresholds.alpha and high < 1:
+            verdict = "improvement"
+        labels = {field: value for field, value in zip(IDENTITY, key) if value is not None}
+        findings.append(Finding(labels, verdict, len(y), len(x), base, cur, shift, p_slower, p_faster, low, high))
+    return sorted(findings, key=lambda f: -f.shift)
+
+
+def skipped(series: dict[tuple[Any, ...], tuple[list[float], list[float]]], findings: list[Finding]) -> int:
+    """Series with current samples that :func:`analyse` left out for lack of baseline or power."""
+    return sum(1 for current, _ in series.values() if current) - len(findings)
+
+
+def print_findings(findings: list[Finding], limit: int = 20, skipped: int = 0, alpha: float = Thresholds.alpha) -> None:
+    flagged = [f for f in findings if f.verdict != "unchanged"]
+    counts = {v: sum(f.verdict == v for f in findings) for v in ("regression", "improvement", "unchanged")}
+    print(f"regressions: {len(findings)} series compared {counts}")
+    if skipped:
+        needed = math.ceil(1 / alpha)
+        print(f"  {skipped} series skipped: too few samples for p < {alpha} (one current run needs {needed}+ baseline runs; pool more current runs)")
+    for f in flagged[:limit]:
+        print(
+            f"  {f.verdict:<11} {f.shift:+7.1%}  {f.baseline_median:8.0f} → {f.current_median:8.0f}ms  "
+            f"p={min(f.p_slower, f.p_faster):.3f}  ratio CI [{f.ci_low:.2f}, {f.ci_high:.2f}]  {f.label}"
+        )
+
+
+def check_run(suite: str, run: str | None = None, window: int = 20, recent: int = 1, thresholds: Thresholds | None = None, **filters: Any) -> list[Finding]:
+    """Analyse ``run`` and attach the findings to its ``<suite>-<run>.json`` report when there is one."""
+    thresholds = thresholds or Thresholds()
+    run, series = collect(suite, run, window, recent, **filters)
+    findings = analyse(series, thresholds)
+    print_findings(findings, skipped=skipped(series, findings), alpha=thresholds.alpha)
+    report_path = RESULTS_DIR / f"{suite}-{run}.json"
+    if report_path.exists():
+        report = json.loads(report_path.read_text(encoding="utf-8"))
+        report["regressions"] = [asdict(f) for f in findings if f.verdict != "unchanged"]
+        report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return findings
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Flag statistically significant slowdowns against a rolling baseline")
+    parser.add_argument("--suite", default="engine")
+    parser.add_argument("--run", help="run id to test (default: the latest)")
+    parser.add_argument("--profile", help="only series of this throttling profile")
+    parser.add_argument("--target", help="only series of this target (dev/prod)")
+    parser.add_argument("--window", type=int, default=20, help="baseline runs before the current ones")
+    parser.add_argument("--recent", type=int, default=1, help="runs that make up the current sample")
+    parser.add_argument("--min-shift", type=float, default=Thresholds.min_shift)
+    parser.add_argument("--min-delta", type=float, default=Thresholds.min_delta_ms, help="ms")
+    parser.add_argument("--alpha", type=float, default=Thresholds.alpha)
+    parser.add_argument("--all", action="store_true", help="list unchanged series too")
+    args = parser.parse_args(argv)
+
+    filters = {key: value for key, value in (("profile", args.profile), ("target", args.target)) if value}
+    thresholds = Thresholds(args.min_shift, args.min_delta, args.alpha)
+    try:
+        run, series = collect(args.suite, args.run, args.window, args.recent, **filters)
+    except LookupError as exc:
+        raise SystemExit(str(exc)) from exc
+    findings = analyse(series, thresholds)
+    print(f"{args.suite} run {run} vs the previous {args.window} runs")
+    print_findings(findings, limit=len(findings), skipped=skipped(series, findings), alpha=thresholds.alpha)
+    if args.all:
+        for f in findings:
+            if f.verdict == "unchanged":
+                print(f"  unchanged   {f.shift:+7.1%}  {f.label}")
+    store = ResultsStore("regress")
+    path = store.write_report({"tested_suite": args.suite, "tested_run": run, "thresholds": asdict(thresholds), "findings": [asdict(f) for f in findings]})
+    print(f"report: {path}")
+    if any(f.verdict == "regression" for f in findings):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
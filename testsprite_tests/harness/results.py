@@ -0,0 +1,74 @@
+"""Results store: an append-only JSONL history of measured metrics.
+
+Every record carries the run id, commit and free-form tags (test, step,
+route, ...) so later runs can be compared against earlier ones.
+"""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import time
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from .config import REPO_ROOT, TMP_DIR
+
+RESULTS_DIR = TMP_DIR / "results"
+HISTORY_PATH = RESULTS_DIR / "history.jsonl"
+
+
+def current_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+class ResultsStore:
+    def __init__(self, suite: str, path: Path = HISTORY_PATH, run_id: str | None = None, **tags: Any) -> None:
+        self.suite = suite
+        self.path = path
+        self.run_id = run_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.tags = {"commit": current_commit(), **tags}
+
+    def record(self, metric: str, value: float, unit: str = "ms", **tags: Any) -> None:
+        entry = {
+            "run": self.run_id,
+            "ts": time.time(),
+            "suite": self.suite,
+            "metric": metric,
+            "value": value,
+            "unit": unit,
+            **self.tags,
+            **tags,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry) + "\n")
+
+    def write_report(self, payload: dict[str, Any]) -> Path:
+        """Write a run's summary next to the history as ``<suite>-<run>.json``."""
+        path = self.path.parent / f"{self.suite}-{self.run_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        report = {"suite": self.suite, "run": self.run_id, **self.tags, **payload}
+        path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        return path
+
+
+def load_history(path: Path = HISTORY_PATH, **filters: Any) -> Iterator[dict[str, Any]]:
+    """Yield history records whose fields equal every given filter."""
+    if not path.exists():
+        return
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if all(entry.get(key) == value for key, value in filters.items()):
+                yield entry
@@ -0,0 +1,116 @@
+"""Route inventory derived from ``src/routes`` and the auth rules in ``src/hooks.server.ts``.
+
+Tools that need "every route" (security sweeps, audits, warm-up) read the
+SvelteKit tree instead of keeping their own list, so new pages are picked
+up automatically.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from .config import REPO_ROOT
+
+ROUTES_DIR = REPO_ROOT / "src" / "routes"
+HOOKS_PATH = REPO_ROOT / "src" / "hooks.server.ts"
+
+PAGE_FILES = ("+page.svelte", "+page.server.ts", "+page.ts")
+_METHOD_RE = re.compile(r"export\s+(?:const|async\s+function|function)\s+(GET|POST|PUT|PATCH|DELETE)\b")
+_PARAM_RE = re.compile(r"\[{1,2}(?:\.\.\.)?(\w+)(?:=\w+)?\]{1,2}")
+
+# Mirrors publicPaths / isPublicPath in src/hooks.server.ts when it cannot be parsed
+_FALLBACK_PUBLIC = ["/", "/login", "/register", "/verify-email", "/forgot-password", "/reset-password", "/auth", "/invite", "/test"]
+_FALLBACK_PREFIXES = ["/dev-docs", "/docs", "/marketing-docs"]
+
+
+@dataclass(frozen=True)
+class Route:
+    path: str  # template such as /w/{slug}/inbox
+    kind: str  # "page" or "endpoint"
+    methods: tuple[str, ...]
+    groups: tuple[str, ...]
+    public: bool
+    rest: tuple[str, ...] = ()  # [...name] params, which span any number of segments
+
+    @property
+    def params(self) -> list[str]:
+        return re.findall(r"\{(\w+)\}", self.path)
+
+    def url(self, **values: str) -> str:
+        """Fill path parameters; unknown ones get a ``probe-<name>`` placeholder."""
+        return re.sub(r"\{(\w+)\}", lambda m: values.get(m.group(1), f"probe-{m.group(1)}"), self.path)
+
+
+@dataclass(frozen=True)
+class PublicRules:
+    paths: tuple[str, ...]
+    prefixes: tuple[str, ...]
+
+    def is_public(self, path: str) -> bool:
+        return any(path == p or path.startswith(p + "/") for p in self.paths) or any(
+            path.startswith(p) for p in self.prefixes
+        )
+
+
+def load_public_rules(hooks_path: Path = HOOKS_PATH) -> PublicRules:
+    """Parse ``publicPaths`` and the ``startsWith`` prefixes from the hooks file."""
+    try:
+        source = hooks_path.read_text(encoding="utf-8")
+    except OSError:
+        return PublicRules(tuple(_FALLBACK_PUBLIC), tuple(_FALLBACK_PREFIXES))
+    block = re.search(r"const publicPaths\s*=\s*\[(.*?)\];", source, re.S)
+    body = re.search(r"function isPublicPath\(.*?\n\}", source, re.S)
+    paths = re.findall(r"'([^']+)'", block.group(1)) if block else _FALLBACK_PUBLIC
+    prefixes = re.findall(r"startsWith\('([^']+)'\)", body.group(0)) if body else _FALLBACK_PREFIXES
+    return PublicRules(tuple(paths), tuple(prefixes))
+
+
+def _route_path(relative: Path) -> tuple[str, tuple[str, ...], tuple[str, ...]]:
+    segments, groups, rest = [], [], []
+    for part in relative.parts:
+        if part.startswith("(") and part.endswith(")"):
+            groups.append(part[1:-1])
+        else:
+            segments.append(_PARAM_RE.sub(lambda m: "{" + m.group(1) + "}", part))
+            rest += re.findall(r"\[\.\.\.(\w+)", part)
+    return "/" + "/".join(segments), tuple(groups), tuple(rest)
+
+
+def discover_routes(routes_dir: Path = ROUTES_DIR, rules: PublicRules | None = None) -> list[Route]:
+    """Every page and ``+server.ts`` endpoint under ``routes_dir``, sorted by path."""
+    rules = rules or load_public_rules()
+    routes: list[Route] = []
+    for directory in sorted({p.parent for p in routes_dir.rglob("+*")}):
+        path, groups, rest = _route_path(directory.relative_to(routes_dir))
+        public = rules.is_public(path) and "authenticated" not in groups
+        if any((directory / name).exists() for name in PAGE_FILES):
+            routes.append(Route(path, "page", ("GET",), groups, public, rest))
+        server = directory / "+server.ts"
+        if server.exists():
+            methods = tuple(dict.fromkeys(_METHOD_RE.findall(server.read_text(encoding="utf-8"))))
+            routes.append(Route(path, "endpoint", methods or ("GET",), groups, public, rest))
+    return sorted(routes, key=lambda r: (r.path, r.kind))
+
+
+@functools.lru_cache(maxsize=1)
+def _page_patterns() -> tuple[tuple[re.Pattern[str], str], ...]:
+    pages = [r for r in discover_routes() if r.kind == "page"]
+    # Static routes win over parameterised ones (/w/new before /w/{slug}), rest params come last
+    pages.sort(key=lambda r: (len(r.rest), len(r.params), -r.path.count("/")))
+
+    def pattern(route: Route) -> re.Pattern[str]:
+        escaped = re.escape(route.path)
+        return re.compile("^" + re.sub(r"\\\{(\w+)\\\}", lambda m: ".+" if m.group(1) in route.rest else "[^/]+", escaped) + "/?$")
+
+    return tuple((pattern(r), r.path) for r in pages)
+
+
+def route_template(path: str) -> str:
+    """The page route template serving ``path`` (``/w/acme/inbox`` → ``/w/{slug}/inbox``), or ``path`` itself."""
+    for pattern, template in _page_patterns():
+        if pattern.match(path):
+            return template
+    return path
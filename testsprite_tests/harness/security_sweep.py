@@ -0,0 +1,223 @@
+"""Unauthorized-access sweep over every server route (TC018 without a browser).
+
+Enumerates pages and ``+server.ts`` endpoints from ``src/routes`` and probes
+every protected one with a set of bad credentials over pooled, keep-alive
+``APIRequestContext``s — hundreds of probes in parallel, no rendering:
+
+- ``unauthenticated``  no cookies at all
+- ``expired-session``  cookies of a session that was logged out (revoked server-side)
+- ``forged-session``   a well-formed but random session cookie
+- ``wrong-org``        a valid session aimed at another workspace's ``/w/<slug>/...``
+
+Pages are probed twice: the HTML route and its ``__data.json`` (SvelteKit
+data requests bypass the ``requireAuth`` hook, so the load functions must
+deny on their own). A probe *leaks* when it returns data instead of a 4xx,
+a redirect away from the resource, or a SvelteKit redirect/error payload.
+
+    python -m harness.security_sweep --foreign-slug other-team
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from playwright.async_api import APIRequestContext, Error as PlaywrightError, async_playwright
+
+from .config import Settings, load_settings
+from .results import ResultsStore
+from .routes import Route, discover_routes
+from .session import AuthSession, LoginError, api_login
+from .stats import summarize
+
+# Under public prefixes (/auth) but must still reject requests without a valid session
+SESSION_ENDPOINTS = {"/auth/linked-sessions", "/auth/switch", "/auth/token", "/auth/unlink-account"}
+DENY_STATUSES = {401, 403, 404, 405, 410}
+SESSION_COOKIE = "syos_session"
+
+
+@dataclass
+class Probe:
+    credential: str
+    method: str
+    path: str
+    data_request: bool = False
+    status: int = 0
+    verdict: str = ""
+    detail: str = ""
+    ms: float = 0.0
+
+
+def targets(routes: list[Route]) -> list[Route]:
+    return [r for r in routes if not r.public or r.path in SESSION_ENDPOINTS]
+
+
+def _within(location: str, resource: str) -> bool:
+    target = location.split("?", 1)[0]
+    return target == resource or target.startswith(resource.rstrip("/") + "/")
+
+
+def classify(probe: Probe, status: int, location: str, body: Any) -> tuple[str, str]:
+    """``deny``, ``leak`` or ``inconclusive`` for one response."""
+    resource = probe.path.removesuffix("/__data.json")
+    if probe.data_request and status == 200 and isinstance(body, dict):
+        kind = body.get("type")
+        if kind == "redirect":
+            target = body.get("location", "")
+            return ("leak" if _within(target, resource) else "deny"), f"data redirect → {target}"
+        nodes = body.get("nodes") or []
+        errors = [n for n in nodes if n and n.get("type") == "error"]
+        if errors:
+            return "deny", f"data error {errors[0].get('status', '')}"
+        return "leak", "data payload returned"
+    if status in DENY_STATUSES:
+        return "deny", str(status)
+    if 300 <= status < 400:
+        return ("leak" if _within(location, resource) else "deny"), f"{status} → {location}"
+    if 200 <= status < 300:
+        return "leak", str(status)
+    # 400 (validation before auth) and 5xx do not prove the route is protected
+    return "inconclusive", str(status)
+
+
+async def send(request: APIRequestContext, probe: Probe) -> None:
+    start = time.perf_counter()
+    try:
+        if probe.method == "GET":
+            response = await request.get(probe.path, max_redirects=0)
+        else:
+            response = await request.fetch(probe.path, method=probe.method, data={}, max_redirects=0)
+        body: Any = None
+        if probe.data_request and response.ok:
+            try:
+                body = await response.json()
+            except PlaywrightError:
+                body = None
+        probe.status = response.status
+        probe.verdict, probe.detail = classify(probe, response.status, response.headers.get("location", ""), body)
+    except PlaywrightError as exc:
+        probe.verdict, probe.detail = "inconclusive", str(exc).splitlines()[0][:120]
+    probe.ms = (time.perf_counter() - start) * 1000
+
+
+async def revoked_state(pw: Any, settings: Settings) -> dict[str, Any]:
+    """Storage state of a fresh session that has been logged out again."""
+    session = await api_login(pw, settings, use_cache=False)
+    request = await pw.request.new_context(base_url=settings.base_url, storage_state=session.storage_state)
+    try:
+        response = await request.post("/logout", headers={"x-csrf-token": session.csrf_token or ""})
+        if not response.ok:
+            raise LoginError(f"logout of throwaway session failed: HTTP {response.status}")
+    finally:
+        await request.dispose()
+    return session.storage_state
+
+
+def forged_state(settings: Settings) -> dict[str, Any]:
+    host = settings.base_url.split("://", 1)[-1].split("/", 1)[0].split(":", 1)[0]
+    cookie = {
+        "name": SESSION_COOKIE,
+        "value": secrets.token_urlsafe(32),
+        "domain": host,
+        "path": "/",
+        "expires": -1,
+        "httpOnly": True,
+        "secure": False,
+        "sameSite": "Lax",
+    }
+    return {"cookies": [cookie], "origins": []}
+
+
+def build_probes(routes: list[Route], credential: str, own: AuthSession | None, foreign_slug: str | None) -> list[Probe]:
+    probes: list[Probe] = []
+    for route in routes:
+        if credential == "wrong-org":
+            if "slug" not in route.params or not foreign_slug:
+                continue
+            path = route.url(slug=foreign_slug)
+        else:
+            slug = own.workspace_slug if own and own.workspace_slug else None
+            path = route.url(**({"slug": slug} if slug else {}))
+        for method in route.methods:
+            probes.append(Probe(credential, method, path))
+        if route.kind == "page":
+            probes.append(Probe(credential, "GET", f"{path.rstrip('/')}/__data.json", data_request=True))
+    return probes
+
+
+async def run_sweep(args: argparse.Namespace) -> tuple[list[Probe], float]:
+    settings = load_settings()
+    routes = targets(discover_routes())
+    async with async_playwright() as pw:
+        own = await api_login(pw, settings)
+        states: dict[str, dict[str, Any] | None] = {"unauthenticated": None, "forged-session": forged_state(settings)}
+        try:
+            states["expired-session"] = await revoked_state(pw, settings)
+        except LoginError as exc:
+            print(f"skipping expired-session probes: {exc}")
+        foreign_slug = args.foreign_slug
+        if not foreign_slug and args.foreign_user:
+            foreign_slug = (await api_login(pw, settings, args.foreign_user, args.foreign_password)).workspace_slug
+        if foreign_slug:
+            states["wrong-org"] = copy.deepcopy(own.storage_state)
+        else:
+            print("skipping wrong-org probes: pass --foreign-slug or --foreign-user")
+
+        pools = {
+            name: await pw.request.new_context(base_url=settings.base_url, storage_state=state)
+            for name, state in states.items()
+        }
+        probes = [p for name in states for p in build_probes(routes, name, own, foreign_slug)]
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def bounded(probe: Probe) -> None:
+            async with slots:
+                await send(pools[probe.credential], probe)
+
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(bounded(p) for p in probes))
+        finally:
+            for pool in pools.values():
+                await pool.dispose()
+        return probes, time.perf_counter() - start
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="API-level unauthorized-access sweep")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--foreign-slug", help="workspace slug the login user must not reach")
+    parser.add_argument("--foreign-user", help="second account whose workspace is used for wrong-org probes")
+    parser.add_argument("--foreign-password")
+    parser.add_argument("--strict", action="store_true", help="treat inconclusive probes as failures")
+    args = parser.parse_args(argv)
+
+    probes, elapsed = asyncio.run(run_sweep(args))
+    verdicts = {v: sum(p.verdict == v for p in probes) for v in ("deny", "leak", "inconclusive")}
+    print(f"{len(probes)} probes in {elapsed:.2f}s ({len(probes) / elapsed:.0f}/s): {verdicts}")
+    for probe in probes:
+        if probe.verdict == "leak" or (args.strict and probe.verdict == "inconclusive"):
+            print(f"  {probe.verdict:<12} {probe.credential:<16} {probe.method:<5} {probe.path}  {probe.detail}")
+
+    store = ResultsStore("security_sweep")
+    store.record("sweep_wall", elapsed * 1000, probes=len(probes))
+    path = store.write_report(
+        {
+            "elapsed_s": round(elapsed, 3),
+            "verdicts": verdicts,
+            "latency_ms": summarize(p.ms for p in probes),
+            "probes": [p.__dict__ for p in probes if p.verdict != "deny"],
+        }
+    )
+    print(f"report: {path}")
+    if verdicts["leak"] or (args.strict and verdicts["inconclusive"]):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
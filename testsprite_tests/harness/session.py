@@ -0,0 +1,140 @@
+"""Browser launch and headless authentication.
+
+The TC scripts log in by clicking through ``/login`` with a 3 s sleep per
+step. Tools that need many authenticated contexts log in once through
+``POST /auth/login`` instead and reuse the resulting storage state.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from playwright.async_api import APIRequestContext, Browser, BrowserContext, Playwright
+
+from .config import AUTH_DIR, BROWSER_ARGS, Settings
+
+# Reuse cached logins for this long; server sessions last 30 days but WorkOS may revoke earlier
+AUTH_CACHE_TTL_S = 12 * 60 * 60
+
+
+class LoginError(RuntimeError):
+    pass
+
+
+@dataclass
+class AuthSession:
+    email: str
+    storage_state: dict[str, Any]
+    session_id: str | None
+    csrf_token: str | None
+    workspace_slug: str | None
+    created_at: float
+
+    def route(self, section: str) -> str:
+        """Workspace-scoped path such as ``/w/<slug>/inbox``."""
+        if not self.workspace_slug:
+            raise LoginError(f"{self.email} has no workspace to open /{section}")
+        return f"/w/{self.workspace_slug}/{section.lstrip('/')}"
+
+
+async def launch_browser(pw: Playwright, headless: bool = True) -> Browser:
+    return await pw.chromium.launch(headless=headless, args=BROWSER_ARGS)
+
+
+async def new_context(browser: Browser, settings: Settings, session: AuthSession | None = None, **kwargs: Any) -> BrowserContext:
+    """A context on ``settings.base_url``, pre-authenticated when ``session`` is given."""
+    if session is not None:
+        kwargs.setdefault("storage_state", session.storage_state)
+    context = await browser.new_context(base_url=settings.base_url, **kwargs)
+    context.set_default_timeout(5000)
+    return context
+
+
+async def api_login(
+    pw: Playwright,
+    settings: Settings,
+    email: str | None = None,
+    password: str | None = None,
+    *,
+    use_cache: bool = True,
+) -> AuthSession:
+    """Log in without a browser page and return reusable storage state.
+
+    With ``use_cache`` the login is read from and written to ``tmp/.auth``;
+    without it a fresh, private session is created (e.g. one that is about
+    to be revoked).
+    """
+    email = email or settings.login_user
+    password = password or settings.login_password
+    cache_path = AUTH_DIR / f"{re.sub(r'[^A-Za-z0-9]+', '_', email)}.json"
+    if use_cache and cache_path.exists():
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        if time.time() - cached["created_at"] < AUTH_CACHE_TTL_S:
+            return AuthSession(**cached)
+
+    request = await pw.request.new_context(base_url=settings.base_url)
+    try:
+        response = await request.post("/auth/login", data={"email": email, "password": password})
+        body = await response.json() if response.ok else {}
+        if not body.get("success"):
+            raise LoginError(f"login failed for {email}: HTTP {response.status} {await response.text()}")
+        redirect_to = body.get("redirectTo", "")
+        match = re.match(r"/w/([^/?]+)", redirect_to)
+        session = AuthSession(
+            email=email,
+            storage_state=await request.storage_state(),
+            session_id=await _layout_session_id(request, redirect_to or "/"),
+            csrf_token=(await (await request.get("/auth/session")).json()).get("csrfToken"),
+            workspace_slug=match.group(1) if match else None,
+            created_at=time.time(),
+        )
+    finally:
+        await request.dispose()
+
+    if use_cache:
+        AUTH_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(session.__dict__), encoding="utf-8")
+    return session
+
+
+async def _layout_session_id(request: APIRequestContext, path: str) -> str | None:
+    """Read ``sessionId`` from the root layout data (``+layout.server.ts``)."""
+    response = await request.get(f"{path.split('?', 1)[0].rstrip('/')}/__data.json")
+    if not response.ok:
+        return None
+    for node in (await response.json()).get("nodes", []):
+        if node and node.get("type") == "data":
+            data = unflatten(node["data"])
+            if isinstance(data, dict) and data.get("sessionId"):
+                return data["sessionId"]
+    return None
+
+
+def unflatten(values: list[Any]) -> Any:
+    """Decode SvelteKit's ``devalue`` flat encoding (plain JSON types plus Date)."""
+    specials = {-1: None, -2: None, -3: math.nan, -4: math.inf, -5: -math.inf, -6: -0.0}
+    cache: dict[int, Any] = {}
+
+    def hydrate(index: int) -> Any:
+        if index in specials:
+            return specials[index]
+        if index in cache:
+            return cache[index]
+        value = values[index]
+        if isinstance(value, list) and value and isinstance(value[0], str):
+            result: Any = value[1] if value[0] == "Date" else [hydrate(i) for i in value[1:]]
+        elif isinstance(value, list):
+            result = [hydrate(i) for i in value]
+        elif isinstance(value, dict):
+            result = {key: hydrate(i) for key, i in value.items()}
+        else:
+            result = value
+        cache[index] = result
+        return result
+
+    return hydrate(0) if values else None
@@ -0,0 +1,161 @@
+"""Convex-aware "data settled" wait, in place of ``domcontentloaded`` + fixed sleeps.
+
+``networkidle`` never fires in this app, because the Convex sync WebSocket
+stays open, and ``domcontentloaded`` fires long before the inbox has data.
+So the TC scripts sleep 3 s before every action. :func:`install` adds an init
+script to a context that wraps ``WebSocket`` and ``fetch`` in every page and
+tracks:
+
+- Convex sync sockets still connecting
+- subscribed queries (``ModifyQuerySet`` ``Add``) without a first result
+- mutations and actions without a response
+- successful mutations whose commit timestamp no ``Transition`` has reached
+  yet, so their effect is not on screen
+- ``fetch`` calls in flight (SvelteKit ``__data.json`` loads, API routes)
+- the time of the last DOM change (a ``MutationObserver``)
+
+:func:`wait_for_settled` resolves once the document is parsed, nothing is
+pending and the DOM has not changed for ``quiet_ms``. It never raises: on
+timeout it returns what was still pending, so a page that never goes quiet
+(a ticking clock, a spinner that changes the DOM) costs at most ``timeout``
+ms. On a page without the init script it only waits for the document.
+
+    python -m harness.engine --settle --only TC004,TC005,TC006
+    python -m harness.journey TC006 --settle --repeat 10
+
+Benchmarks call it directly::
+
+    await install(context)
+    await page.goto(route, wait_until="commit")
+    await wait_for_settled(page)
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from playwright.async_api import BrowserContext, Error as PlaywrightError, Page
+
+QUIET_MS = 300.0
+SETTLE_TIMEOUT = 10000.0
+
+SETTLE_SCRIPT = """(() => {
+  if (window.__convexSettle) return;
+  const state = { sockets: 0, connecting: 0, queries: new Map(), mutations: new Map(), awaiting: [], fetches: 0, lastChange: performance.now() };
+  // Protocol timestamps are little-endian u64 in base64
+  const ts = (value) => {
+    if (typeof value === 'number') return BigInt(value);
+    try {
+      const bytes = atob(value);
+      let n = 0n;
+      for (let i = bytes.length - 1; i >= 0; i--) n = (n << 8n) | BigInt(bytes.charCodeAt(i));
+      return n;
+    } catch (e) {
+      return null;
+    }
+  };
+  const Native = window.WebSocket;
+  window.WebSocket = class extends Native {
+    constructor(...args) {
+      super(...args);
+      this.__settle = String(args[0]).includes('/sync') ? ++state.sockets : 0;
+      if (!this.__settle) return;
+      const id = this.__settle;
+      let open = false;
+      const opened = () => { if (!open) { open = true; state.connecting -= 1; } };
+      state.connecting += 1;
+      this.addEventListener('open', opened);
+      this.addEventListener('close', () => {
+        // The client resubscribes on a new socket; what this one still owed is void
+        opened();
+        for (const map of [state.queries, state.mutations]) for (const key of [...map.keys()]) if (key.startsWith(id + ':')) map.delete(key);
+        state.awaiting = state.awaiting.filter((m) => m.socket !== id);
+      });
+      this.addEventListener('message', (event) => {
+        let msg;
+        try { msg = JSON.parse(event.data); } catch (e) { return; }
+        if (msg.type === 'Transition') {
+          for (const m of msg.modifications || []) state.queries.delete(id + ':' + m.queryId);
+          const end = msg.endVersion ? ts(msg.endVersion.ts) : null;
+          if (end !== null) state.awaiting = state.awaiting.filter((m) => m.socket !== id || m.ts > end);
+        } else if (msg.type === 'MutationResponse' || msg.type === 'ActionResponse') {
+          const key = id + ':' + msg.requestId;
+          const udf = state.mutations.get(key);
+          state.mutations.delete(key);
+          const at = msg.success && msg.ts !== undefined ? ts(msg.ts) : null;
+          if (at !== null) state.awaiting.push({ socket: id, udf, ts: at });
+        }
+      });
+    }
+    send(data) {
+      if (this.__settle && typeof data === 'string') {
+        try {
+          const msg = JSON.parse(data);
+          const prefix = this.__settle + ':';
+          if (msg.type === 'ModifyQuerySet') {
+            for (const m of msg.modifications || []) {
+              if (m.type === 'Add') state.queries.set(prefix + m.queryId, m.udfPath);
+              else if (m.type === 'Remove') state.queries.delete(prefix + m.queryId);
+            }
+          } else if (msg.type === 'Mutation' || msg.type === 'Action') {
+            state.mutations.set(prefix + msg.requestId, msg.udfPath);
+          }
+        } catch (e) {}
+      }
+      return super.send(data);
+    }
+  };
+  const nativeFetch = window.fetch;
+  window.fetch = function (...args) {
+    state.fetches += 1;
+    return nativeFetch.apply(this, args).finally(() => { state.fetches -= 1; });
+  };
+  const touch = () => { state.lastChange = performance.now(); };
+  const observe = () => new MutationObserver(touch).observe(document.documentElement, { childList: true, subtree: true, attributes: true, characterData: true });
+  if (document.documentElement) observe(); else document.addEventListener('DOMContentLoaded', observe);
+  window.__convexSettle = {
+    settled: (quiet) =>
+      document.readyState !== 'loading' && !state.connecting && !state.queries.size && !state.mutations.size &&
+      !state.awaiting.length && !state.fetches && performance.now() - state.lastChange >= quiet,
+    pending: () => ({
+      connecting: state.connecting,
+      queries: [...state.queries.values()],
+      mutations: [...state.mutations.values()],
+      awaiting: state.awaiting.map((m) => m.udf),
+      fetches: state.fetches,
+      quiet_ms: Math.round(performance.now() - state.lastChange),
+    }),
+  };
+})();"""
+
+SETTLED_CHECK = "(quiet) => window.__convexSettle ? window.__convexSettle.settled(quiet) : document.readyState !== 'loading'"
+PENDING = "() => window.__convexSettle ? window.__convexSettle.pending() : null"
+
+
+@dataclass
+class Settled:
+    settled: bool
+    ms: float
+    pending: dict[str, Any] = field(default_factory=dict)  # what was still outstanding on timeout
+
+
+async def install(context: BrowserContext) -> None:
+    """Track Convex traffic, fetches and DOM changes in every page ``context`` opens from now on."""
+    await context.add_init_script(script=SETTLE_SCRIPT)
+
+
+async def wait_for_settled(page: Page, quiet_ms: float = QUIET_MS, timeout: float = SETTLE_TIMEOUT) -> Settled:
+    """Wait until no Convex query, mutation or fetch is pending and the DOM was quiet for ``quiet_ms``."""
+    start = time.perf_counter()
+    try:
+        await page.wait_for_function(SETTLED_CHECK, arg=quiet_ms, polling=50, timeout=timeout)
+        return Settled(True, (time.perf_counter() - start) * 1000)
+    except PlaywrightError:
+        ms = (time.perf_counter() - start) * 1000
+    try:
+        pending = await page.evaluate(PENDING) or {}
+    except PlaywrightError:
+        pending = {}
+    return Settled(False, ms, pending)
@@ -0,0 +1,439 @@
+"""Per-step DOM snapshots and offline assertions (an :class:`engine.Hook`).
+
+After every step that can change the page, :class:`DomSnapshotter` takes one
+``DOMSnapshot.captureSnapshot`` over CDP. That single call returns the
+flattened DOM with layout boxes and the computed ``visibility``. The
+snapshot is reduced to a compact node table (:class:`Snapshot`) and stored
+gzipped under its SHA-256 in ``tmp/snapshots/objects``, so unchanged pages
+are stored once.
+
+Expectation steps are then checked against the latest snapshot in Python
+with the same selector rules as :mod:`harness.batch_expect` (``text=``,
+``role=`` with implicit roles and accessible names, and a CSS subset of
+tags, ids, classes, attributes and descendant/child combinators). Compiled
+selectors and per-snapshot results are cached. A run of expectations after
+one action costs one CDP call instead of one polling loop each. A check that
+the snapshot does not satisfy falls back to the live ``expect`` (the page may
+still be loading), and the snapshot is retaken afterwards. A step answered
+offline never waited on the page, so it is left out of the ``step`` timings
+in the history; the rest of a snapshot run is tagged ``snapshots`` there,
+apart from plain runs.
+
+Every step's ``data.snapshot`` names its snapshot, so a failed test can be
+inspected after the run without running it again:
+
+    python -m harness.engine --snapshots --only TC013
+    python -m harness.snapshot show tmp/results/engine-<run>.json TC013        # failed step
+    python -m harness.snapshot query tmp/results/engine-<run>.json TC013:17 "text=Privacy"
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import gzip
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable
+
+from playwright.async_api import CDPSession, Error as PlaywrightError, Page
+
+from .batch_expect import Expectation, expectation_for
+from .config import TMP_DIR
+from .engine import Engine, Hook, StepRecord, TestRun
+from .plan import Step
+
+SNAPSHOTS_DIR = TMP_DIR / "snapshots"
+OBJECTS_DIR = SNAPSHOTS_DIR / "objects"
+CHANGING_OPS = {"goto", "click", "fill", "scroll", "sleep"}
+SKIPPED_TAGS = {"SCRIPT", "STYLE", "NOSCRIPT", "TEMPLATE", "HEAD"}
+IMPLICIT_ROLES = {
+    "BUTTON": "button", "SUMMARY": "button", "A": "link", "AREA": "link", "TEXTAREA": "textbox", "SELECT": "combobox",
+    "H1": "heading", "H2": "heading", "H3": "heading", "H4": "heading", "H5": "heading", "H6": "heading",
+    "UL": "list", "OL": "list", "LI": "listitem", "NAV": "navigation", "MAIN": "main", "DIALOG": "dialog",
+    "FORM": "form", "TABLE": "table", "TR": "row", "TD": "cell", "HEADER": "banner", "FOOTER": "contentinfo", "IMG": "img",
+}
+INPUT_ROLES = {
+    "button": "button", "submit": "button", "reset": "button", "checkbox": "checkbox", "radio": "radio",
+    "text": "textbox", "email": "textbox", "search": "textbox", "tel": "textbox", "url": "textbox",
+}
+_COMPOUND_RE = re.compile(r"^(\*|[A-Za-z][\w-]*)?((?:#[\w-]+|\.[\w-]+|\[[^\]]+\])*)$")
+_PART_RE = re.compile(r"#([\w-]+)|\.([\w-]+)|\[\s*([\w:-]+)\s*(?:([~^$*|]?=)\s*(\"[^\"]*\"|'[^']*'|[^\]\s]+))?\s*\]")
+
+
+class UnsupportedSelector(ValueError):
+    pass
+
+
+def _norm(text: str) -> str:
+    return " ".join(text.split())
+
+
+def text_matcher(query: str) -> Callable[[str], bool]:
+    """``text=`` semantics: ``/re/flags``, ``"exact"`` or case-insensitive substring (normalized text)."""
+    regex = re.fullmatch(r"/(.*)/([a-z]*)", query, re.S)
+    if regex:
+        pattern = re.compile(regex.group(1), re.I if "i" in regex.group(2) else 0)
+        return lambda text: pattern.search(text) is not None
+    if len(query) > 1 and query[0] in "\"'" and query[-1] == query[0]:
+        exact = _norm(query[1:-1])
+        return lambda text: text == exact
+    needle = _norm(query).lower()
+    return lambda text: needle in text.lower()
+
+
+@functools.lru_cache(maxsize=512)
+def compile_css(selector: str) -> tuple[tuple[tuple[str, tuple[Any, ...]], ...], ...]:
+    """``a > b c, d`` → per alternative, ``(combinator, (tag, id, classes, attrs))`` right to left."""
+    alternatives = []
+    for alternative in selector.split(","):
+        tokens = re.findall(r"(?:[^\s>\[]|\[[^\]]*\])+|>", alternative)
+        if not tokens:
+            raise UnsupportedSelector(selector)
+        chain, combinator = [], " "
+        for token in tokens:
+            if token == ">":
+                combinator = ">"
+                continue
+            match = _COMPOUND_RE.match(token)
+            if not match:
+                raise UnsupportedSelector(selector)
+            ids, classes, attrs = [], [], []
+            for part in _PART_RE.finditer(match.group(2)):
+                if part.group(1):
+                    ids.append(part.group(1))
+                elif part.group(2):
+                    classes.append(part.group(2))
+                else:
+                    value = part.group(5)
+                    if value and value[0] in "\"'":
+                        value = value[1:-1]
+                    attrs.append((part.group(3).lower(), part.group(4), value))
+            tag = (match.group(1) or "*").upper()
+            chain.append((combinator, (tag, tuple(ids), tuple(classes), tuple(attrs))))
+            combinator = " "
+        alternatives.append(tuple(reversed(chain)))
+    return tuple(alternatives)
+
+
+def _attr_ok(actual: str | None, op: str | None, expected: str | None) -> bool:
+    if actual is None:
+        return False
+    if op is None:
+        return True
+    if op == "=":
+        return actual == expected
+    if op == "~=":
+        return expected in actual.split()
+    if op == "^=":
+        return actual.startswith(expected)
+    if op == "$=":
+        return actual.endswith(expected)
+    if op == "*=":
+        return expected in actual
+    return actual == expected or actual.startswith(f"{expected}-")  # |=
+
+
+class Snapshot:
+    """Compact node table of one document with text, visibility and selector queries."""
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        self.data = data
+        self.url: str = data.get("url", "")
+        self.types: list[int] = data["type"]
+        self.names: list[str] = data["name"]
+        self.parents: list[int] = data["parent"]
+        self.attrs: list[dict[str, str]] = data["attrs"]
+        self.bounds: list[list[float] | None] = data["bounds"]
+        self.visibility: list[str | None] = data["visibility"]
+        self.children: list[list[int]] = [[] for _ in self.types]
+        for index, parent in enumerate(self.parents):
+            if parent >= 0:
+                self.children[parent].append(index)
+        # Nodes are in document (pre-)order, so children come after their parent
+        raw = [""] * len(self.types)
+        for index in range(len(self.types) - 1, -1, -1):
+            if self.types[index] == 3:
+                raw[index] = data["value"][index] or ""
+            elif self.names[index] not in SKIPPED_TAGS:
+                raw[index] = "".join(raw[c] for c in self.children[index])
+        self.texts = [_norm(t) for t in raw]
+        self.elements = [i for i, t in enumerate(self.types) if t == 1]
+        self.by_id = {a["id"]: i for i, a in enumerate(self.attrs) if a.get("id")}
+        self._cache: dict[str, list[int]] = {}
+
+    @classmethod
+    def from_cdp(cls, raw: dict[str, Any]) -> Snapshot:
+        """Reduce ``DOMSnapshot.captureSnapshot`` output (main frame) to the compact table."""
+        strings = raw["strings"]
+        doc = raw["documents"][0]
+        nodes = doc["nodes"]
+
+        def s(i: int) -> str | None:
+            return strings[i] if i >= 0 else None
+
+        count = len(nodes["parentIndex"])
+        bounds: list[list[float] | None] = [None] * count
+        visibility: list[str | None] = [None] * count
+        layout = doc["layout"]
+        for row, node in enumerate(layout["nodeIndex"]):
+            bounds[node] = layout["bounds"][row]
+            styles = layout["styles"][row]
+            visibility[node] = s(styles[0]) if styles else None
+        types = nodes["nodeType"]
+        return cls(
+            {
+                "url": s(doc["documentURL"]) or "",
+                "type": types,
+                "name": [s(i) or "" for i in nodes["nodeName"]],
+                "parent": nodes["parentIndex"],
+                "value": [s(v) if t == 3 else None for t, v in zip(types, nodes["nodeValue"])],
+                "attrs": [{s(a[k]).lower(): s(a[k + 1]) or "" for k in range(0, len(a), 2)} if a else {} for a in nodes["attributes"]],
+                "bounds": bounds,
+                "visibility": visibility,
+            }
+        )
+
+    def visible(self, node: int) -> bool:
+        box = self.bounds[node]
+        return bool(box and box[2] > 0 and box[3] > 0 and self.visibility[node] not in ("hidden", "collapse"))
+
+    def text_nodes(self, query: str) -> list[int]:
+        """First element in document order whose text matches, narrowed to its deepest matching descendant."""
+        test = text_matcher(query)
+        body = next((i for i in self.elements if self.names[i] == "BODY"), None)
+        if body is None:
+            return []
+        start = next((i for i in self.elements if i >= body and self.names[i] not in SKIPPED_TAGS and test(self.texts[i])), None)
+        if start is None:
+            return []
+        node = start
+        while True:
+            child = next((c for c in self.children[node] if self.types[c] == 1 and self.names[c] not in SKIPPED_TAGS and test(self.texts[c])), None)
+            if child is None:
+                return [node]
+            node = child
+
+    def role_of(self, node: int) -> str | None:
+        attrs = self.attrs[node]
+        if attrs.get("role"):
+            return attrs["role"].split()[0]
+        tag = self.names[node]
+        if tag == "INPUT":
+            return INPUT_ROLES.get(attrs.get("type", "text").lower())
+        if tag == "A" and "href" not in attrs:
+            return None
+        if tag == "IMG" and not attrs.get("alt"):
+            return None
+        return IMPLICIT_ROLES.get(tag)
+
+    def accessible_name(self, node: int) -> str:
+        attrs = self.attrs[node]
+        if attrs.get("aria-label"):
+            return _norm(attrs["aria-label"])
+        if attrs.get("aria-labelledby"):
+            return _norm(" ".join(self.texts[self.by_id[i]] for i in attrs["aria-labelledby"].split() if i in self.by_id))
+        if "id" in attrs:
+            label = next((i for i in self.elements if self.names[i] == "LABEL" and self.attrs[i].get("for") == attrs["id"]), None)
+            if label is not None:
+                return self.texts[label]
+        return _norm(attrs.get("alt") or self.texts[node] or attrs.get("placeholder") or attrs.get("title") or "")
+
+    def role_nodes(self, role: str, name: str | None) -> list[int]:
+        test = text_matcher(name) if name else (lambda _: True)
+        return [i for i in self.elements if self.role_of(i) == role and self.visible(i) and test(self.accessible_name(i))]
+
+    def _compound_ok(self, node: int, compound: tuple[Any, ...]) -> bool:
+        tag, ids, classes, attrs = compound
+        if tag != "*" and self.names[node] != tag:
+            return False
+        node_attrs = self.attrs[node]
+        if any(node_attrs.get("id") != i for i in ids):
+            return False
+        if classes and not set(classes) <= set(node_attrs.get("class", "").split()):
+            return False
+        return all(_attr_ok(node_attrs.get(name), op, value) for name, op, value in attrs)
+
+    def _chain_ok(self, node: int, chain: tuple[tuple[str, tuple[Any, ...]], ...]) -> bool:
+        combinator, compound = chain[0]
+        if not self._compound_ok(node, compound):
+            return False
+        if len(chain) == 1:
+            return True
+        parent = self.parents[node]
+        if combinator == ">":
+            return parent >= 0 and self.types[parent] == 1 and self._chain_ok(parent, chain[1:])
+        while parent >= 0 and self.types[parent] == 1:
+            if self._chain_ok(parent, chain[1:]):
+                return True
+            parent = self.parents[parent]
+        return False
+
+    def css_nodes(self, selector: str) -> list[int]:
+        alternatives = compile_css(selector)
+        return [i for i in self.elements if any(self._chain_ok(i, chain) for chain in alternatives)]
+
+    def query(self, selector: str) -> list[int]:
+        """Nodes for a ``text=``, ``role=`` or CSS selector; raises :class:`UnsupportedSelector` otherwise."""
+        if selector not in self._cache:
+            expectation = Expectation.parse(selector)
+            if expectation is None:
+                raise UnsupportedSelector(selector)
+            if expectation.kind == "text":
+                nodes = self.text_nodes(expectation.query)
+            elif expectation.kind == "role":
+                nodes = self.role_nodes(expectation.query, expectation.name)
+            else:
+                nodes = self.css_nodes(expectation.query)
+            self._cache[selector] = nodes
+        return self._cache[selector]
+
+    def check(self, expectation: Expectation) -> bool:
+        nodes = self.query(expectation.label)
+        if not nodes:
+            return False
+        if expectation.contains is not None:
+            return _norm(expectation.contains) in self.texts[nodes[0]]
+        return any(self.visible(n) for n in nodes) if expectation.kind == "role" else self.visible(nodes[0])
+
+    def describe(self, node: int) -> str:
+        attrs = self.attrs[node]
+        ident = f"#{attrs['id']}" if "id" in attrs else ""
+        classes = "".join(f".{c}" for c in attrs.get("class", "").split()[:3])
+        return f"<{self.names[node].lower()}{ident}{classes}> {'visible' if self.visible(node) else 'hidden '} {self.texts[node][:80]!r}"
+
+
+def object_path(sha: str) -> Path:
+    return OBJECTS_DIR / sha[:2] / f"{sha}.json.gz"
+
+
+def encode(snapshot: Snapshot) -> tuple[str, bytes]:
+    payload = json.dumps(snapshot.data, separators=(",", ":")).encode()
+    return hashlib.sha256(payload).hexdigest(), payload
+
+
+def store_snapshot(sha: str, payload: bytes) -> None:
+    """Write ``payload`` gzipped under ``sha`` unless already present."""
+    path = object_path(sha)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(gzip.compress(payload, compresslevel=6))
+        tmp.replace(path)
+
+
+def load_snapshot(sha: str) -> Snapshot:
+    return Snapshot(json.loads(gzip.decompress(object_path(sha).read_bytes())))
+
+
+class DomSnapshotter(Hook):
+    def __init__(self) -> None:
+        self.sessions: dict[Page, CDPSession] = {}
+        self.latest: dict[int, tuple[str, Snapshot]] = {}  # id(run) -> (sha, snapshot)
+        self.pending: dict[int, list[asyncio.Task[None]]] = {}
+        self.offline = 0
+        self.fallbacks = 0
+
+    async def capture(self, run: TestRun) -> Snapshot:
+        page = run.page
+        if page not in self.sessions:
+            self.sessions[page] = await run.context.new_cdp_session(page)
+        raw = await self.sessions[page].send("DOMSnapshot.captureSnapshot", {"computedStyles": ["visibility"]})
+        return Snapshot.from_cdp(raw)
+
+    async def verify(self, run: TestRun, step: Step, record: StepRecord) -> bool:
+        expectation = expectation_for(step)
+        latest = self.latest.get(id(run))
+        if expectation is None or latest is None:
+            return False
+        try:
+            ok = latest[1].check(expectation)
+        except UnsupportedSelector:
+            return False
+        record.data["offline"] = ok
+        self.offline += ok
+        self.fallbacks += not ok
+        return ok
+
+    async def step_finished(self, run: TestRun, step: Step, record: StepRecord) -> None:
+        if record.status not in ("pass", "fail"):
+            return
+        latest = self.latest.get(id(run))
+        if latest and step.op not in CHANGING_OPS and record.data.get("offline") and record.status == "pass":
+            record.data["snapshot"] = latest[0]  # answered from this snapshot; the page was not touched
+            return
+        try:
+            snapshot = await self.capture(run)
+        except PlaywrightError as exc:
+            record.data["snapshot_error"] = str(exc).splitlines()[0][:120]
+            self.latest.pop(id(run), None)
+            return
+        sha, payload = encode(snapshot)
+        self.latest[id(run)] = (sha, snapshot)
+        record.data["snapshot"] = sha
+        self.pending.setdefault(id(run), []).append(asyncio.create_task(asyncio.to_thread(store_snapshot, sha, payload)))
+
+    async def test_finished(self, run: TestRun) -> None:
+        await asyncio.gather(*self.pending.pop(id(run), []))
+        self.latest.pop(id(run), None)
+        for page in [p for p in self.sessions if p.context == run.context]:
+            del self.sessions[page]
+
+    async def engine_finished(self, engine: Engine, runs: list[TestRun]) -> None:
+        print(f"snapshots: {self.offline} checks answered offline, {self.fallbacks} fell back to live expect; stored in {OBJECTS_DIR}")
+
+
+def step_snapshot(report_path: Path, spec: str) -> tuple[dict[str, Any], Snapshot]:
+    """``TC013`` (its failed or last snapshotted step) or ``TC013:17`` from an engine report."""
+    test_id, _, index = spec.partition(":")
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    test = next((t for t in report["tests"] if t["id"] == test_id.upper()), None)
+    if test is None:
+        raise SystemExit(f"{test_id} is not in {report_path}")
+    steps = [s for s in test["steps"] if s.get("data", {}).get("snapshot")]
+    if index:
+        steps = [s for s in steps if s["index"] == int(index)]
+    else:
+        failed = [s for s in steps if s["status"] == "fail"]
+        steps = failed or steps[-1:]
+    if not steps:
+        raise SystemExit(f"no snapshot for {spec} (was the run started with --snapshots?)")
+    return steps[0], load_snapshot(steps[0]["data"]["snapshot"])
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Query the DOM snapshots of an engine run")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("show", "visible text outline of a step's snapshot"), ("query", "evaluate selectors against a step's snapshot")):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument("report", type=Path, help="engine report JSON")
+        command.add_argument("step", help="TC013 (failed step) or TC013:17")
+        if name == "query":
+            command.add_argument("selectors", nargs="+")
+    args = parser.parse_args(argv)
+
+    step, snapshot = step_snapshot(args.report, args.step)
+    print(f"step {step['index']} {step['label']} [{step['status']}] {snapshot.url}")
+    if args.command == "show":
+        for node in snapshot.elements:
+            own_text = any(snapshot.types[c] == 3 and snapshot.texts[c] for c in snapshot.children[node])
+            if own_text and snapshot.visible(node) and snapshot.names[node] not in SKIPPED_TAGS:
+                print(f"  {snapshot.describe(node)}")
+        return
+    for selector in args.selectors:
+        try:
+            nodes = snapshot.query(selector)
+        except UnsupportedSelector:
+            print(f"{selector}: not supported offline")
+            continue
+        print(f"{selector}: {len(nodes)} match(es)")
+        for node in nodes[:10]:
+            print(f"  {snapshot.describe(node)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Small, dependency-free summary statistics used by the benchmarks."""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+
+
+def percentile(values: Iterable[float], q: float) -> float:
+    """Linear-interpolated percentile, ``q`` in [0, 100]."""
+    ordered = sorted(values)
+    if not ordered:
+        return math.nan
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: Iterable[float], digits: int = 2) -> dict[str, float]:
+    """count/min/median/p95/p99/max/mean of ``values``; empty input gives ``{"count": 0}``."""
+    data = list(values)
+    if not data:
+        return {"count": 0}
+    return {
+        "count": len(data),
+        "min": round(min(data), digits),
+        "median": round(percentile(data, 50), digits),
+        "p95": round(percentile(data, 95), digits),
+        "p99": round(percentile(data, 99), digits),
+        "max": round(max(data), digits),
+        "mean": round(sum(data) / len(data), digits),
+    }
@@ -0,0 +1,204 @@
+"""Run targets: the Vite dev server or a local production build.
+
+The TC scripts, and the harness by default, drive ``http://localhost:5173``,
+the dev server. Its timings include on-demand transforms, the HMR client and
+unbundled module waterfalls, none of which ship to users. The ``prod``
+target builds the app once (``vite build``), serves it with ``vite preview``
+on another port, and points the same suite at it:
+
+- ``dev``  ``Settings.base_url`` as configured; nothing is started
+- ``prod`` ``vite build`` unless ``.svelte-kit/output`` is newer than every
+  source file, then ``vite preview --port 4173 --strictPort`` for the
+  duration of the run
+
+Every result is tagged ``target=dev|prod``. Performance budgets should only
+be checked against ``prod`` numbers.
+
+    python -m harness.engine --target dev,prod --only TC013,TC020
+    python -m harness.target serve          # build + preview until Ctrl-C
+    python -m harness.target compare        # latest dev vs prod engine runs
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import dataclasses
+import os
+import signal
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Iterator
+from pathlib import Path
+
+from .config import REPO_ROOT, Settings, load_settings
+from .results import ResultsStore, load_history
+from .stats import percentile
+
+TARGETS = ("dev", "prod")
+PREVIEW_PORT = 4173
+BUILD_INPUTS = ("src", "static", "svelte.config.js", "vite.config.ts", "package.json", "package-lock.json")
+
+
+class TargetError(RuntimeError):
+    pass
+
+
+def _newest_mtime(paths: list[Path]) -> float:
+    newest = 0.0
+    for path in paths:
+        if path.is_dir():
+            newest = max([newest, *(p.stat().st_mtime for p in path.rglob("*") if p.is_file())])
+        elif path.exists():
+            newest = max(newest, path.stat().st_mtime)
+    return newest
+
+
+def build_is_fresh(root: Path = REPO_ROOT) -> bool:
+    """True when the build output is newer than every build input."""
+    output = root / ".svelte-kit" / "output"
+    if not output.exists():
+        return False
+    return _newest_mtime([output]) >= _newest_mtime([root / name for name in BUILD_INPUTS])
+
+
+def build(root: Path = REPO_ROOT, store: ResultsStore | None = None) -> float:
+    """``vite build`` in ``root``; returns the wall time in ms."""
+    print("building production bundle (vite build)...")
+    start = time.perf_counter()
+    process = subprocess.run(["npx", "vite", "build"], cwd=root, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if process.returncode != 0:
+        tail = "\n".join((process.stderr or process.stdout).strip().splitlines()[-20:])
+        raise TargetError(f"vite build failed ({process.returncode}):\n{tail}")
+    if store:
+        store.record("build_wall", elapsed)
+    print(f"built in {elapsed / 1000:.1f}s")
+    return elapsed
+
+
+def wait_until_up(url: str, process: subprocess.Popen[bytes], timeout_s: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise TargetError(f"vite preview exited with {process.returncode} before {url} answered")
+        try:
+            urllib.request.urlopen(url, timeout=2).close()
+            return
+        except urllib.error.HTTPError:
+            return  # any HTTP answer means the server is up
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.25)
+    raise TargetError(f"vite preview did not answer on {url} within {timeout_s:.0f}s")
+
+
+@contextlib.contextmanager
+def preview_server(port: int = PREVIEW_PORT, rebuild: bool | None = None, root: Path = REPO_ROOT) -> Iterator[str]:
+    """Build if needed (``rebuild=None``), serve with ``vite preview`` and yield its base URL."""
+    store = ResultsStore("target", target="prod")
+    if rebuild or (rebuild is None and not build_is_fresh(root)):
+        build(root, store)
+    url = f"http://localhost:{port}"
+    process = subprocess.Popen(
+        ["npx", "vite", "preview", "--port", str(port), "--strictPort"],
+        cwd=root,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=os.environ.copy(),
+        start_new_session=True,  # npx spawns node; stop the whole group
+    )
+    try:
+        start = time.perf_counter()
+        wait_until_up(url, process)
+        store.record("preview_start", (time.perf_counter() - start) * 1000)
+        yield url
+    finally:
+        if process.poll() is None:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+
+
+@contextlib.contextmanager
+def target_settings(settings: Settings, target: str, port: int = PREVIEW_PORT, rebuild: bool | None = None) -> Iterator[Settings]:
+    """``settings`` pointed at ``target``, with the preview server running for ``prod``."""
+    if target == "dev":
+        yield settings
+    elif target == "prod":
+        with preview_server(port, rebuild) as url:
+            yield dataclasses.replace(settings, base_url=url)
+    else:
+        raise ValueError(f"unknown target {target!r}; choose from {', '.join(TARGETS)}")
+
+
+def parse_targets(spec: str) -> list[str]:
+    targets = [t.strip() for t in spec.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in TARGETS]
+    if unknown:
+        raise ValueError(f"unknown target(s) {', '.join(unknown)}; choose from {', '.join(TARGETS)}")
+    return targets or ["dev"]
+
+
+def print_side_by_side(timings: dict[str, dict[str, list[float]]]) -> None:
+    """``target -> test -> [ms]`` as one row per test with each target's median and the prod/dev ratio."""
+    targets = [t for t in TARGETS if t in timings]
+    tests = sorted({test for by_test in timings.values() for test in by_test})
+    print(f"{'test':<7}" + "".join(f"{t:>12}" for t in targets) + ("   prod/dev" if len(targets) == 2 else ""))
+    for test in tests:
+        medians = {t: percentile(timings[t][test], 50) if timings[t].get(test) else None for t in targets}
+        cells = "".join(f"{m:>10.0f}ms" if m is not None else f"{'-':>12}" for m in medians.values())
+        ratio = ""
+        if len(targets) == 2 and medians["dev"] and medians["prod"] is not None:
+            ratio = f"   {medians['prod'] / medians['dev']:8.2f}x"
+        print(f"{test:<7}{cells}{ratio}")
+
+
+def latest_timings(profile: str = "none") -> dict[str, dict[str, list[float]]]:
+    """Per-test ``test`` timings of the most recent engine run of each target."""
+    latest: dict[str, str] = {}
+    records = [r for r in load_history(suite="engine", metric="test") if r.get("profile") == profile and r.get("status") == "pass"]
+    for record in records:
+        latest[record.get("target", "dev")] = record["run"]
+    timings: dict[str, dict[str, list[float]]] = {}
+    for record in records:
+        target = record.get("target", "dev")
+        if latest.get(target) == record["run"]:
+            timings.setdefault(target, {}).setdefault(record["test"], []).append(record["value"])
+    return timings
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Production-build target: build, preview, compare with dev")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="build if stale and run vite preview until interrupted")
+    serve.add_argument("--port", type=int, default=PREVIEW_PORT)
+    serve.add_argument("--rebuild", action="store_true", help="build even when the output is up to date")
+    compare = sub.add_parser("compare", help="latest dev vs prod engine timings from the history")
+    compare.add_argument("--profile", default="none")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        timings = latest_timings(args.profile)
+        if not timings:
+            raise SystemExit("no engine runs in the history yet")
+        print_side_by_side(timings)
+        return
+
+    settings = load_settings()
+    try:
+        with target_settings(settings, "prod", args.port, True if args.rebuild else None) as prod:
+            print(f"serving production build on {prod.base_url} (TESTSPRITE_BASE_URL={prod.base_url} for other tools)")
+            while True:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    except TargetError as exc:
+        raise SystemExit(str(exc)) from exc
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Budget resolution per route, profile and target, and the violations of a set of visits."""
+
+from __future__ import annotations
+
+import pytest
+
+from harness.budgets import Budget, budgets_for, check_visits
+
+CONFIG = {
+    "level": "fail",
+    "targets": {"dev": "warn", "prod": "fail"},
+    "routes": {
+        "/w/{slug}/inbox": {
+            "*": {"lcp_ms": 2500, "requests": {"max": 80, "level": "warn"}},
+            "slow-3g": {"lcp_ms": 8000, "transfer_bytes": 1_500_000},
+        },
+    },
+}
+INBOX = "/w/{slug}/inbox"
+
+
+def test_profile_overlays_the_route_defaults():
+    assert budgets_for(CONFIG, INBOX, "none") == {
+        "lcp_ms": Budget("lcp_ms", 2500.0, "fail"),
+        "requests": Budget("requests", 80.0, "warn"),
+    }
+    assert budgets_for(CONFIG, INBOX, "slow-3g") == {
+        "lcp_ms": Budget("lcp_ms", 8000.0, "fail"),
+        "requests": Budget("requests", 80.0, "warn"),
+        "transfer_bytes": Budget("transfer_bytes", 1_500_000.0, "fail"),
+    }
+    assert budgets_for(CONFIG, "/login", "none") == {}
+
+
+def test_target_caps_the_level():
+    assert {b.level for b in budgets_for(CONFIG, INBOX, "slow-3g", target="dev").values()} == {"warn"}
+    # Targets without an entry are not capped
+    assert budgets_for(CONFIG, INBOX, "none", target="staging")["lcp_ms"].level == "fail"
+
+
+@pytest.mark.parametrize(
+    ("config", "message"),
+    [
+        ({"routes": {"/": {"*": {"fcp_ms": 1}}}}, "unknown budget metric 'fcp_ms'"),
+        ({"routes": {"/": {"*": {"lcp_ms": {"max": 1, "level": "error"}}}}}, "level must be warn or fail"),
+        ({"targets": {"prod": "block"}}, "target prod"),
+    ],
+)
+def test_invalid_config(config, message):
+    with pytest.raises(ValueError, match=message):
+        budgets_for(config, "/", "none")
+
+
+def visit(route: str, **metrics: float) -> dict:
+    return {"route": route, "metrics": metrics}
+
+
+def test_check_visits():
+    visits = [visit(INBOX, lcp_ms=3100, requests=120, dom_nodes=9000), visit(INBOX, lcp_ms=2400), visit("/login", lcp_ms=9000)]
+    violations = check_visits(CONFIG, visits, "none", "TC005")
+    assert [(v.metric, v.actual, v.level) for v in violations] == [("lcp_ms", 3100, "fail"), ("requests", 120, "warn")]
+    assert violations[0].test == "TC005" and violations[0].delta == 600
+    assert violations[0].describe() == "/w/{slug}/inbox lcp_ms 3100 > 2500 (+600, +24%)"
+    assert {v.level for v in check_visits(CONFIG, visits, "none", "TC005", enforce="warn")} == {"warn"}
+    assert {v.level for v in check_visits(CONFIG, visits, "none", "TC005", target="dev")} == {"warn"}
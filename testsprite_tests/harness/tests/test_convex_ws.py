@@ -0,0 +1,82 @@
+"""Decoding of Convex sync frames: subscriptions, mutation timings and sizes."""
+
+from __future__ import annotations
+
+import base64
+import json
+
+import pytest
+
+from harness.convex_ws import SyncLog, decode_ts, is_convex_socket
+
+
+def ts(value: int) -> str:
+    return base64.b64encode(value.to_bytes(8, "little")).decode()
+
+
+@pytest.mark.parametrize(("value", "decoded"), [(ts(1_700_000_000_123), 1_700_000_000_123), (42, 42), (42.9, 42), ("abc", None), (None, None), ({}, None)])
+def test_decode_ts(value, decoded):
+    assert decode_ts(value) == decoded
+
+
+def frame(**message) -> str:
+    return json.dumps(message)
+
+
+def add(query: int, udf: str) -> dict:
+    return {"type": "Add", "queryId": query, "udfPath": udf}
+
+
+def test_subscriptions_per_socket():
+    log = SyncLog()
+    log.sent(1, 0, frame(type="ModifyQuerySet", modifications=[add(0, "inbox:list"), add(1, "users:me")]))
+    log.sent(2, 0, frame(type="ModifyQuerySet", modifications=[add(0, "inbox:list")]))
+    # Query ids are per socket: this removes socket 1's users:me only, and an unknown id is ignored
+    log.sent(1, 5, frame(type="ModifyQuerySet", modifications=[{"type": "Remove", "queryId": 1}, {"type": "Remove", "queryId": 9}]))
+    log.sent(1, 6, frame(type="ModifyQuerySet", modifications=[add(2, "flashcards:due")]))
+    log.received(2, 7, frame(type="Transition", modifications=[{"type": "QueryUpdated", "queryId": 0, "value": [1, 2]}, {"type": "QueryFailed", "queryId": 5}]))
+    summary = log.summary()
+    assert summary["subscriptions"] == {"added": 4, "removed": 1, "peak_active": 3}
+    assert summary["queries"]["inbox:list"] == {"subscribed": 2, "updates": 1, "update_bytes": len("[1, 2]")}
+    assert summary["queries"]["users:me"] == {"subscribed": 1, "removed": 1}
+    assert summary["queries"]["?"] == {"failed": 1}
+
+
+def test_mutation_response_and_transition():
+    log = SyncLog()
+    log.sent(1, 0, frame(type="ModifyQuerySet", modifications=[add(0, "inbox:list")]))
+    log.sent(1, 100, frame(type="Mutation", requestId=0, udfPath="inbox:archive"))
+    log.sent(2, 100, frame(type="Mutation", requestId=0, udfPath="inbox:archive"))
+    log.sent(1, 110, frame(type="Action", requestId=1, udfPath="ai:flashcards"))
+    log.received(1, 150, frame(type="MutationResponse", requestId=0, success=True, ts=ts(20)))
+    log.received(2, 160, frame(type="MutationResponse", requestId=0, success=False))
+    # An older version does not include the write; the first one at or past its ts does
+    log.received(1, 170, frame(type="Transition", endVersion={"ts": ts(19)}, modifications=[]))
+    log.received(1, 190, frame(type="Transition", endVersion={"ts": ts(21)}, modifications=[{"type": "QueryUpdated", "queryId": 0, "value": None}]))
+    log.received(1, 300, frame(type="Transition", endVersion={"ts": ts(30)}, modifications=[]))
+    ok, failed, action = log.summary()["mutations"]
+    assert ok == {"udf": "inbox:archive", "kind": "mutation", "status": "ok", "server_ms": 50.0, "update_ms": 90.0, "updated": ["inbox:list"]}
+    assert (failed["status"], failed["server_ms"], failed["update_ms"]) == ("error", 60.0, None)
+    assert (action["kind"], action["status"], action["server_ms"]) == ("action", "pending", None)
+    latency = log.summary()["latency"]
+    assert (latency["server"]["count"], latency["server"]["max"], latency["update"]["count"]) == (2, 60.0, 1)
+
+
+def test_frames_bytes_and_undecoded():
+    log = SyncLog()
+    log.sent(1, 0, frame(type="Connect"))
+    log.sent(1, 0, "héllo")
+    log.received(1, 0, b"\xff\x00")
+    log.received(1, 0, "[1]")
+    summary = log.summary()
+    assert summary["frames"] == {"sent": 2, "received": 2}
+    assert summary["bytes"] == {"sent": len(frame(type="Connect")) + 6, "received": 5}
+    assert summary["undecoded"] == 2
+    assert summary["messages"] == {"sent": {"Connect": 1}, "received": {}}
+
+
+def test_is_convex_socket():
+    assert is_convex_socket("wss://happy-otter-123.convex.cloud/api/1.9/sync", "https://happy-otter-123.convex.cloud")
+    assert not is_convex_socket("wss://other.convex.cloud/api/1.9/sync", "https://happy-otter-123.convex.cloud")
+    assert is_convex_socket("ws://127.0.0.1:3210/api/sync", None)
+    assert not is_convex_socket("ws://localhost:5173/vite-hmr", None)
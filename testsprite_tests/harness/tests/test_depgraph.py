@@ -0,0 +1,79 @@
+"""Resolution of the fail-fast gates against a compiled plan."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from harness.depgraph import load_graph, logs_in
+from harness.plan import CompiledTest, Step
+
+
+def compiled(test_id: str, *steps: Step) -> CompiledTest:
+    return CompiledTest(test_id, "", "", steps=list(steps))
+
+
+GOTO = Step("goto", url="/login")
+LOGIN = Step("fill", "input[type=password]", value="{login_password}")
+TESTS = [
+    compiled("TC001", GOTO, LOGIN),
+    compiled("TC002", GOTO),
+    compiled("TC003", GOTO, LOGIN),
+    compiled("TC004", GOTO, Step("fill", "#pw", value="hunter2", note="Enter password")),
+    compiled("TC005", GOTO, LOGIN),
+]
+
+
+@pytest.mark.parametrize(
+    ("step", "expected"),
+    [
+        (LOGIN, True),
+        (Step("fill", "#pw", value="hunter2", note="Input Password"), True),
+        (Step("fill", "#pw", value="", note="clear password"), False),
+        (Step("fill", "#email", value="{login_password}"), True),
+        (Step("click", "#pw", note="password field"), False),
+        (Step("fill", "#name", value="Ada"), False),
+    ],
+)
+def test_logs_in(step, expected):
+    assert logs_in(compiled("TC999", GOTO, step)) is expected
+
+
+def graph(tmp_path, *gates: dict):
+    path = tmp_path / "dependencies.json"
+    path.write_text(json.dumps({"gates": list(gates)}))
+    return load_graph(TESTS, path)
+
+
+def test_load_graph(tmp_path):
+    auth, inbox, admin = graph(
+        tmp_path,
+        {"name": "auth", "test": "TC001", "gates": "login", "exclude": ["TC003"]},
+        {"name": "inbox", "route": "inbox", "requires": ["auth"], "gates": ["tc001", " TC004", "TC005"]},
+        {"name": "admin", "route": "admin"},
+    )
+    assert (auth.test, auth.route, auth.requires, auth.dependents) == ("TC001", None, (), ("TC004", "TC005"))
+    assert auth.label == "TC001"
+    # A test that is itself a gate is never blocked by a later one
+    assert (inbox.route, inbox.requires, inbox.dependents) == ("inbox", ("auth",), ("TC004", "TC005"))
+    assert inbox.label == "/w/{slug}/inbox"
+    assert admin.dependents == ()
+
+
+def test_missing_file_has_no_gates(tmp_path):
+    assert load_graph(TESTS, tmp_path / "absent.json") == []
+
+
+@pytest.mark.parametrize(
+    ("gates", "message"),
+    [
+        ([{"name": "auth", "gates": "login"}], "exactly one of test or route"),
+        ([{"name": "auth", "test": "TC001", "route": "inbox"}], "exactly one of test or route"),
+        ([{"name": "inbox", "route": "inbox", "requires": ["auth"]}, {"name": "auth", "test": "TC001"}], "requires auth, which must be declared before it"),
+        ([{"name": "auth", "test": "TC001", "gates": "all"}], 'gates must be "login" or a list'),
+    ],
+)
+def test_invalid_graph(tmp_path, gates, message):
+    with pytest.raises(ValueError, match=message):
+        graph(tmp_path, *gates)
@@ -0,0 +1,66 @@
+"""Per-route accounting of a recorded request log."""
+
+from __future__ import annotations
+
+import pytest
+
+from harness.network import _cache_status, account
+
+APP = "http://localhost:5173/_app/immutable/entry/app.js"
+FONT = "http://localhost:5173/fonts/inter.woff2"
+API = "http://localhost:5173/api/inbox"
+
+
+def entry(route: str, url: str, kind: str, transfer: int, cache: str = "network", status: int | str | None = 200) -> dict:
+    return {"route": route, "url": url, "type": kind, "transfer": transfer, "decoded": transfer * 3, "cache": cache, "status": status}
+
+
+ENTRIES = [
+    entry("/login", APP, "Script", 1000),
+    entry("/login", FONT, "Font", 400),
+    entry("/login", API, "Fetch", 50, status="failed"),
+    entry("/w/{slug}/inbox", APP, "Script", 1000),  # downloaded again: should have been cached
+    entry("/w/{slug}/inbox", FONT, "Font", 0, cache="memory"),
+    entry("/w/{slug}/inbox", API, "Fetch", 200),
+    entry("/w/{slug}/inbox", API, "Fetch", 200),  # duplicate, but not a static type
+    entry("/w/{slug}/inbox", APP, "Script", 0, cache="revalidated", status=304),
+]
+
+
+def test_routes_in_first_seen_order():
+    assert list(account(ENTRIES)) == ["/login", "/w/{slug}/inbox"]
+
+
+def test_totals():
+    login, inbox = account(ENTRIES).values()
+    assert (login["requests"], login["transfer_bytes"], login["decoded_bytes"], login["failed"], login["cached"]) == (3, 1450, 4350, 1, 0)
+    assert (inbox["requests"], inbox["transfer_bytes"], inbox["cached"], inbox["failed"]) == (5, 1400, 1, 0)
+    assert inbox["by_type"] == {"Script": {"count": 2, "transfer": 1000}, "Fetch": {"count": 2, "transfer": 400}, "Font": {"count": 1, "transfer": 0}}
+
+
+def test_duplicates_and_uncached_repeats():
+    login, inbox = account(ENTRIES).values()
+    assert login["duplicates"] == [] and login["uncached_repeats"] == 0
+    assert inbox["duplicates"] == [{"url": APP, "count": 2, "transfer": 1000}, {"url": API, "count": 2, "transfer": 400}]
+    # Only the second network download of the script counts: fetches, cache hits and 304s do not
+    assert (inbox["uncached_repeats"], inbox["uncached_repeat_bytes"]) == (1, 1000)
+
+
+def test_top_urls_by_transfer():
+    inbox = account(ENTRIES, top=1)["/w/{slug}/inbox"]
+    assert [(u["url"], u["count"], u["transfer"], u["decoded"]) for u in inbox["top"]] == [(APP, 2, 1000, 3000)]
+
+
+@pytest.mark.parametrize(
+    ("response", "served_from_cache", "status"),
+    [
+        ({"status": 200}, True, "memory"),
+        ({"status": 200, "fromServiceWorker": True}, False, "service-worker"),
+        ({"status": 200, "fromPrefetchCache": True}, False, "prefetch"),
+        ({"status": 200, "fromDiskCache": True}, False, "disk"),
+        ({"status": 304}, False, "revalidated"),
+        ({"status": 200}, False, "network"),
+    ],
+)
+def test_cache_status(response, served_from_cache, status):
+    assert _cache_status(response, served_from_cache) == status
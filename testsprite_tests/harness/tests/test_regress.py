@@ -0,0 +1,92 @@
+"""Rank statistics, power limits and verdicts of the regression detector."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from harness.regress import Thresholds, analyse, can_reach, collect, mann_whitney_greater, rankdata
+from harness.results import ResultsStore
+
+
+def test_rankdata_averages_ties():
+    assert rankdata(np.array([10.0, 20.0, 10.0, 30.0])).tolist() == [1.5, 3.0, 1.5, 4.0]
+
+
+def test_mann_whitney_permutation_bounds():
+    rng = np.random.default_rng(0)
+    x, y = np.array([50.0, 51.0, 52.0]), np.arange(10.0)
+    # Three current samples above ten baseline ones: 1 / C(13, 3) is far below any alpha
+    assert mann_whitney_greater(x, y, rng) < 0.01
+    assert mann_whitney_greater(-x, -y, rng) > 0.99
+
+
+def test_mann_whitney_normal_approximation():
+    rng = np.random.default_rng(0)
+    y = rng.normal(100, 5, 30)
+    assert mann_whitney_greater(y + 20, y, rng) < 1e-6
+    assert mann_whitney_greater(y, y, rng) > 0.4
+    assert mann_whitney_greater(np.full(12, 5.0), np.full(12, 5.0), rng) == 1.0
+
+
+@pytest.mark.parametrize(("current", "baseline", "reachable"), [(1, 19, False), (1, 20, True), (2, 5, True), (3, 2, False)])
+def test_can_reach(current, baseline, reachable):
+    assert can_reach(current, baseline, 0.05) is reachable
+
+
+def series(current: list[float], baseline: list[float]) -> dict:
+    return {("engine", "step", "TC001", 3, "click"): (current, baseline)}
+
+
+def test_single_run_needs_enough_baseline_runs():
+    rng = np.random.default_rng(1)
+    # A 5× slowdown cannot be significant against ten runs: it is skipped, not reported unchanged
+    assert analyse(series([500.0], list(100 + rng.normal(0, 5, 10)))) == []
+    (finding,) = analyse(series([500.0], list(100 + rng.normal(0, 5, 20))))
+    assert finding.verdict == "regression"
+    assert finding.p_slower < 0.05 < finding.p_faster
+
+
+def test_pooled_runs_flag_sooner():
+    rng = np.random.default_rng(2)
+    (finding,) = analyse(series([490.0, 500.0, 510.0], list(100 + rng.normal(0, 5, 8))))
+    assert finding.verdict == "regression"
+    assert finding.ci_low > 1
+
+
+def test_improvement_and_thresholds():
+    rng = np.random.default_rng(3)
+    baseline = list(200 + rng.normal(0, 5, 20))
+    (finding,) = analyse(series([100.0, 101.0, 99.0], baseline))
+    assert finding.verdict == "improvement"
+    # Significant but below the minimum shift
+    (finding,) = analyse(series([215.0, 216.0, 217.0], baseline), Thresholds(min_shift=0.10))
+    assert finding.verdict == "unchanged"
+
+
+def test_collect_splits_runs_and_keeps_passing_timings(tmp_path):
+    path = tmp_path / "history.jsonl"
+    for run, value in enumerate([100, 101, 102, 103, 300]):
+        store = ResultsStore("engine", path=path, run_id=f"r{run}", profile="none")
+        store.record("step", value, test="TC001", step=1, op="click", status="pass")
+        store.record("step", 9999, test="TC001", step=1, op="click", status="fail")
+        store.record("peak_dom_nodes", 500, unit="count", test="TC001")
+    run, found = collect("engine", window=3, path=path)
+    assert run == "r4"
+    ((key, (current, baseline)),) = found.items()
+    assert current == [300.0]
+    assert baseline == [101.0, 102.0, 103.0]
+    assert dict(zip(("suite", "metric", "test"), key)) == {"suite": "engine", "metric": "step", "test": "TC001"}
+    run, found = collect("engine", run="r2", window=1, recent=2, path=path)
+    assert list(found.values()) == [([101.0, 102.0], [100.0])]
+
+
+def test_collect_unknown_run(tmp_path):
+    path = tmp_path / "history.jsonl"
+    path.write_text(json.dumps({"run": "r0", "suite": "engine", "metric": "test", "value": 1.0}) + "\n")
+    with pytest.raises(LookupError):
+        collect("engine", run="nope", path=path)
+    with pytest.raises(LookupError):
+        collect("journey", path=path)
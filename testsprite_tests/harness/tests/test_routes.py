@@ -0,0 +1,73 @@
+"""Route discovery from a SvelteKit tree, page templates and journey phases."""
+
+from __future__ import annotations
+
+import pytest
+
+from harness import engine, routes
+from harness.journey import phases
+from harness.plan import CompiledTest
+from harness.routes import PublicRules, discover_routes, route_template
+
+RULES = PublicRules(("/", "/login"), ("/docs",))
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    for page in ("login", "(authenticated)/w/new", "(authenticated)/w/[slug]/inbox", "(authenticated)/w/[slug]/meetings/[id]", "docs/[...path]"):
+        (tmp_path / page).mkdir(parents=True)
+        (tmp_path / page / "+page.svelte").write_text("")
+    (tmp_path / "+page.svelte").write_text("")
+    (tmp_path / "api" / "[[lang]]").mkdir(parents=True)
+    (tmp_path / "api" / "[[lang]]" / "+server.ts").write_text("export const GET = x;\nexport async function POST() {}\nexport const GET = y;\n")
+    monkeypatch.setattr(routes, "discover_routes", lambda: discover_routes(tmp_path, RULES))
+    routes._page_patterns.cache_clear()
+    yield tmp_path
+    routes._page_patterns.cache_clear()
+
+
+def test_discover_routes(tree):
+    found = {(r.path, r.kind): r for r in discover_routes(tree, RULES)}
+    assert sorted(found) == [
+        ("/", "page"),
+        ("/api/{lang}", "endpoint"),
+        ("/docs/{path}", "page"),
+        ("/login", "page"),
+        ("/w/new", "page"),
+        ("/w/{slug}/inbox", "page"),
+        ("/w/{slug}/meetings/{id}", "page"),
+    ]
+    assert found["/api/{lang}", "endpoint"].methods == ("GET", "POST")
+    assert found["/docs/{path}", "page"].rest == ("path",)
+    assert found["/docs/{path}", "page"].public
+    inbox = found["/w/{slug}/inbox", "page"]
+    assert inbox.groups == ("authenticated",) and not inbox.public
+    assert inbox.url(slug="acme") == "/w/acme/inbox"
+    assert found["/w/{slug}/meetings/{id}", "page"].url() == "/w/probe-slug/meetings/probe-id"
+
+
+@pytest.mark.parametrize(
+    ("path", "template"),
+    [
+        ("/", "/"),
+        ("/login/", "/login"),
+        ("/w/new", "/w/new"),
+        ("/w/acme/inbox", "/w/{slug}/inbox"),
+        ("/w/acme/meetings/42", "/w/{slug}/meetings/{id}"),
+        ("/docs/intro", "/docs/{path}"),
+        ("/docs/guides/rbac/roles", "/docs/{path}"),
+        ("/w/acme/unknown", "/w/acme/unknown"),
+    ],
+)
+def test_route_template(tree, path, template):
+    assert route_template(path) == template
+
+
+def record(route: str | None, ms: float) -> engine.StepRecord:
+    return engine.StepRecord(0, "click", "", ms=ms, status="pass", data={} if route is None else {"route": route})
+
+
+def test_phases_split_on_route_changes():
+    run = engine.TestRun(CompiledTest("TC006", "", ""))
+    run.records = [record("/", 100), record("/login", 200), record("/login", 50), record(None, 999), record("/w/{slug}/inbox", 300), record("/login", 10)]
+    assert phases(run) == {"/": 100, "/login": 250, "/w/{slug}/inbox": 300, "/login#2": 10}
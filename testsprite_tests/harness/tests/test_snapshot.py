@@ -0,0 +1,103 @@
+"""Offline selector evaluation against a hand-built snapshot table."""
+
+from __future__ import annotations
+
+import pytest
+
+from harness.batch_expect import Expectation
+from harness.snapshot import Snapshot, UnsupportedSelector, compile_css, text_matcher
+
+BOX = [0.0, 0.0, 100.0, 20.0]
+
+# (node type, name, parent, attributes, text value, visibility)
+NODES = [
+    (9, "#document", -1, {}, None, None),
+    (1, "HTML", 0, {}, None, "visible"),
+    (1, "BODY", 1, {}, None, "visible"),
+    (1, "NAV", 2, {"class": "main sidebar"}, None, "visible"),
+    (1, "A", 3, {"href": "/w/acme/inbox", "id": "inbox-link"}, None, "visible"),
+    (3, "#text", 4, {}, "Inbox", None),
+    (1, "BUTTON", 2, {"aria-label": "Close dialog", "data-state": "open"}, None, "visible"),
+    (3, "#text", 6, {}, "×", None),
+    (1, "DIV", 2, {"class": "panel", "data-state": "closed"}, None, "hidden"),
+    (3, "#text", 8, {}, "Secret   notes", None),
+    (1, "INPUT", 2, {"type": "email", "id": "email"}, None, "visible"),
+    (1, "LABEL", 2, {"for": "email"}, None, "visible"),
+    (3, "#text", 11, {}, "Email address", None),
+    (1, "SCRIPT", 2, {}, None, None),
+    (3, "#text", 13, {}, "window.inbox = 1", None),
+]
+
+
+@pytest.fixture
+def snapshot() -> Snapshot:
+    return Snapshot(
+        {
+            "url": "http://localhost:5173/w/acme/inbox",
+            "type": [n[0] for n in NODES],
+            "name": [n[1] for n in NODES],
+            "parent": [n[2] for n in NODES],
+            "attrs": [n[3] for n in NODES],
+            "value": [n[4] for n in NODES],
+            "bounds": [BOX if n[5] else None for n in NODES],
+            "visibility": [n[5] for n in NODES],
+        }
+    )
+
+
+def test_text_matcher_modes():
+    assert text_matcher("inbox")("Universal Inbox")
+    assert not text_matcher('"Inbox"')("Universal Inbox")
+    assert text_matcher('"Inbox"')("Inbox")
+    assert text_matcher("/^in/i")("Inbox")
+    assert not text_matcher("/^in/")("Inbox")
+    assert text_matcher("secret notes")("Secret notes")
+
+
+def test_compile_css_right_to_left():
+    (chain,) = compile_css("nav.main > a[href^='/w/']")
+    assert chain == (
+        (">", ("A", (), (), (("href", "^=", "/w/"),))),
+        (" ", ("NAV", (), ("main",), ())),
+    )
+    assert len(compile_css("button, #email")) == 2
+
+
+@pytest.mark.parametrize("selector", ["a:has(span)", "div ~ p", ""])
+def test_compile_css_rejects_unsupported(selector):
+    with pytest.raises(UnsupportedSelector):
+        compile_css(selector)
+
+
+def test_css_query(snapshot):
+    assert snapshot.query("nav > a") == [4]
+    assert snapshot.query("body a#inbox-link") == [4]
+    assert snapshot.query("html > a") == []
+    assert snapshot.query("[data-state=closed]") == [8]
+    assert snapshot.query(".main.sidebar a[href$=inbox]") == [4]
+    assert snapshot.query("button, input[type=email]") == [6, 10]
+
+
+def test_text_query_narrows_to_deepest_match_and_skips_scripts(snapshot):
+    assert snapshot.query("text=Inbox") == [4]
+    assert snapshot.query("text=window.inbox") == []
+
+
+def test_role_query_uses_implicit_roles_and_names(snapshot):
+    assert snapshot.query("role=link") == [4]
+    assert snapshot.query('role=button[name="close"]') == [6]
+    assert snapshot.query('role=button[name="close"s]') == []
+    assert snapshot.query('role=textbox[name="Email address"s]') == [10]
+    assert snapshot.query("role=navigation") == [3]
+
+
+def test_check_visibility_and_text(snapshot):
+    assert snapshot.check(Expectation.parse("text=Inbox"))
+    assert not snapshot.check(Expectation.parse(".panel"))
+    assert snapshot.check(Expectation.parse("#inbox-link", contains="Inbox"))
+    assert not snapshot.check(Expectation.parse("#inbox-link", contains="Flashcards"))
+
+
+def test_query_rejects_playwright_only_selectors(snapshot):
+    with pytest.raises(UnsupportedSelector):
+        snapshot.query("xpath=//a")
@@ -0,0 +1,140 @@
+"""Named network/CPU throttling profiles applied over CDP.
+
+A profile sets ``Network.emulateNetworkConditions`` (latency, throughput)
+and ``Emulation.setCPUThrottlingRate`` on a page. The engine applies one
+per run (``--profile mobile-4g``) or per test (``--profile TC013=slow-3g``),
+and every result is tagged with the profile name, so timings from
+throttled and unthrottled runs never get mixed up in the history.
+
+    python -m harness.engine --only TC013,TC020 --profile none,mobile-4g,slow-3g
+    python -m harness.throttle            # list profiles
+
+Ad-hoc profiles use ``latency_ms/down_kbps/up_kbps/cpu``, e.g. ``300/800/400/6``.
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+
+from playwright.async_api import BrowserContext, CDPSession, Error as PlaywrightError, Page
+
+from .engine import Hook, StepRecord, TestRun
+from .plan import Step
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    latency_ms: float = 0.0
+    down_kbps: float = 0.0  # 0 = unlimited
+    up_kbps: float = 0.0
+    cpu_rate: float = 1.0  # 4 = four times slower
+    offline: bool = False
+
+    @property
+    def throttled(self) -> bool:
+        return bool(self.latency_ms or self.down_kbps or self.up_kbps or self.offline or self.cpu_rate > 1)
+
+    @classmethod
+    def parse(cls, spec: str) -> Profile:
+        """A name from :data:`PROFILES` or ``latency_ms/down_kbps/up_kbps/cpu``."""
+        if spec in PROFILES:
+            return PROFILES[spec]
+        parts = spec.split("/")
+        if len(parts) != 4:
+            raise ValueError(f"unknown profile {spec!r}; choose from {', '.join(PROFILES)} or use latency/down/up/cpu")
+        latency, down, up, cpu = (float(p) for p in parts)
+        return cls(spec, latency, down, up, cpu)
+
+
+# Network figures follow Chrome DevTools / Lighthouse presets; CPU rates approximate a
+# mid-range phone (4x) and a low-end one (6x) relative to a desktop CI box
+PROFILES = {
+    p.name: p
+    for p in (
+        Profile("none"),
+        Profile("desktop-cable", latency_ms=28, down_kbps=5000, up_kbps=1000),
+        Profile("mobile-4g", latency_ms=150, down_kbps=1638.4, up_kbps=750, cpu_rate=4),
+        Profile("fast-3g", latency_ms=562.5, down_kbps=1474.6, up_kbps=675, cpu_rate=4),
+        Profile("slow-3g", latency_ms=2000, down_kbps=400, up_kbps=400, cpu_rate=6),
+        Profile("offline", offline=True),
+    )
+}
+
+
+async def apply_profile(context: BrowserContext, page: Page, profile: Profile) -> CDPSession:
+    """Throttle ``page``; the returned session must stay open for the throttling to last."""
+    cdp = await context.new_cdp_session(page)
+    await cdp.send("Network.enable")
+    await cdp.send(
+        "Network.emulateNetworkConditions",
+        {
+            "offline": profile.offline,
+            "latency": profile.latency_ms,
+            "downloadThroughput": profile.down_kbps * 1024 / 8 if profile.down_kbps else -1,
+            "uploadThroughput": profile.up_kbps * 1024 / 8 if profile.up_kbps else -1,
+        },
+    )
+    await cdp.send("Emulation.setCPUThrottlingRate", {"rate": profile.cpu_rate})
+    return cdp
+
+
+def parse_profiles(spec: str) -> tuple[list[Profile], dict[str, Profile]]:
+    """``none,mobile-4g,TC013=slow-3g`` → run-wide profiles and per-test overrides."""
+    run_wide: list[Profile] = []
+    per_test: dict[str, Profile] = {}
+    for item in (s.strip() for s in spec.split(",") if s.strip()):
+        if "=" in item:
+            test_id, name = item.split("=", 1)
+            per_test[test_id.strip().upper()] = Profile.parse(name.strip())
+        else:
+            run_wide.append(Profile.parse(item))
+    return run_wide or [PROFILES["none"]], per_test
+
+
+class Throttler(Hook):
+    """Applies a profile to every page of every test (or a per-test override)."""
+
+    def __init__(self, profile: Profile, per_test: dict[str, Profile] | None = None) -> None:
+        self.profile = profile
+        self.per_test = per_test or {}
+        self.sessions: dict[Page, CDPSession] = {}
+
+    def profile_for(self, run: TestRun) -> Profile:
+        return self.per_test.get(run.test.id, self.profile)
+
+    async def ensure(self, run: TestRun) -> None:
+        page = run.page
+        profile = self.profile_for(run)
+        if page in self.sessions or not profile.throttled:
+            return
+        try:
+            self.sessions[page] = await apply_profile(run.context, page, profile)
+        except PlaywrightError as exc:
+            run.data["profile_error"] = str(exc).splitlines()[0][:120]
+
+    async def test_started(self, run: TestRun) -> None:
+        run.data["profile"] = self.profile_for(run).name
+        await self.ensure(run)
+
+    async def step_started(self, run: TestRun, step: Step, record: StepRecord) -> None:
+        # Pages opened by a click (new tabs) are throttled before their first step
+        await self.ensure(run)
+
+    async def test_finished(self, run: TestRun) -> None:
+        for page in [p for p in self.sessions if p.context == run.context]:
+            del self.sessions[page]
+
+
+def main(argv: list[str] | None = None) -> None:
+    argparse.ArgumentParser(description="List throttling profiles").parse_args(argv)
+    print(f"{'profile':<14} {'latency':>8} {'down':>10} {'up':>10} {'cpu':>4}")
+    for p in PROFILES.values():
+        down = f"{p.down_kbps:.0f} kbps" if p.down_kbps else "-"
+        up = f"{p.up_kbps:.0f} kbps" if p.up_kbps else "-"
+        print(f"{p.name:<14} {p.latency_ms:>6.0f}ms {down:>10} {up:>10} {p.cpu_rate:>3.0f}x" + ("  offline" if p.offline else ""))
+
+
+if __name__ == "__main__":
+    main()
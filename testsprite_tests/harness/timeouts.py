@@ -0,0 +1,162 @@
+"""Per-step timeout budgets learned from the engine's run history.
+
+The scripts wait up to 5 s per click and 30 s per expectation, so a missing
+element stalls a run for half a minute per check. The engine records every
+passing step's duration (``step`` metrics in ``history.jsonl``); from the
+last ``--window`` runs of the same profile, target and mode (``--parallel``,
+``--keep-sleeps``, ``--settle``, ``--snapshots``) this module derives, per
+``<test>:<step>:<op>``::
+
+    budget = clamp(p99 × factor + margin, floor, script timeout)
+
+Steps with fewer than ``min_samples`` passing samples keep the script's
+timeout. A budget never exceeds the script's own timeout, so learning can only
+make a run fail sooner, never let a slower one through. The margin and
+factor keep room for legitimately slow but healthy steps. Each run writes
+the budgets it applied to ``tmp/results/step-timeouts.json``.
+
+    python -m harness.engine --timeouts learned       # default once history exists
+    python -m harness.timeouts --profile none --target prod
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .plan import CompiledTest, Step, compile_plan
+from .results import HISTORY_PATH, RESULTS_DIR, load_history
+from .stats import percentile
+
+TIMEOUTS_PATH = RESULTS_DIR / "step-timeouts.json"
+WAITING_OPS = {"goto", "click", "fill", "expect_visible", "expect_text", "expect_url"}
+GOTO_MIN_TIMEOUT = 10000.0
+# Engine run tags that change how long a step takes, with their value when absent
+MODE: dict[str, Any] = {"parallel": 1, "keep_sleeps": False, "settle": False, "snapshots": False}
+
+
+@dataclass(frozen=True)
+class BudgetRule:
+    quantile: float = 99
+    factor: float = 1.5
+    margin_ms: float = 1000.0
+    floor_ms: float = 1500.0
+    min_samples: int = 5
+    window: int = 20  # most recent engine runs considered
+
+
+def step_key(test_id: str, index: int, op: str) -> str:
+    return f"{test_id}:{index:03d}:{op}"
+
+
+def script_timeout(step: Step, action_timeout: float = 5000, expect_timeout: float = 30000) -> float:
+    """The timeout the engine uses for ``step`` when no budget applies."""
+    if step.op == "goto":
+        return max(step.timeout or action_timeout, GOTO_MIN_TIMEOUT)
+    if step.op.startswith("expect_"):
+        return step.timeout or expect_timeout
+    return step.timeout or action_timeout
+
+
+def step_samples(
+    profile: str = "none", target: str = "dev", window: int = 20, path: Path = HISTORY_PATH, **mode: Any
+) -> dict[str, list[float]]:
+    """Passing step durations of the last ``window`` engine runs for ``profile``/``target`` and run ``mode``.
+
+    ``mode`` holds the run tags that change step timings (see ``MODE``); only
+    runs with the same values count. Batched expectations (their time is the
+    increment over the previous check) are left out.
+    """
+    wanted = {**MODE, **mode}
+    by_run: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for record in load_history(path, suite="engine", metric="step", status="pass", profile=profile):
+        if record.get("target", "dev") != target or record.get("batched") or record.get("offline"):
+            continue
+        if all(record.get(tag, default) == wanted[tag] for tag, default in MODE.items()):
+            by_run[record["run"]].append(record)
+    samples: dict[str, list[float]] = defaultdict(list)
+    for run in list(by_run)[-window:]:  # history is append-only, so insertion order is run order
+        for record in by_run[run]:
+            samples[step_key(record["test"], record["step"], record["op"])].append(record["value"])
+    return samples
+
+
+def learn(
+    tests: list[CompiledTest],
+    profile: str = "none",
+    target: str = "dev",
+    rule: BudgetRule | None = None,
+    action_timeout: float = 5000,
+    expect_timeout: float = 30000,
+    per_test_profile: dict[str, str] | None = None,
+    path: Path = HISTORY_PATH,
+    **mode: Any,
+) -> dict[str, dict[str, float]]:
+    """``step key -> {timeout, script, p99, samples}`` for every step with enough history."""
+    rule = rule or BudgetRule()
+    per_test_profile = per_test_profile or {}
+    cache: dict[str, dict[str, list[float]]] = {}
+    budgets: dict[str, dict[str, float]] = {}
+    for test in tests:
+        test_profile = per_test_profile.get(test.id, profile)
+        if test_profile not in cache:
+            cache[test_profile] = step_samples(test_profile, target, rule.window, path, **mode)
+        samples = cache[test_profile]
+        for index, step in enumerate(test.steps):
+            if step.op not in WAITING_OPS:
+                continue
+            key = step_key(test.id, index, step.op)
+            values = samples.get(key, [])
+            if len(values) < rule.min_samples:
+                continue
+            script = script_timeout(step, action_timeout, expect_timeout)
+            high = percentile(values, rule.quantile)
+            budget = min(max(high * rule.factor + rule.margin_ms, rule.floor_ms), script)
+            budgets[key] = {"timeout": round(budget), "script": script, "p99": round(high, 1), "samples": len(values)}
+    return budgets
+
+
+def save(budgets: dict[str, dict[str, float]], profile: str, target: str, rule: BudgetRule, path: Path = TIMEOUTS_PATH) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"learned_at": time.time(), "profile": profile, "target": target, "rule": rule.__dict__, "steps": budgets}
+    path.write_text(json.dumps(payload, indent=1), encoding="utf-8")
+    return path
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Show the step timeout budgets learned from the run history")
+    parser.add_argument("--only", help="comma-separated test ids")
+    parser.add_argument("--profile", default="none")
+    parser.add_argument("--target", default="dev")
+    parser.add_argument("--parallel", type=int, default=1)
+    parser.add_argument("--keep-sleeps", action="store_true")
+    parser.add_argument("--settle", action="store_true")
+    parser.add_argument("--snapshots", action="store_true")
+    parser.add_argument("--window", type=int, default=BudgetRule.window)
+    parser.add_argument("--factor", type=float, default=BudgetRule.factor)
+    parser.add_argument("--margin", type=float, default=BudgetRule.margin_ms, help="ms added to p99 × factor")
+    parser.add_argument("--min-samples", type=int, default=BudgetRule.min_samples)
+    args = parser.parse_args(argv)
+
+    wanted = {t.strip().upper() for t in args.only.split(",")} if args.only else None
+    tests = [t for t in compile_plan() if wanted is None or t.id in wanted]
+    rule = BudgetRule(factor=args.factor, margin_ms=args.margin, min_samples=args.min_samples, window=args.window)
+    mode = {"parallel": args.parallel, "keep_sleeps": args.keep_sleeps, "settle": args.settle, "snapshots": args.snapshots}
+    budgets = learn(tests, args.profile, args.target, rule, **mode)
+    if not budgets:
+        print(f"no step has {rule.min_samples}+ passing samples for {args.profile}/{args.target}; script timeouts apply")
+        return
+    print(f"{'step':<26} {'samples':>7} {'p99':>9} {'budget':>9} {'script':>9}")
+    for key, b in budgets.items():
+        print(f"{key:<26} {b['samples']:>7} {b['p99']:>7.0f}ms {b['timeout']:>7.0f}ms {b['script']:>7.0f}ms")
+    saved = sum(b["script"] - b["timeout"] for b in budgets.values())
+    print(f"{len(budgets)} steps budgeted; worst-case wait cut by {saved / 1000:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
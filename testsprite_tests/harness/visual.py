@@ -0,0 +1,265 @@
+"""Per-step screenshots, content-addressed storage and NumPy visual diffing.
+
+:class:`ScreenshotRecorder` (an engine hook, ``--screens``) captures a PNG
+after every executed step and hands hashing and writing to a thread, so the
+next step starts straight away. Files are stored under their SHA-256 in
+``tmp/screens/objects``; a frame that looks the same in every run is stored
+once. ``tmp/screens/baselines.json`` maps ``<test>:<step>:<op>`` to the
+accepted hash.
+
+When a test finishes, every step whose hash differs from its baseline is
+compared in a process pool shared by the run:
+
+- pixel diff: share of pixels whose largest channel difference exceeds
+  ``tolerance`` (vectorised over the whole frame)
+- perceptual hash: 64-bit difference hash of a 9×8 area-averaged grayscale
+  thumbnail; the Hamming distance ignores anti-aliasing and small shifts
+
+A frame is ``same`` when few pixels moved, ``minor`` when pixels changed but
+the hash barely did, and ``changed`` (fails the test) when the hash distance
+or frame size differs. Identical hashes never reach the pool. The verdict is
+settled before the test closes, so ``--artefacts`` keeps the evidence of a
+test that failed on a visual change.
+
+    python -m harness.engine --screens                     # capture + compare
+    python -m harness.engine --screens --accept-screens    # (re)baseline
+    python -m harness.visual compare tmp/results/engine-<run>.json
+
+Requires ``numpy`` and ``Pillow`` (PNG decoding).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from PIL import Image
+from playwright.async_api import Error as PlaywrightError
+
+from .config import TMP_DIR
+from .engine import Engine, Hook, StepRecord, TestRun
+from .plan import Step
+
+SCREENS_DIR = TMP_DIR / "screens"
+OBJECTS_DIR = SCREENS_DIR / "objects"
+BASELINES_PATH = SCREENS_DIR / "baselines.json"
+SKIPPED_OPS = {"sleep", "unsupported"}
+
+
+@dataclass(frozen=True)
+class DiffThresholds:
+    tolerance: int = 16  # per-channel difference below which a pixel counts as unchanged
+    max_pixel_ratio: float = 0.001
+    max_hash_distance: int = 6
+
+
+def object_path(sha: str) -> Path:
+    return OBJECTS_DIR / sha[:2] / f"{sha}.png"
+
+
+def store_png(data: bytes) -> str:
+    """Write ``data`` under its SHA-256 unless already present; return the hash."""
+    sha = hashlib.sha256(data).hexdigest()
+    path = object_path(sha)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+    return sha
+
+
+def load_baselines(path: Path = BASELINES_PATH) -> dict[str, str]:
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def save_baselines(baselines: dict[str, str], path: Path = BASELINES_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(dict(sorted(baselines.items())), indent=1), encoding="utf-8")
+
+
+def frame_key(test_id: str, index: int, op: str) -> str:
+    return f"{test_id}:{index:03d}:{op}"
+
+
+def _pixels(sha: str) -> np.ndarray:
+    with Image.open(object_path(sha)) as image:
+        return np.asarray(image.convert("RGB"), dtype=np.int16)
+
+
+def _area_mean(gray: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Resize by averaging blocks (cropping the remainder), fully vectorised."""
+    h, w = gray.shape
+    bh, bw = max(h // rows, 1), max(w // cols, 1)
+    cropped = gray[: bh * rows, : bw * cols]
+    return cropped.reshape(rows, bh, cols, bw).mean(axis=(1, 3))
+
+
+def dhash(pixels: np.ndarray) -> int:
+    gray = pixels @ np.array([0.299, 0.587, 0.114])
+    small = _area_mean(gray, 8, 9)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def compare(baseline: str, current: str, thresholds: DiffThresholds) -> dict[str, Any]:
+    """Diff two stored frames; runs in a worker process."""
+    a, b = _pixels(baseline), _pixels(current)
+    if a.shape != b.shape:
+        return {"status": "changed", "reason": f"size {a.shape[1]}x{a.shape[0]} → {b.shape[1]}x{b.shape[0]}"}
+    delta = np.abs(a - b).max(axis=2)
+    ratio = float((delta > thresholds.tolerance).mean())
+    distance = (dhash(a) ^ dhash(b)).bit_count()
+    if distance > thresholds.max_hash_distance:
+        status = "changed"
+    elif ratio > thresholds.max_pixel_ratio:
+        status = "minor"
+    else:
+        status = "same"
+    return {"status": status, "pixel_ratio": round(ratio, 6), "mean_delta": round(float(delta.mean()), 3), "hash_distance": distance}
+
+
+def compare_all(
+    pairs: dict[str, tuple[str, str]], thresholds: DiffThresholds, workers: int | None = None, pool: Executor | None = None
+) -> dict[str, dict[str, Any]]:
+    """``key -> (baseline, current)`` diffed in ``pool`` (or a new process pool); equal hashes are ``same`` without decoding."""
+    results = {key: {"status": "same", "pixel_ratio": 0.0, "hash_distance": 0} for key, (a, b) in pairs.items() if a == b}
+    todo = {key: pair for key, pair in pairs.items() if pair[0] != pair[1]}
+    if todo and pool is not None:
+        futures = {key: pool.submit(compare, a, b, thresholds) for key, (a, b) in todo.items()}
+        results.update({key: future.result() for key, future in futures.items()})
+    elif todo:
+        with ProcessPoolExecutor(max_workers=workers) as own:
+            return compare_all(pairs, thresholds, pool=own)
+    return results
+
+
+class ScreenshotRecorder(Hook):
+    def __init__(self, accept: bool = False, thresholds: DiffThresholds | None = None, workers: int | None = None) -> None:
+        self.accept = accept
+        self.thresholds = thresholds or DiffThresholds()
+        self.workers = workers
+        self.pending: dict[int, list[asyncio.Task[None]]] = {}
+        self.baselines: dict[str, str] = {}
+        self.pool: ProcessPoolExecutor | None = None
+        self.results: dict[str, dict[str, Any]] = {}
+        self.compare_s = 0.0
+        self.unmatched = 0
+
+    async def engine_started(self, engine: Engine) -> None:
+        self.baselines = load_baselines()
+
+    async def step_finished(self, run: TestRun, step: Step, record: StepRecord) -> None:
+        if step.op in SKIPPED_OPS or record.status not in ("pass", "fail"):
+            return
+        try:
+            data = await run.page.screenshot(type="png", animations="disabled", caret="hide")
+        except PlaywrightError as exc:
+            record.data["screenshot_error"] = str(exc).splitlines()[0][:120]
+            return
+
+        async def persist() -> None:
+            record.data["screenshot"] = await asyncio.to_thread(store_png, data)
+
+        self.pending.setdefault(id(run), []).append(asyncio.create_task(persist()))
+
+    async def test_finished(self, run: TestRun) -> None:
+        # Decided here, before test_closed, so failure-only artefacts see the verdict
+        await asyncio.gather(*self.pending.pop(id(run), []))
+        if self.accept:
+            return
+        frames = {frame_key(run.test.id, r.index, r.op): r for r in run.records if "screenshot" in r.data}
+        pairs = {key: (self.baselines[key], r.data["screenshot"]) for key, r in frames.items() if key in self.baselines}
+        self.unmatched += len(frames) - len(pairs)
+        if not pairs:
+            return
+        if self.pool is None and any(a != b for a, b in pairs.values()):
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        start = time.perf_counter()
+        results = await asyncio.get_running_loop().run_in_executor(None, compare_all, pairs, self.thresholds, self.workers, self.pool)
+        self.compare_s += time.perf_counter() - start
+        self.results.update(results)
+        for key, result in sorted(results.items()):
+            record = frames[key]
+            record.data["visual"] = result
+            if result["status"] == "changed" and run.status == "pass":
+                run.status, run.error = "fail", f"visual change at step {record.index} ({record.label})"
+
+    async def engine_finished(self, engine: Engine, runs: list[TestRun]) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.accept:
+            frames = {frame_key(run.test.id, r.index, r.op): r.data["screenshot"] for run in runs for r in run.records if "screenshot" in r.data}
+            baselines = load_baselines()
+            baselines.update(frames)
+            save_baselines(baselines)
+            print(f"visual: accepted {len(frames)} frames as baselines")
+            return
+        counts = {s: sum(r["status"] == s for r in self.results.values()) for s in ("same", "minor", "changed")}
+        print(f"visual: {len(self.results)} frames compared in {self.compare_s:.2f}s {counts}, {self.unmatched} without baseline")
+
+
+def compare_report(report_path: Path, thresholds: DiffThresholds, workers: int | None) -> dict[str, dict[str, Any]]:
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    baselines = load_baselines()
+    pairs = {}
+    for test in report["tests"]:
+        for step in test["steps"]:
+            key = frame_key(test["id"], step["index"], step["op"])
+            sha = step.get("data", {}).get("screenshot")
+            if sha and key in baselines:
+                pairs[key] = (baselines[key], sha)
+    return compare_all(pairs, thresholds, workers)
+
+
+def main(argv: list[str] | None = None) -> None:
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument("report", type=Path, help="engine report JSON")
+    options.add_argument("--workers", type=int)
+    options.add_argument("--tolerance", type=int, default=DiffThresholds.tolerance)
+    options.add_argument("--max-pixel-ratio", type=float, default=DiffThresholds.max_pixel_ratio)
+    options.add_argument("--max-hash-distance", type=int, default=DiffThresholds.max_hash_distance)
+    parser = argparse.ArgumentParser(description="Visual diff of engine screenshots against baselines")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("compare", parents=[options], help="diff a report's frames against the baselines")
+    sub.add_parser("accept", parents=[options], help="make a report's frames the new baselines")
+    args = parser.parse_args(argv)
+
+    if args.command == "accept":
+        report = json.loads(args.report.read_text(encoding="utf-8"))
+        baselines = load_baselines()
+        accepted = {
+            frame_key(t["id"], s["index"], s["op"]): s["data"]["screenshot"]
+            for t in report["tests"]
+            for s in t["steps"]
+            if s.get("data", {}).get("screenshot")
+        }
+        baselines.update(accepted)
+        save_baselines(baselines)
+        print(f"accepted {len(accepted)} frames")
+        return
+
+    thresholds = DiffThresholds(args.tolerance, args.max_pixel_ratio, args.max_hash_distance)
+    start = time.perf_counter()
+    results = compare_report(args.report, thresholds, args.workers)
+    counts = {s: sum(r["status"] == s for r in results.values()) for s in ("same", "minor", "changed")}
+    print(f"{len(results)} frames in {time.perf_counter() - start:.2f}s: {counts}")
+    for key, result in sorted(results.items()):
+        if result["status"] != "same":
+            print(f"  {result['status']:<8} {key}  {result.get('reason') or result}")
+    if counts["changed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Vite dev-server warm-up: compile every route before timed tests start.
+
+Vite compiles modules on first request, so the first test to open a route
+pays for it. The warm-up does that work up front, in two parts:
+
+- ``ssr``     GET every page route (public anonymously, protected with the
+  cached login), which makes Vite compile the route's server-side modules
+- ``modules`` crawl the client module graph: start from each route's
+  ``+page``/``+layout`` sources and the HTML's module imports, then follow
+  every same-origin ``import`` in the transformed code
+
+Both parts run twice. The first pass is the cold compile cost, the second
+the warm (cached) cost, and the two are recorded as separate metrics. A cold
+pass that is no slower than the warm one means the server was already warm.
+
+    python -m harness.warmup --concurrency 16
+    python -m harness.engine --warmup --only TC013
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import quote
+
+from playwright.async_api import APIRequestContext, Error as PlaywrightError, async_playwright
+
+from .config import Settings, load_settings
+from .results import ResultsStore
+from .routes import ROUTES_DIR, discover_routes
+from .session import AuthSession, LoginError, api_login
+from .stats import summarize
+
+_IMPORT_RE = re.compile(
+    r"""(?:\bimport|\bexport)\s*(?:[\w*{}\s,$]+\s*from\s*)?["']([^"']+)["']|\bimport\(\s*["']([^"']+)["']\s*\)"""
+)
+MODULE_FILES = ("+page.svelte", "+page.ts", "+layout.svelte", "+layout.ts")
+
+
+@dataclass
+class Pass:
+    name: str
+    ssr_ms: dict[str, float] = field(default_factory=dict)
+    module_ms: dict[str, float] = field(default_factory=dict)
+    failed: dict[str, int] = field(default_factory=dict)
+    wall_ms: float = 0.0
+
+
+def route_sources(routes_dir: Path = ROUTES_DIR) -> list[str]:
+    """Vite URLs of every route/layout module under ``src/routes``."""
+    root = routes_dir.parents[1]
+    return sorted(quote("/" + path.relative_to(root).as_posix()) for name in MODULE_FILES for path in routes_dir.rglob(name))
+
+
+def imports(source: str) -> set[str]:
+    """Same-origin absolute import specifiers in Vite-transformed code or HTML."""
+    found = set()
+    for match in _IMPORT_RE.finditer(source):
+        spec = match.group(1) or match.group(2)
+        if spec.startswith("/") and not spec.startswith("//"):
+            found.add(spec)
+    return found
+
+
+def page_paths(session: AuthSession | None) -> list[tuple[str, bool]]:
+    """``(path, needs_login)`` for every page that needs no parameter besides the workspace slug."""
+    paths = []
+    for route in discover_routes():
+        if route.kind != "page" or any(p != "slug" for p in route.params):
+            continue
+        if route.params and not (session and session.workspace_slug):
+            continue
+        if not route.public and session is None:
+            continue
+        paths.append((route.url(slug=session.workspace_slug) if route.params else route.path, not route.public))
+    return paths
+
+
+async def timed_get(request: APIRequestContext, url: str, slots: asyncio.Semaphore) -> tuple[float, int, str]:
+    async with slots:
+        start = time.perf_counter()
+        try:
+            response = await request.get(url, max_redirects=0)
+            body = await response.text() if response.ok else ""
+            status = response.status
+        except PlaywrightError:
+            body, status = "", 0
+        return (time.perf_counter() - start) * 1000, status, body
+
+
+async def warm_pass(name: str, anon: APIRequestContext, authed: APIRequestContext | None, pages: list[tuple[str, bool]], seeds: list[str], concurrency: int) -> Pass:
+    result = Pass(name)
+    slots = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    async def ssr(path: str, needs_login: bool) -> set[str]:
+        ms, status, body = await timed_get(authed if needs_login and authed else anon, path, slots)
+        result.ssr_ms[path] = ms
+        if status >= 400 or status == 0:
+            result.failed[path] = status
+        return imports(body)
+
+    discovered = await asyncio.gather(*(ssr(path, login) for path, login in pages))
+    queue = set(seeds).union(*discovered)
+    seen: set[str] = set()
+    while queue:
+        batch = sorted(queue - seen)
+        seen.update(batch)
+        fetched = await asyncio.gather(*(timed_get(anon, url, slots) for url in batch))
+        queue = set()
+        for url, (ms, status, body) in zip(batch, fetched):
+            result.module_ms[url] = ms
+            if status >= 400 or status == 0:
+                result.failed[url] = status
+            else:
+                queue |= imports(body)
+    result.wall_ms = (time.perf_counter() - start) * 1000
+    return result
+
+
+async def warm_up(settings: Settings, concurrency: int = 16, passes: int = 2) -> list[Pass]:
+    async with async_playwright() as pw:
+        try:
+            session: AuthSession | None = await api_login(pw, settings)
+        except LoginError as exc:
+            print(f"warming public routes only: {exc}")
+            session = None
+        anon = await pw.request.new_context(base_url=settings.base_url)
+        authed = await pw.request.new_context(base_url=settings.base_url, storage_state=session.storage_state) if session else None
+        try:
+            pages = page_paths(session)
+            seeds = route_sources()
+            names = ["cold", "warm"] + [f"warm{i}" for i in range(2, passes)]
+            return [await warm_pass(name, anon, authed, pages, seeds, concurrency) for name in names[:passes]]
+        finally:
+            await anon.dispose()
+            if authed:
+                await authed.dispose()
+
+
+def report(results: list[Pass], store: ResultsStore | None = None) -> dict[str, object]:
+    """Print cold vs warm totals and record them; returns the report payload."""
+    summary = {}
+    for p in results:
+        summary[p.name] = {
+            "wall_ms": round(p.wall_ms, 1),
+            "routes": len(p.ssr_ms),
+            "modules": len(p.module_ms),
+            "ssr_ms": summarize(p.ssr_ms.values()),
+            "module_ms": summarize(p.module_ms.values()),
+            "ssr_total_ms": round(sum(p.ssr_ms.values()), 1),
+            "module_total_ms": round(sum(p.module_ms.values()), 1),
+            "failed": p.failed,
+        }
+        print(
+            f"{p.name:<5} {p.wall_ms / 1000:6.2f}s  {len(p.ssr_ms)} routes (Σ {sum(p.ssr_ms.values()) / 1000:.1f}s SSR)  "
+            f"{len(p.module_ms)} modules (Σ {sum(p.module_ms.values()) / 1000:.1f}s)  {len(p.failed)} failed"
+        )
+        if store:
+            store.record("warmup_wall", p.wall_ms, phase=p.name)
+            store.record("warmup_ssr_total", sum(p.ssr_ms.values()), phase=p.name, routes=len(p.ssr_ms))
+            store.record("warmup_module_total", sum(p.module_ms.values()), phase=p.name, modules=len(p.module_ms))
+            for path, ms in p.ssr_ms.items():
+                store.record("route_ssr", ms, phase=p.name, route=path)
+    if len(results) >= 2:
+        cold, warm = results[0], results[1]
+        compile_cost = {path: cold.ssr_ms[path] - warm.ssr_ms.get(path, 0.0) for path in cold.ssr_ms}
+        slowest = sorted(compile_cost.items(), key=lambda kv: -kv[1])[:5]
+        print("slowest cold routes: " + ", ".join(f"{path} +{ms:.0f}ms" for path, ms in slowest))
+        if cold.wall_ms <= warm.wall_ms * 1.1:
+            print("cold pass was not slower than warm: the dev server was probably already warm")
+        summary["route_compile_ms"] = {path: round(ms, 1) for path, ms in compile_cost.items()}
+    return summary
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Warm the Vite dev server by crawling every route")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--passes", type=int, default=2, help="first pass is cold, the rest warm")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(warm_up(load_settings(), args.concurrency, args.passes))
+    store = ResultsStore("warmup")
+    path = store.write_report(report(results, store))
+    print(f"report: {path}")
+
+
+if __name__ == "__main__":
+    main()